@@ -0,0 +1,579 @@
+import sys
+import subprocess
+import threading
+import time
+import argparse
+import re
+
+from engine import OutputPump, OutputBuffer, RunSignals
+
+
+# === Script enfant qui produit N lignes (stdout + une ligne sur 10 sur stderr) ===
+def chatty_command(lines):
+    code = (
+        "import sys\n"
+        f"for i in range({lines}):\n"
+        "    if i % 10 == 0:\n"
+        "        sys.stderr.write(f'err {i}\\n')\n"
+        "    else:\n"
+        "        sys.stdout.write(f'line {i}\\n')\n"
+    )
+    return [sys.executable, "-c", code]
+
+
+def spawn(lines, text=False):
+    return subprocess.Popen(
+        chatty_command(lines),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=text,
+        encoding="utf-8" if text else None
+    )
+
+
+# === Ancienne boucle readline alternée + sleep, pour comparaison ===
+def legacy_loop(proc, budget):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < budget:
+        out_line = proc.stdout.readline()
+        if out_line:
+            count += 1
+        err_line = proc.stderr.readline()
+        if err_line:
+            count += 1
+        if out_line == "" and err_line == "" and proc.poll() is not None:
+            break
+        time.sleep(0.01)
+    proc.kill()
+    return count
+
+
+def bench_pump(args):
+    counts = {"out": 0, "err": 0}
+
+    def on_out(line):
+        counts["out"] += 1
+
+    def on_err(line):
+        counts["err"] += 1
+
+    proc = spawn(args.lines)
+    start = time.perf_counter()
+    pump = OutputPump(proc, on_out, on_err)
+    pump.start()
+    proc.wait()
+    pump.join()
+    elapsed = time.perf_counter() - start
+    total = counts["out"] + counts["err"]
+    print(f"pompe     : {total} lignes en {elapsed:.2f} s -> {total / elapsed:,.0f} lignes/s")
+
+    if args.legacy_budget > 0:
+        proc = spawn(args.lines, text=True)
+        start = time.perf_counter()
+        total = legacy_loop(proc, args.legacy_budget)
+        elapsed = time.perf_counter() - start
+        print(f"ancienne  : {total} lignes en {elapsed:.2f} s -> {total / elapsed:,.0f} lignes/s")
+
+
+# === Lecture en octets et décodage incrémental ===
+# Le script enfant écrit --megabytes Mo en cp1252 avec des lignes de
+# longueurs différentes. La lecture par blocs (pompe actuelle) est comparée
+# à l'ancienne lecture ligne à ligne d'un flux texte.
+def bench_decode(args):
+    from engine import OutputPump
+
+    def read_lines(stream, callback):
+        import io
+        stream = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+        for line in stream:
+            callback(line.rstrip())
+
+    size = args.megabytes * 1024 * 1024
+    for length in (10, 100, 10_000, 1_000_000):
+        code = (
+            "import sys\n"
+            f"line = ('é' * {length - 1} + '\\n').encode('cp1252')\n"
+            f"for _ in range({max(1, size // length)}):\n"
+            "    sys.stdout.buffer.write(line)\n"
+        )
+        for name in ("ligne à ligne", "par blocs"):
+            received = [0]
+
+            def on_line(line):
+                received[0] += len(line) + 1
+            proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            start = time.perf_counter()
+            if name == "par blocs":
+                pump = OutputPump(proc, on_line, on_line)
+                pump.start()
+                proc.wait()
+                pump.join()
+            else:
+                threading.Thread(target=read_lines, args=(proc.stderr, on_line), daemon=True).start()
+                read_lines(proc.stdout, on_line)
+                proc.wait()
+            elapsed = time.perf_counter() - start
+            print(f"lignes de {length:>9,} car. | {name:13} : {received[0] / elapsed / 1e6:6.1f} M car./s")
+
+
+# === Filtres de sortie dans les threads lecteurs ===
+# Lignes et paquets qui atteindraient l'interface, avec et sans filtre qui
+# ne garde que les erreurs.
+def bench_filters(args):
+    from engine import OutputFilters, OutputFilter, FilteredOutput
+
+    for name, filters in (("sans filtre", None), ("filtre err", OutputFilters([OutputFilter(r"^err", "include")]))):
+        sent = {"chunks": 0, "lines": 0}
+
+        def emit(entries):
+            sent["chunks"] += 1
+            sent["lines"] += len(entries)
+
+        proc = spawn(args.lines)
+        start = time.perf_counter()
+        buffer = OutputBuffer(emit)
+        sink = buffer if filters is None else FilteredOutput(buffer, filters, lambda flt: None)
+        pump = OutputPump(proc, sink.output, sink.error)
+        pump.start()
+        proc.wait()
+        pump.join()
+        buffer.close()
+        elapsed = time.perf_counter() - start
+        print(f"{name} : {elapsed:.2f} s, {sent['lines']} lignes en {sent['chunks']} paquet(s) vers l'interface")
+
+
+# === Temps passé côté interface pour afficher N lignes ===
+# Un thread producteur émet les lignes comme le ferait un runner ; on mesure
+# le temps jusqu'à ce que la boucle d'événements ait tout affiché.
+def bench_console(args):
+    from PySide6.QtWidgets import QApplication, QPlainTextEdit
+    from PySide6.QtGui import QTextCursor
+    from PySide6.QtCore import QEventLoop, QObject
+    from main import ExecutionConsole, WorkerSignals
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    # Les slots doivent appartenir à un QObject du thread GUI pour que les
+    # signaux émis par le producteur soient bien mis en file d'attente.
+    class Sink(QObject):
+        def __init__(self, console):
+            super().__init__()
+            self.console = console
+            self.calls = 0
+
+        # Avant : un appendPlainText par ligne
+        def append_output(self, text):
+            self.calls += 1
+            self.console.appendPlainText(text)
+            self.console.moveCursor(QTextCursor.End)
+
+        # Après : une insertion groupée par paquet
+        def append_chunk(self, entries):
+            self.calls += 1
+            self.console.append_chunk(entries)
+
+    def measure(sink, produce):
+        signals = WorkerSignals()
+        signals.output.connect(sink.append_output)
+        signals.chunk.connect(sink.append_chunk)
+        loop = QEventLoop()
+        signals.finished.connect(loop.quit)
+        producer = threading.Thread(target=produce, args=(signals,))
+        start = time.perf_counter()
+        producer.start()
+        loop.exec()
+        elapsed = time.perf_counter() - start
+        producer.join()
+        return elapsed, sink.calls, sink.console.blockCount()
+
+    def legacy_produce(signals):
+        for i in range(args.lines):
+            signals.output.emit(f"line {i}")
+        signals.finished.emit()
+
+    def chunk_produce(signals):
+        buffer = OutputBuffer(signals.chunk.emit)
+        for i in range(args.lines):
+            buffer.output(f"line {i}")
+        buffer.close()
+        signals.finished.emit()
+
+    legacy_console = QPlainTextEdit()
+    legacy_console.setReadOnly(True)
+    legacy_console.show()
+    elapsed, calls, blocks = measure(Sink(legacy_console), legacy_produce)
+    print(f"avant : {elapsed:.2f} s, {calls} appels au slot, {blocks} blocs")
+
+    console = ExecutionConsole()
+    console.show()
+    elapsed, calls, blocks = measure(Sink(console), chunk_produce)
+    print(f"après : {elapsed:.2f} s, {calls} appels au slot, {blocks} blocs")
+
+
+# === Barre de progression réécrite avec « \\r » ===
+# Avant : chaque état devient une ligne de la console. Après : les états
+# intermédiaires sont fusionnés dans le tampon et la ligne est réécrite.
+def bench_progress(args):
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QEventLoop, QObject
+    from main import ExecutionConsole, WorkerSignals
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    class Sink(QObject):
+        def __init__(self):
+            super().__init__()
+            self.console = ExecutionConsole()
+            self.console.show()
+            self.calls = 0
+
+        def append_chunk(self, entries):
+            self.calls += 1
+            self.console.append_chunk(entries)
+
+    for name, suffix in (("avant", ""), ("après", "\r")):
+        sink = Sink()
+        signals = WorkerSignals()
+        signals.chunk.connect(sink.append_chunk)
+        loop = QEventLoop()
+        signals.finished.connect(loop.quit)
+
+        def produce():
+            buffer = OutputBuffer(signals.chunk.emit)
+            for i in range(args.updates):
+                buffer.output(f"\x1b[32m[{'#' * (i * 40 // args.updates):<40}]\x1b[0m {i}{suffix}")
+            buffer.close()
+            signals.finished.emit()
+
+        producer = threading.Thread(target=produce)
+        start = time.perf_counter()
+        producer.start()
+        loop.exec()
+        elapsed = time.perf_counter() - start
+        producer.join()
+        print(f"{name} : {elapsed:.2f} s, {sink.calls} paquet(s), {sink.console.blockCount()} bloc(s)")
+
+
+# === Coloration syntaxique d'un gros script ===
+def generated_script(lines):
+    body = [
+        "@echo off",
+        ":: script généré pour le benchmark",
+        'set NAME="valeur %RANDOM%"',
+        "if exist \"C:\\temp\\file.txt\" (echo trouvé) else (echo absent)",
+        "for /L %%i in (1,1,10) do call :work %%i",
+        "rem commentaire avec des mots-clés: echo set goto",
+        "cd \"%~dp0\" && dir /b > \"list.txt\"",
+        "goto :eof",
+    ]
+    return "\n".join(body[i % len(body)] for i in range(lines))
+
+
+def bench_highlight(args):
+    from PySide6.QtWidgets import QApplication, QPlainTextDocumentLayout
+    from PySide6.QtGui import QTextDocument, QTextCursor
+    from PySide6.QtCore import QRegularExpression
+    from engine import KEYWORDS
+    from main import BatchHighlighter
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    # Ancienne version : une expression par mot-clé, puis commentaires et chaînes
+    class LegacyHighlighter(BatchHighlighter):
+        def __init__(self, document):
+            super().__init__(document)
+            self.rules = [
+                (QRegularExpression(rf"\b{kw}\b", QRegularExpression.CaseInsensitiveOption), self.keyword_format)
+                for kw in KEYWORDS
+            ]
+            self.legacy_comment = QRegularExpression(r"^\s*(rem|::).*$", QRegularExpression.CaseInsensitiveOption)
+            self.string_pattern = QRegularExpression(r'"[^"\n]*"')
+
+        def highlightBlock(self, text):
+            self.calls += 1
+            for pattern, fmt in self.rules:
+                it = pattern.globalMatch(text)
+                while it.hasNext():
+                    match = it.next()
+                    self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+            comment_match = self.legacy_comment.match(text)
+            if comment_match.hasMatch():
+                self.setFormat(comment_match.capturedStart(), comment_match.capturedLength(), self.comment_format)
+            it = self.string_pattern.globalMatch(text)
+            while it.hasNext():
+                match = it.next()
+                self.setFormat(match.capturedStart(), match.capturedLength(), self.string_format)
+
+    class CountingHighlighter(BatchHighlighter):
+        def highlightBlock(self, text):
+            self.calls += 1
+            super().highlightBlock(text)
+
+    text = generated_script(args.lines)
+    for name, cls in (("avant", LegacyHighlighter), ("après", CountingHighlighter)):
+        # Même mise en page que le document d'un QPlainTextEdit
+        document = QTextDocument()
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        highlighter = cls(document)
+        app.processEvents()  # laisse passer le rehighlight différé de setDocument
+        highlighter.calls = 0
+        start = time.perf_counter()
+        document.setPlainText(text)
+        full = time.perf_counter() - start
+
+        # Frappe d'un caractère au milieu du document
+        highlighter.calls = 0
+        cursor = QTextCursor(document.findBlockByNumber(args.lines // 2))
+        start = time.perf_counter()
+        cursor.insertText("x")
+        edit = time.perf_counter() - start
+        print(f"{name} : document complet {full * 1000:.0f} ms, "
+              f"frappe {edit * 1000:.2f} ms ({highlighter.calls} bloc(s) recoloré(s))")
+
+        # Ligne unique très longue (script minifié)
+        document.setPlainText("echo %A% & " * (args.long_line // 11))
+        cursor = QTextCursor(document.firstBlock())
+        start = time.perf_counter()
+        cursor.insertText("x")
+        print(f"{name} : frappe sur une ligne de {args.long_line} caractères "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+# === Tout remplacer sur un gros document ===
+def bench_replace(args):
+    from PySide6.QtWidgets import QApplication, QPlainTextEdit
+    from PySide6.QtGui import QTextDocument
+    from main import BatchHighlighter, SearchReplaceDialog
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    text = generated_script(args.lines)
+
+    def editor():
+        edit = QPlainTextEdit()
+        edit.resize(800, 600)
+        edit.show()
+        if not args.no_highlight:
+            BatchHighlighter(edit.document())
+        app.processEvents()
+        edit.setPlainText(text)
+        return edit
+
+    # Avant : document.find + insertText pour chaque occurrence
+    edit = editor()
+    document = edit.document()
+    start = time.perf_counter()
+    cursor = edit.textCursor()
+    cursor.beginEditBlock()
+    pos = 0
+    count = 0
+    while True:
+        found = document.find("echo", pos, QTextDocument.FindWholeWords)
+        if found.isNull():
+            break
+        found.insertText("ECHO")
+        pos = found.position()
+        count += 1
+    cursor.endEditBlock()
+    print(f"avant : {count} remplacements en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Après : un passage sur l'instantané, une seule modification
+    edit = editor()
+    dialog = SearchReplaceDialog(edit)
+    dialog.search_input.setText("echo")
+    dialog.word_checkbox.setChecked(True)
+    dialog.case_checkbox.setChecked(True)
+    dialog.replace_input.setText("ECHO")
+    start = time.perf_counter()
+    dialog.replace_all()
+    print(f"après : {dialog.count_label.text()} en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+# === Latence d'une commande de la ligne interactive ===
+def bench_shell(args):
+    from engine import ShellSession, SHELL_COMMAND
+
+    # Avant : un shell démarré pour chaque commande
+    start = time.perf_counter()
+    for _ in range(args.commands):
+        subprocess.run(SHELL_COMMAND + (["/C"] if SHELL_COMMAND[0] == "cmd.exe" else ["-c"]) + ["echo ok"],
+                       capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    print(f"avant : {args.commands} commandes en {elapsed:.2f} s -> {elapsed / args.commands * 1000:.1f} ms/commande")
+
+    # Après : une session persistante, aller-retour jusqu'au marqueur
+    signals = RunSignals()
+    done = threading.Event()
+    signals.finished.connect(done.set)
+    session = ShellSession(signals)
+    session.start()
+    start = time.perf_counter()
+    for _ in range(args.commands):
+        done.clear()
+        session.execute("echo ok")
+        done.wait()
+    elapsed = time.perf_counter() - start
+    session.close()
+    print(f"après : {args.commands} commandes en {elapsed:.2f} s -> {elapsed / args.commands * 1000:.1f} ms/commande")
+
+
+# === Historique : enregistrement, liste et filtre ===
+def bench_history(args):
+    import tempfile
+    import os
+    from engine import RunHistory
+
+    folder = tempfile.mkdtemp()
+    history = RunHistory(os.path.join(folder, "history.sqlite3"))
+    output = [(i % 10 == 0, f"line {i}") for i in range(args.output_lines)]
+    start = time.perf_counter()
+    for i in range(args.runs):
+        history.record(f"C:\\scripts\\job{i % 50}.bat", "0" * 32, time.time() + i, 1.0, 0, output, len(output))
+    elapsed = time.perf_counter() - start
+    print(f"enregistrement : {args.runs} exécutions en {elapsed:.2f} s -> {elapsed / args.runs * 1000:.1f} ms/exécution")
+
+    for label, pattern in (("liste complète", ""), ("filtre job7", "job7")):
+        start = time.perf_counter()
+        rows = history.runs(pattern)
+        print(f"{label} : {len(rows)} lignes en {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    entries = history.diff(rows[-1][0], rows[0][0])
+    print(f"diff : {len(entries)} lignes en {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+# === Recherche indexée dans un dossier ===
+# --files scripts générés (labels, variables et commandes) ; indexation
+# complète, mise à jour sans changement, réouverture de l'index, puis
+# requêtes rares et fréquentes (première fois et répétées) comparées à une
+# relecture complète du dossier.
+def bench_search(args):
+    import os
+    import random
+    import tempfile
+    from engine import SearchIndex
+
+    folder = tempfile.mkdtemp()
+    words = ["echo", "set", "goto", "call", "if", "exist", "copy", "del", "%PATH%", "%TARGET%", "errorlevel"]
+    rng = random.Random(1)
+    for i in range(args.files):
+        directory = os.path.join(folder, f"dossier{i % 100}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"script{i}.bat"), "w") as f:
+            for j in range(args.lines):
+                f.write(" ".join(rng.choice(words) for _ in range(6)) + f" %VAR_{i}_{j}%\n")
+            f.write(f":label_{i}\ncall :label_{(i * 7) % args.files}\n")
+    db = os.path.join(folder, "index.sqlite3")
+
+    start = time.perf_counter()
+    index = SearchIndex(folder, db)
+    index.update()
+    print(f"indexation complète : {args.files} fichiers en {time.perf_counter() - start:.2f} s")
+    start = time.perf_counter()
+    index.update()
+    print(f"mise à jour sans changement : {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    index = SearchIndex(folder, db)
+    print(f"réouverture de l'index : {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for query in (f"label_{args.files // 2}", f"VAR_{args.files // 3}_1", "%target%"):
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            count = sum(len(batch) for batch in index.search(query))
+            timings.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        scanned = 0
+        for path in sorted(index.ids):
+            scanned += len(index.matches(path, re.compile(re.escape(query), re.IGNORECASE)))
+            if scanned >= SearchIndex.MAX_RESULTS:
+                break
+        full = (time.perf_counter() - start) * 1000
+        print(f"« {query} » : {count} résultat(s), index {timings[0]:.1f} ms puis {timings[1]:.2f} ms (cache), "
+              f"relecture complète {full:.0f} ms")
+
+
+# === Démarrage du mode sans interface ===
+def bench_startup(args):
+    import os
+    import tempfile
+
+    folder = tempfile.mkdtemp()
+    script = os.path.join(folder, "noop.bat")
+    with open(script, "w") as f:
+        f.write("echo ok\n")
+    os.chmod(script, 0o755)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name, command in (
+        ("python seul", [sys.executable, "-c", "pass"]),
+        ("main.py --run", [sys.executable, os.path.join(here, "main.py"), "--run", script, "--no-history"]),
+        ("cli.py --run", [sys.executable, os.path.join(here, "cli.py"), "--run", script, "--no-history"]),
+        ("import PySide6", [sys.executable, "-c", "import PySide6.QtWidgets"]),
+        ("IDE jusqu'à l'affichage", [sys.executable, os.path.join(here, "main.py"), "--startup-profile", "--exit"]),
+    ):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            subprocess.run(command, capture_output=True)
+        print(f"{name} : {(time.perf_counter() - start) / args.repeat * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks Batch IDE")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("pump", help="Débit de la pompe de sortie (lignes/s)")
+    p.add_argument("--lines", type=int, default=1_000_000)
+    p.add_argument("--legacy-budget", type=float, default=3.0,
+                   help="Secondes accordées à l'ancienne boucle (0 pour ignorer)")
+    p.set_defaults(func=bench_pump)
+
+    p = sub.add_parser("decode", help="Lecture en octets par blocs et décodage incrémental")
+    p.add_argument("--megabytes", type=int, default=50)
+    p.set_defaults(func=bench_decode)
+
+    p = sub.add_parser("filters", help="Filtres de sortie dans les threads lecteurs")
+    p.add_argument("--lines", type=int, default=500_000)
+    p.set_defaults(func=bench_filters)
+
+    p = sub.add_parser("console", help="Temps interface pour afficher N lignes")
+    p.add_argument("--lines", type=int, default=100_000)
+    p.set_defaults(func=bench_console)
+
+    p = sub.add_parser("progress", help="Barre de progression réécrite avec \\r")
+    p.add_argument("--updates", type=int, default=200_000)
+    p.set_defaults(func=bench_progress)
+
+    p = sub.add_parser("highlight", help="Coloration syntaxique d'un gros script")
+    p.add_argument("--lines", type=int, default=20_000)
+    p.add_argument("--long-line", type=int, default=1_000_000)
+    p.set_defaults(func=bench_highlight)
+
+    p = sub.add_parser("replace", help="Tout remplacer sur un gros document")
+    p.add_argument("--lines", type=int, default=20_000)
+    p.add_argument("--no-highlight", action="store_true",
+                   help="Sans coloration, pour isoler le coût des modifications")
+    p.set_defaults(func=bench_replace)
+
+    p = sub.add_parser("shell", help="Latence d'une commande interactive")
+    p.add_argument("--commands", type=int, default=200)
+    p.set_defaults(func=bench_shell)
+
+    p = sub.add_parser("history", help="Historique des exécutions (SQLite)")
+    p.add_argument("--runs", type=int, default=3000)
+    p.add_argument("--output-lines", type=int, default=1000)
+    p.set_defaults(func=bench_history)
+
+    p = sub.add_parser("search", help="Recherche indexée dans un dossier de scripts")
+    p.add_argument("--files", type=int, default=10000)
+    p.add_argument("--lines", type=int, default=40)
+    p.set_defaults(func=bench_search)
+
+    p = sub.add_parser("startup", help="Démarrage : main.py --run (sans Qt) et IDE complet")
+    p.add_argument("--repeat", type=int, default=10)
+    p.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
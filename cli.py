@@ -0,0 +1,148 @@
+# === Mode sans interface ===
+# python main.py --run script.bat [autre.bat ...] [--jobs 8] [--json]
+# Mêmes runners, limites, filtres et historique que l'IDE, sans Qt : seul
+# engine est importé, le démarrage ne coûte que quelques millisecondes.
+# La sortie est écrite au fil de l'eau sur stdout / stderr, ou en lignes
+# JSON avec --json (une ligne par ligne de sortie, puis une par script).
+import sys
+import os
+import re
+import json
+import sqlite3
+import codecs
+import argparse
+import threading
+from collections import deque
+
+from engine import (
+    BatchRunner, RunSignals, RunLimits, RunHistory, OutputFilter, OutputFilters, FILTER_ACTIONS, HighlightedLine
+)
+
+
+class ConsoleWriter:
+    def __init__(self, as_json, prefix):
+        self.as_json = as_json
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def chunk(self, path, entries):
+        with self._lock:
+            for is_error, text in entries:
+                # Ligne provisoire (« \r ») : la ligne complète suit
+                if text.endswith("\r"):
+                    continue
+                if self.as_json:
+                    entry = {"script": path, "stream": "stderr" if is_error else "stdout", "text": text}
+                    if isinstance(text, HighlightedLine):
+                        # Ligne retenue par un filtre highlight
+                        entry["highlight"] = True
+                    sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                else:
+                    stream = sys.stderr if is_error else sys.stdout
+                    name = f"[{os.path.basename(path)}] " if self.prefix else ""
+                    stream.write(f"{name}{text}\n")
+            sys.stdout.flush()
+
+    def finished(self, path, runner):
+        with self._lock:
+            if self.as_json:
+                sys.stdout.write(json.dumps({
+                    "script": path, "event": "finished", "exit_code": runner.returncode,
+                    "duration": runner.elapsed, "timed_out": runner.timed_out, "run_id": runner.run_id
+                }) + "\n")
+                sys.stdout.flush()
+            else:
+                icon = "✅" if runner.returncode == 0 else "❌"
+                code = "?" if runner.returncode is None else runner.returncode
+                sys.stderr.write(f"{icon} {path} : code {code} en {runner.elapsed or 0:.2f} s\n")
+
+
+def parse_filter(value):
+    action, _, pattern = value.partition(":")
+    if action not in FILTER_ACTIONS or not pattern:
+        raise argparse.ArgumentTypeError(f"attendu ACTION:REGEX avec ACTION parmi {', '.join(FILTER_ACTIONS)}")
+    try:
+        return OutputFilter(pattern, action)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"expression invalide : {e}")
+
+
+def parse_encoding(value):
+    if value != "auto":
+        try:
+            codecs.lookup(value)
+        except LookupError:
+            raise argparse.ArgumentTypeError(f"encodage inconnu : {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py --run", description="Exécution de scripts batch sans interface")
+    parser.add_argument("--run", nargs="+", required=True, metavar="SCRIPT", help="Script(s) à exécuter")
+    parser.add_argument("--jobs", type=int, default=1, help="Scripts exécutés en parallèle")
+    parser.add_argument("--json", action="store_true", help="Sortie en lignes JSON")
+    parser.add_argument("--timeout", type=int, default=0, help="Durée maximale par script (s)")
+    parser.add_argument("--cpu", type=int, default=0, help="Temps CPU maximal par script (s, POSIX)")
+    parser.add_argument("--memory", type=int, default=0, help="Mémoire maximale par script (Mo, POSIX)")
+    parser.add_argument("--filter", type=parse_filter, action="append", default=[], metavar="ACTION:REGEX",
+                        help="Filtre de sortie (include, exclude, highlight, stop), répétable")
+    parser.add_argument("--encoding", type=parse_encoding, default="auto",
+                        help="Encodage de la sortie des scripts (auto : UTF-8, sinon page de code de la console)")
+    parser.add_argument("--no-history", action="store_true", help="Ne pas enregistrer dans l'historique")
+    args = parser.parse_args(argv)
+
+    limits = RunLimits(args.timeout, args.cpu, args.memory, args.encoding)
+    filters = OutputFilters(args.filter)
+    history = None
+    if not args.no_history:
+        try:
+            history = RunHistory()
+        except (OSError, sqlite3.Error) as e:
+            sys.stderr.write(f"[INFO] Historique désactivé : {e}\n")
+    writer = ConsoleWriter(args.json, len(args.run) > 1)
+    pending = deque(enumerate(args.run))
+    codes = [None] * len(args.run)
+    runners = []
+
+    def worker():
+        # Chaque thread exécute les scripts en attente l'un après l'autre
+        while True:
+            try:
+                index, path = pending.popleft()
+            except IndexError:
+                return
+            signals = RunSignals()
+            signals.chunk.connect(lambda entries, path=path: writer.chunk(path, entries))
+            signals.error.connect(lambda text, path=path: writer.chunk(path, [(True, text)]))
+            runner = BatchRunner(path, signals, limits=limits, history=history, filters=filters)
+            runners.append(runner)
+            runner.run()
+            writer.finished(path, runner)
+            codes[index] = runner.returncode
+
+    # concurrent.futures n'est pas utilisé : son import (logging) coûte plus
+    # cher que le reste du démarrage
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(args.jobs, len(args.run))))]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.1)
+    except KeyboardInterrupt:
+        pending.clear()
+        for runner in list(runners):
+            runner.stop()
+        for thread in threads:
+            thread.join()
+        return 130
+
+    if len(codes) == 1:
+        code = codes[0]
+        # Processus tué par un signal (code négatif) : convention shell 128 + n
+        return 1 if code is None else code if code >= 0 else 128 - code
+    return 0 if all(code == 0 for code in codes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1600 @@
+# === Cœur d’exécution Batch IDE (sans Qt) ===
+# Lexer, analyse statique et moteur d'exécution : tampon et pompe de sortie,
+# limites, historique, filtres, runners, banc d'essai et session shell. Ce
+# module n'importe pas PySide6, il sert aussi bien à l'interface (main.py)
+# qu'au mode sans interface (cli.py) ; les runners émettent vers n'importe
+# quel objet qui a la forme de WorkerSignals (output / error / chunk /
+# finished).
+import sys
+import subprocess
+import threading
+import time
+import os
+import re
+import bisect
+import json
+import shutil
+import shlex
+import hashlib
+import tempfile
+import uuid
+import signal
+import sqlite3
+import zlib
+import difflib
+import codecs
+import locale
+import itertools
+import math
+import statistics
+from array import array
+from contextlib import closing
+from collections import deque, Counter
+
+try:
+    import resource
+except ImportError:  # Windows : pas de limites CPU / mémoire
+    resource = None
+
+
+# === Lexer batch ===
+# Découpe une ligne en jetons (type, début, fin) en un seul passage : une
+# seule expression régulière à alternatives couvre toutes les classes de
+# jetons, ajouter une classe n'ajoute pas de passage sur la ligne.
+KEYWORDS = [
+    "echo", "set", "if", "else", "goto", "call", "pause", "exit",
+    "rem", "for", "in", "do", "start", "cls", "shift", "cd", "md", "rd", "dir"
+]
+
+# Au-delà, le reste de la ligne n'est pas analysé (scripts minifiés / générés)
+MAX_LEX_CHARS = 4000
+
+COMMENT_PATTERN = re.compile(r"\s*(?:rem(?:\s|$)|::)", re.IGNORECASE)
+LABEL_PATTERN = re.compile(r"\s*:[^\s:+=;,]+")
+VARIABLE_PATTERN = re.compile(r"%%(?:~[a-z$:]*)?[a-z]|%(?:~[a-z]*)?[0-9*]|%[a-z_][^%\s]*%|![a-z_][^!\s]*!", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(
+    r"(?P<escape>\^.)"
+    r'|(?P<string>"[^"]*")'
+    r"|(?P<loopvar>%%(?:~[a-z$:]*)?[a-z])"
+    r"|(?P<variable>%(?:~[a-z]*)?[0-9*]|%[a-z_][^%\s]*%)"
+    r"|(?P<delayed>![a-z_][^!\s]*!)"
+    r"|(?P<redirect>[0-9]?>>?(?:&[0-9])?|<|\|\|?|&&?)"
+    r"|(?<=\s)(?P<label>:[a-z_][\w.-]*)"
+    r"|(?P<keyword>\b(?:" + "|".join(KEYWORDS) + r")\b)",
+    re.IGNORECASE
+)
+
+
+def tokenize(text, in_comment=False):
+    text = text[:MAX_LEX_CHARS]
+    if in_comment or COMMENT_PATTERN.match(text):
+        return [("comment", 0, len(text))]
+    label = LABEL_PATTERN.match(text)
+    if label:
+        return [("label", 0, label.end())]
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        tokens.append((kind, match.start(), match.end()))
+        if kind == "string":
+            # Les variables restent visibles à l'intérieur des chaînes
+            for var in VARIABLE_PATTERN.finditer(text, match.start() + 1, match.end() - 1):
+                inner = "loopvar" if var.group().startswith("%%") else "delayed" if var.group()[0] == "!" else "variable"
+                tokens.append((inner, var.start(), var.end()))
+    return tokens
+
+
+# === Analyse statique (lint) ===
+# Construit le graphe labels / goto / call du script et signale les cibles
+# inexistantes, les labels inutilisés et les parenthèses déséquilibrées.
+# Le résultat de l'analyse de chaque ligne est mis en cache par contenu :
+# seules les lignes nouvelles ou modifiées sont réanalysées.
+JUMP_PATTERN = re.compile(r"(?:^|[\s&|(@])(goto|call)\s+(:?)([^\s&|()]+)", re.IGNORECASE)
+PAREN_STRIP_PATTERN = re.compile(r'\^.|"[^"]*"')
+BUILTIN_LABELS = {"eof"}
+
+
+class BatchAnalyzer:
+    def __init__(self):
+        self._cache = {}
+
+    @staticmethod
+    def parse_line(text):
+        # (est un commentaire, label défini, [(mot-clé, label)], parenthèses dans l'ordre)
+        if COMMENT_PATTERN.match(text):
+            return True, None, [], ""
+        label = LABEL_PATTERN.match(text)
+        if label:
+            return False, label.group().strip()[1:].lower(), [], ""
+        jumps = []
+        for match in JUMP_PATTERN.finditer(text):
+            keyword, colon, target = match.group(1).lower(), match.group(2), match.group(3)
+            # call sans « : » lance un programme externe, pas un label
+            if keyword == "goto" or colon:
+                jumps.append((keyword, target.lower()))
+        stripped = PAREN_STRIP_PATTERN.sub("", text)
+        parens = "".join(c for c in stripped if c in "()")
+        return False, None, jumps, parens
+
+    def analyze(self, text):
+        cache = {}
+        labels = {}
+        jumps = []
+        open_parens = []
+        diagnostics = []
+        dynamic_jump = False
+        in_comment = False
+
+        for number, line in enumerate(text.split("\n")):
+            info = self._cache.get(line)
+            if info is None:
+                info = self.parse_line(line)
+            cache[line] = info
+            is_comment, label, line_jumps, parens = info
+
+            if in_comment or is_comment:
+                in_comment = line.rstrip().endswith("^")
+                continue
+
+            if label is not None:
+                if label in labels:
+                    diagnostics.append((number, "warning", f"Label :{label} déjà défini ligne {labels[label] + 1}"))
+                else:
+                    labels[label] = number
+            for keyword, target in line_jumps:
+                if "%" in target or "!" in target:
+                    dynamic_jump = True
+                else:
+                    jumps.append((number, keyword, target))
+            for c in parens:
+                if c == "(":
+                    open_parens.append(number)
+                elif open_parens:
+                    open_parens.pop()
+                else:
+                    diagnostics.append((number, "error", "« ) » sans « ( » correspondante"))
+
+        for number in open_parens:
+            diagnostics.append((number, "error", "« ( » non refermée"))
+
+        used = set()
+        for number, keyword, target in jumps:
+            name = target.lstrip(":")
+            used.add(name)
+            if name not in labels and name not in BUILTIN_LABELS:
+                diagnostics.append((number, "error", f"{keyword} vers un label inexistant :{name}"))
+
+        # Un goto %VAR% peut viser n'importe quel label : pas d'avertissement
+        if not dynamic_jump:
+            for name, number in labels.items():
+                if name not in used:
+                    diagnostics.append((number, "warning", f"Label :{name} jamais utilisé"))
+
+        self._cache = cache
+        diagnostics.sort()
+        return diagnostics
+
+
+# === Signaux sans Qt ===
+# Même interface que WorkerSignals : les slots sont appelés directement,
+# dans le thread qui émet.
+class Callback:
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self._slots:
+            slot(*args)
+
+
+class RunSignals:
+    def __init__(self):
+        self.output = Callback()
+        self.error = Callback()
+        # Paquet de lignes [(is_error, texte), ...] envoyé par OutputBuffer
+        self.chunk = Callback()
+        self.finished = Callback()
+
+
+# === Tampon de sortie côté runner ===
+# Regroupe les lignes produites par les threads lecteurs et les envoie à
+# l'interface par paquets : au plus un signal par intervalle de rafraîchissement,
+# ou plus tôt si le paquet dépasse FLUSH_BYTES. Si un fichier journal est
+# fourni, chaque paquet y est aussi écrit (hors thread GUI).
+# Une ligne terminée par « \r » (barre de progression) est remplacée par la
+# suivante du même flux tant que le paquet n'est pas parti : seul le dernier
+# état de chaque intervalle atteint l'interface. Ces lignes sont provisoires
+# (la pompe envoie aussi ainsi une invite sans fin de ligne, puis la ligne
+# complète) : elles ne vont qu'à l'affichage, jamais dans le journal.
+def is_partial(entry):
+    return entry[1].endswith("\r")
+
+
+class OutputBuffer:
+    FLUSH_INTERVAL = 0.025
+    FLUSH_BYTES = 64 * 1024
+
+    def __init__(self, emit, log=None):
+        self.emit = emit
+        self.log = log
+        self._pending = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Garantit l'ordre des paquets entre le thread d'envoi et flush()
+        self._emit_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def write(self, text, is_error=False):
+        with self._cond:
+            if self._pending and self._pending[-1][0] == is_error and self._pending[-1][1].endswith("\r"):
+                self._size -= len(self._pending.pop()[1]) + 1
+            self._pending.append((is_error, text))
+            self._size += len(text) + 1
+            if len(self._pending) == 1 or self._size >= self.FLUSH_BYTES:
+                self._cond.notify()
+
+    def output(self, text):
+        self.write(text)
+
+    def error(self, text):
+        self.write(text, True)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._closed and self._size < self.FLUSH_BYTES:
+                    self._cond.wait(self.FLUSH_INTERVAL)
+                closed = self._closed
+            self.flush()
+            if closed:
+                if self.log is not None:
+                    self.log.flush()
+                return
+
+    def flush(self):
+        # Envoie immédiatement les lignes en attente, depuis le thread appelant
+        with self._emit_lock:
+            with self._cond:
+                batch, self._pending, self._size = self._pending, [], 0
+            if batch:
+                if self.log is not None:
+                    lines = [entry[1] for entry in batch if not is_partial(entry)]
+                    if lines:
+                        self.log.write("\n".join(lines) + "\n")
+                self.emit(batch)
+
+    def close(self):
+        # Vide ce qui reste ; le dernier paquet part avant le retour
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+# === Décodage de la sortie ===
+# Les outils batch écrivent dans la page de code de la console (OEM : cp850,
+# cp437…) ou en ANSI (cp1252), rarement en UTF-8. En mode « auto », chaque
+# flux est décodé en UTF-8 tant que les octets reçus le permettent, puis bascule
+# définitivement sur la page de code de repli à la première séquence invalide.
+# Les octets indécodables sont remplacés (U+FFFD) au lieu d'interrompre la
+# lecture.
+if os.name == "nt":
+    import ctypes
+    FALLBACK_ENCODING = f"cp{ctypes.windll.kernel32.GetOEMCP()}"
+else:
+    FALLBACK_ENCODING = locale.getpreferredencoding(False)
+    if codecs.lookup(FALLBACK_ENCODING).name == "utf-8":
+        FALLBACK_ENCODING = "cp1252"
+OUTPUT_ENCODINGS = ["auto", "utf-8", "cp850", "cp437", "cp1252", "latin-1"]
+
+
+def input_encoding(encoding):
+    # Encodage des commandes envoyées sur stdin (session shell)
+    if encoding and encoding != "auto":
+        return encoding
+    return FALLBACK_ENCODING if os.name == "nt" else "utf-8"
+
+
+class StreamDecoder:
+    def __init__(self, encoding="auto"):
+        self.auto = not encoding or encoding == "auto"
+        if self.auto:
+            self.encoding = "utf-8"
+            self._decoder = codecs.getincrementaldecoder("utf-8")("strict")
+        else:
+            self.encoding = encoding
+            self._decoder = codecs.getincrementaldecoder(encoding)("replace")
+
+    def decode(self, data, final=False):
+        if not self.auto:
+            return self._decoder.decode(data, final)
+        try:
+            return self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            # e.object contient aussi les octets gardés du bloc précédent :
+            # ce qui précède l'erreur est de l'UTF-8 valide, le reste est
+            # redécodé avec la page de code de repli
+            self.auto = False
+            self.encoding = FALLBACK_ENCODING
+            self._decoder = codecs.getincrementaldecoder(FALLBACK_ENCODING)("replace")
+            return e.object[:e.start].decode("utf-8") + self._decoder.decode(e.object[e.start:], final)
+
+
+def split_lines(text):
+    # Découpe un texte décodé en lignes complètes et renvoie le reste. Un
+    # « \r » seul termine un segment transmis avec son « \r » final, pour
+    # que la console le réécrive sur place ; « \r\n » termine une ligne. Un
+    # « \r » en toute fin reste en attente : il peut précéder un « \n ».
+    parts = text.split("\n")
+    rest = parts.pop()
+    lines = []
+    for part in parts:
+        if part.endswith("\r"):
+            part = part[:-1]
+        if "\r" in part:
+            segments = part.split("\r")
+            part = segments.pop()
+            lines.extend(segment.rstrip() + "\r" for segment in segments)
+        lines.append(part.rstrip())
+    if "\r" in rest:
+        tail = "\r" if rest.endswith("\r") else ""
+        segments = rest[:len(rest) - len(tail)].split("\r")
+        rest = segments.pop() + tail
+        lines.extend(segment.rstrip() + "\r" for segment in segments)
+    return lines, rest
+
+
+# === Pompe de sortie : un thread lecteur par pipe ===
+# Chaque flux est vidé en continu par son propre thread, ce qui évite qu'un
+# pipe plein (stderr typiquement) bloque le processus pendant qu'on attend
+# une ligne sur l'autre. L'ordre des lignes est conservé pour chaque flux.
+# Les pipes sont lus en octets, par blocs de CHUNK_BYTES dans un tampon
+# réutilisé, puis décodés de façon incrémentale : le coût par appel ne dépend
+# plus du nombre ni de la longueur des lignes. Une ligne incomplète est
+# gardée en morceaux (pas de concaténation répétée) et affichée comme une
+# ligne « \r » au bout de PARTIAL_DELAY, pour qu'une invite ou une très
+# longue ligne sans fin de ligne apparaisse sans attendre ; la ligne complète
+# la remplace ensuite dans la console.
+class OutputPump:
+    # Délai accordé aux lecteurs après la fin du processus lorsqu'ils ne
+    # progressent plus (pipe gardé ouvert par un petit-enfant, par exemple)
+    EXIT_GRACE = 0.2
+    CHUNK_BYTES = 64 * 1024
+    PARTIAL_DELAY = 0.25
+
+    def __init__(self, proc, on_stdout, on_stderr, encoding="auto"):
+        self.lines = 0
+        self.received = 0
+        self.encoding = encoding
+        self._done = threading.Event()
+        self._streams = [
+            {"callback": on_stdout, "lock": threading.Lock(), "pieces": [], "since": 0.0, "shown": 0},
+            {"callback": on_stderr, "lock": threading.Lock(), "pieces": [], "since": 0.0, "shown": 0},
+        ]
+        self.threads = [
+            threading.Thread(target=self._drain, args=(proc.stdout, self._streams[0]), daemon=True),
+            threading.Thread(target=self._drain, args=(proc.stderr, self._streams[1]), daemon=True),
+        ]
+        self._flusher = threading.Thread(target=self._flush_partials, daemon=True)
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+        self._flusher.start()
+
+    def _drain(self, stream, state):
+        # Lecture directe sur le fichier brut : pas de second tampon Python
+        raw = getattr(stream, "buffer", stream)
+        raw = getattr(raw, "raw", raw)
+        chunk = bytearray(self.CHUNK_BYTES)
+        view = memoryview(chunk)
+        decoder = StreamDecoder(self.encoding)
+        pieces = state["pieces"]
+        try:
+            while True:
+                size = raw.readinto(chunk)
+                if not size:
+                    break
+                self.received += size
+                text = decoder.decode(view[:size])
+                if "\n" not in text and "\r" not in text:
+                    with state["lock"]:
+                        if not pieces:
+                            state["since"] = time.monotonic()
+                        pieces.append(text)
+                    continue
+                with state["lock"]:
+                    pieces.append(text)
+                    lines, rest = split_lines("".join(pieces))
+                    pieces[:] = [rest] if rest else []
+                    state["since"] = time.monotonic()
+                    state["shown"] = 0
+                    self._emit(state["callback"], lines)
+        except (OSError, ValueError):
+            pass
+        finally:
+            with state["lock"]:
+                pieces.append(decoder.decode(b"", True))
+                text = "".join(pieces)
+                del pieces[:]
+                if text:
+                    lines, rest = split_lines(text)
+                    lines.append(rest.rstrip())
+                    self._emit(state["callback"], lines)
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    def _emit(self, callback, lines):
+        self.lines += len(lines)
+        for line in lines:
+            callback(line)
+
+    def _flush_partials(self):
+        while not self._done.wait(self.PARTIAL_DELAY / 2):
+            now = time.monotonic()
+            for state in self._streams:
+                with state["lock"]:
+                    pieces = state["pieces"]
+                    if not pieces or now - state["since"] < self.PARTIAL_DELAY:
+                        continue
+                    if len(pieces) > 1:
+                        pieces[:] = ["".join(pieces)]
+                    # Réaffichée seulement si elle a grandi depuis
+                    if len(pieces[0]) != state["shown"]:
+                        state["shown"] = len(pieces[0])
+                        state["since"] = now
+                        state["callback"](pieces[0].rstrip() + "\r")
+
+    def join(self):
+        # Attend la fin des lecteurs tant qu'ils avancent encore
+        while any(t.is_alive() for t in self.threads):
+            seen = self.received
+            for t in self.threads:
+                t.join(self.EXIT_GRACE)
+            if self.received == seen and any(t.is_alive() for t in self.threads):
+                break
+        self._done.set()
+
+
+# === Arbre de processus et limites d’exécution ===
+# Chaque script est lancé dans son propre groupe de processus (session POSIX,
+# CREATE_NEW_PROCESS_GROUP sous Windows) : l'arrêt vise tout l'arbre, y
+# compris les petits-enfants lancés par le shell, et pas seulement le shell.
+KILL_GRACE = 1.0
+
+
+def kill_process_tree(proc, grace=KILL_GRACE):
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True)
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM if grace > 0 else signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        return
+    if grace > 0:
+        try:
+            proc.wait(grace)
+        except subprocess.TimeoutExpired:
+            pass
+        # Les descendants qui ignorent SIGTERM restent dans le groupe
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+# Limites d'une exécution : durée (toutes plateformes), temps CPU et mémoire
+# (rlimits, POSIX uniquement). 0 ou None = pas de limite. L'encodage de la
+# sortie voyage avec les limites jusqu'à la pompe de chaque runner.
+# Les rlimits sont posées par le shell lui-même (ulimit) avant d'exécuter le
+# script, et non par un preexec_fn : l'IDE a plusieurs threads actifs et du
+# code Python entre fork et exec peut y bloquer l'enfant. Si une limite ne
+# peut pas être posée, le script n'est pas lancé.
+class RunLimits:
+    def __init__(self, timeout=None, cpu_seconds=None, memory_mb=None, encoding="auto"):
+        self.timeout = timeout or None
+        self.cpu_seconds = cpu_seconds or None
+        self.memory_mb = memory_mb or None
+        self.encoding = encoding or "auto"
+
+    def popen_options(self):
+        if os.name == "nt":
+            return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        return {"start_new_session": True}
+
+    def command(self, script_path):
+        # Ligne de commande (shell=True) ; les limites sont héritées par tout l'arbre
+        if os.name == "nt":
+            return [script_path]
+        if not (self.cpu_seconds or self.memory_mb):
+            return [shlex.quote(script_path)]
+        steps = []
+        if self.cpu_seconds:
+            steps.append(f"ulimit -t {self.cpu_seconds}")
+        if self.memory_mb:
+            steps.append(f"ulimit -v {self.memory_mb * 1024}")
+        steps.append(f"exec {shlex.quote(script_path)}")
+        return [" && ".join(steps)]
+
+    def describe(self):
+        parts = []
+        if self.timeout:
+            parts.append(f"durée {self.timeout} s")
+        if self.cpu_seconds:
+            parts.append(f"CPU {self.cpu_seconds} s")
+        if self.memory_mb:
+            parts.append(f"mémoire {self.memory_mb} Mo")
+        if self.encoding != "auto":
+            parts.append(f"sortie {self.encoding}")
+        return ", ".join(parts)
+
+
+# === Mémoire du processus ===
+# Mémoire résidente actuelle en octets (None si indisponible) : /proc sous
+# Linux, GetProcessMemoryInfo sous Windows, sinon le pic de getrusage.
+if os.name == "nt":
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", ctypes.c_ulong), ("PageFaultCount", ctypes.c_ulong)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+            )
+        ]
+
+
+def process_rss():
+    if os.name == "nt":
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# === Historique des exécutions ===
+# Chaque exécution est enregistrée dans une base SQLite locale : chemin et
+# empreinte du script, début, durée, code de sortie et sortie compressée
+# (les CAPTURE_LINES dernières lignes). Les index sur (script, début) et sur
+# le début rendent listes, filtres et évictions rapides ; la rétention est
+# bornée par script et au total, les exécutions les plus anciennes partent
+# en premier. Une connexion est ouverte par opération : les runners des
+# suites peuvent écrire en parallèle depuis leurs threads.
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".batchide", "history.sqlite3")
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    script_hash TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL,
+    exit_code INTEGER,
+    lines INTEGER,
+    output BLOB
+);
+CREATE INDEX IF NOT EXISTS runs_script ON runs(script, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+"""
+
+
+def file_hash(path):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+    except OSError:
+        return ""
+
+
+class RunHistory:
+    MAX_RUNS = 2000
+    MAX_RUNS_PER_SCRIPT = 100
+    CAPTURE_LINES = 20000
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(HISTORY_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    def record(self, script, script_hash, started, duration, exit_code, entries, lines):
+        output = zlib.compress(json.dumps(list(entries)).encode("utf-8"))
+        with self._connect() as db, db:
+            cursor = db.execute(
+                "INSERT INTO runs (script, script_hash, started, duration, exit_code, lines, output) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (script, script_hash, started, duration, exit_code, lines, output)
+            )
+            db.execute(
+                "DELETE FROM runs WHERE script = ? AND started < ("
+                "SELECT started FROM runs WHERE script = ? ORDER BY started DESC LIMIT 1 OFFSET ?)",
+                (script, script, self.MAX_RUNS_PER_SCRIPT - 1)
+            )
+            db.execute(
+                "DELETE FROM runs WHERE started < ("
+                "SELECT started FROM runs ORDER BY started DESC LIMIT 1 OFFSET ?)",
+                (self.MAX_RUNS - 1,)
+            )
+            return cursor.lastrowid
+
+    def runs(self, pattern="", limit=500):
+        # (id, script, empreinte, début, durée, code, lignes), plus récent d'abord ;
+        # le filtre est un texte littéral, % et _ n'y sont pas des jokers
+        escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._connect() as db:
+            return db.execute(
+                "SELECT id, script, script_hash, started, duration, exit_code, lines FROM runs "
+                "WHERE script LIKE ? ESCAPE '\\' ORDER BY started DESC LIMIT ?",
+                (f"%{escaped}%", limit)
+            ).fetchall()
+
+    def output(self, run_id):
+        with self._connect() as db:
+            row = db.execute("SELECT output FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None or row[0] is None:
+            return []
+        return [(bool(is_error), text) for is_error, text in json.loads(zlib.decompress(row[0]))]
+
+    def diff(self, old_id, new_id):
+        # Diff unifié des deux sorties, en entrées (erreur, texte) pour la console
+        old = [text for _, text in self.output(old_id)]
+        new = [text for _, text in self.output(new_id)]
+        entries = []
+        for line in difflib.unified_diff(old, new, f"#{old_id}", f"#{new_id}", lineterm=""):
+            entries.append((line.startswith("-") and not line.startswith("---"), line))
+        return entries
+
+
+# === Filtres et déclencheurs de sortie ===
+# Évalués dans les threads lecteurs, avant le tampon : une ligne masquée ne
+# coûte ni signal ni affichage (elle ne va pas non plus dans le journal ni
+# dans l'historique). Actions : « include » (si au moins un filtre include
+# existe, seules les lignes qui en vérifient un passent), « exclude »,
+# « highlight » (ligne marquée HighlightedLine, surlignée par la console)
+# et « stop » (arrêt de l'exécution, même si la ligne est masquée).
+FILTERS_PATH = os.path.join(os.path.expanduser("~"), ".batchide", "filters.json")
+FILTER_ACTIONS = ["include", "exclude", "highlight", "stop"]
+
+
+class HighlightedLine(str):
+    # Texte inchangé : journal, historique et sortie JSON reçoivent la ligne
+    # telle quelle, seule la console teste le type pour la surligner
+    __slots__ = ()
+
+
+class OutputFilter:
+    def __init__(self, pattern, action):
+        self.pattern = pattern
+        self.action = action
+        self.regex = re.compile(pattern)
+
+
+class OutputFilters:
+    def __init__(self, filters=()):
+        self.filters = list(filters)
+        self.hits = [0] * len(self.filters)
+        self.hidden = 0
+        self._lock = threading.Lock()
+        self._by_action = {action: [(i, f.regex) for i, f in enumerate(self.filters) if f.action == action]
+                           for action in FILTER_ACTIONS}
+
+    @classmethod
+    def load(cls, path=FILTERS_PATH):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(OutputFilter(pattern, action) for pattern, action in json.load(f))
+        except (OSError, ValueError, re.error):
+            return cls()
+
+    def save(self, path=FILTERS_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([[flt.pattern, flt.action] for flt in self.filters], f)
+
+    def reset(self):
+        with self._lock:
+            self.hits = [0] * len(self.filters)
+            self.hidden = 0
+
+    def _matches(self, action, text):
+        # Tous les filtres de l'action sont testés, pour des compteurs exacts
+        found = False
+        for i, regex in self._by_action[action]:
+            if regex.search(text):
+                with self._lock:
+                    self.hits[i] += 1
+                found = True
+        return found
+
+    def check(self, text):
+        # (texte à afficher ou None si masqué, filtre stop déclenché ou None)
+        stop = None
+        for i, regex in self._by_action["stop"]:
+            if regex.search(text):
+                with self._lock:
+                    self.hits[i] += 1
+                stop = self.filters[i]
+        include = self._by_action["include"]
+        if (include and not self._matches("include", text)) or self._matches("exclude", text):
+            with self._lock:
+                self.hidden += 1
+            return None, stop
+        if self._matches("highlight", text):
+            text = HighlightedLine(text)
+        return text, stop
+
+    def summary(self):
+        parts = [f"{flt.pattern} {hits}" for flt, hits in zip(self.filters, self.hits)]
+        if self.hidden:
+            parts.append(f"masquées {self.hidden}")
+        return " · ".join(parts)
+
+
+class FilteredOutput:
+    # Même interface que OutputBuffer (output / error) pour les runners.
+    # Les lignes provisoires (« \r ») passent sans filtre ni compteur : seule
+    # la ligne complète déclenche les filtres. Si elle est masquée, la ligne
+    # provisoire déjà affichée est effacée par une ligne provisoire vide.
+    def __init__(self, buffer, filters, on_stop):
+        self.buffer = buffer
+        self.filters = filters
+        self.on_stop = on_stop
+        # Par flux (erreur ou non) : une ligne provisoire est affichée
+        self._pending = {False: False, True: False}
+
+    def output(self, text):
+        self._write(text, False)
+
+    def error(self, text):
+        self._write(text, True)
+
+    def _write(self, text, is_error):
+        if is_partial((is_error, text)):
+            self._pending[is_error] = True
+            self.buffer.write(text, is_error)
+            return
+        shown, stop = self.filters.check(text)
+        if shown is not None:
+            self.buffer.write(shown, is_error)
+        elif self._pending[is_error]:
+            self.buffer.write("\r", is_error)
+        self._pending[is_error] = False
+        if stop is not None:
+            self.on_stop(stop)
+
+
+# === Thread d’exécution batch sur fichier ===
+# L'attente du processus se fait par tranches de POLL_INTERVAL : un arrêt
+# demandé ou un délai dépassé est pris en compte même si le script ne
+# produit aucune sortie, et tue l'arbre entier en temps borné.
+class BatchRunner(threading.Thread):
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, script_path, signals, log_path=None, limits=None, history=None, filters=None):
+        super().__init__()
+        self.script_path = script_path
+        self.source_path = script_path
+        self.signals = signals
+        self.log_path = log_path
+        self.limits = limits or RunLimits()
+        self.history = history
+        self.filters = filters
+        self.stopped_by = None
+        self.run_id = None
+        self._stop_flag = False
+        self.proc = None
+        self.returncode = None
+        self.elapsed = None
+        self.timed_out = False
+
+    def run(self):
+        started = time.monotonic()
+        started_at = time.time()
+        log = None
+        if self.log_path:
+            try:
+                log = open(self.log_path, "w", encoding="utf-8")
+            except OSError as e:
+                self.signals.error.emit(f"[ERREUR] Journal indisponible: {e}")
+        capture = deque(maxlen=RunHistory.CAPTURE_LINES)
+        counts = [0]
+
+        def emit(entries):
+            # Les lignes provisoires ne sont ni capturées ni comptées
+            final = [entry for entry in entries if not is_partial(entry)]
+            capture.extend(final)
+            counts[0] += len(final)
+            self.signals.chunk.emit(entries)
+        buffer = OutputBuffer(emit if self.history is not None else self.signals.chunk.emit, log)
+        try:
+            self.proc = subprocess.Popen(
+                self.limits.command(self.script_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                shell=True,
+                **self.limits.popen_options()
+            )
+            sink = buffer
+            if self.filters is not None and self.filters.filters:
+                sink = FilteredOutput(buffer, self.filters, self.stop_on_match)
+            pump = OutputPump(self.proc, self.stdout_callback(sink), self.stderr_callback(sink), self.limits.encoding)
+            pump.start()
+            self.returncode = self._wait(started)
+            pump.join()
+            if self.timed_out:
+                buffer.output(f"\n[INFO] Délai de {self.limits.timeout} s dépassé, exécution arrêtée.")
+            elif self.stopped_by is not None:
+                buffer.output(f"\n[INFO] Exécution arrêtée par le filtre « {self.stopped_by.pattern} ».")
+            elif self._stop_flag:
+                buffer.output("\n[INFO] Exécution arrêtée par l’utilisateur.")
+        except Exception as e:
+            buffer.error(f"[ERREUR] Exception: {e}")
+        self.elapsed = time.monotonic() - started
+        buffer.close()
+        if log is not None:
+            log.close()
+        if self.history is not None:
+            try:
+                self.run_id = self.history.record(
+                    os.path.abspath(self.source_path), file_hash(self.source_path), started_at,
+                    self.elapsed, self.returncode, capture, counts[0]
+                )
+            except sqlite3.Error as e:
+                self.signals.error.emit(f"[ERREUR] Historique indisponible: {e}")
+        self.signals.finished.emit()
+
+    def _wait(self, started):
+        while True:
+            try:
+                return self.proc.wait(self.POLL_INTERVAL)
+            except subprocess.TimeoutExpired:
+                pass
+            if self.limits.timeout and time.monotonic() - started >= self.limits.timeout:
+                self.timed_out = True
+            if self._stop_flag or self.timed_out:
+                kill_process_tree(self.proc)
+                return self.proc.wait()
+
+    def stdout_callback(self, buffer):
+        return buffer.output
+
+    def stderr_callback(self, buffer):
+        return buffer.error
+
+    def stop(self):
+        # Pris en compte par le thread d'exécution au prochain tour d'attente
+        self._stop_flag = True
+
+    def stop_on_match(self, output_filter):
+        if self.stopped_by is None:
+            self.stopped_by = output_filter
+        self.stop()
+
+
+# === Profilage d’une exécution ===
+# Le script est copié à côté de l'original (pour que %~dp0 reste valable)
+# avec un écho de marqueur avant chaque ligne exécutable de premier niveau.
+# Le thread lecteur horodate chaque marqueur à sa réception et le retire de
+# la sortie : le temps entre deux marqueurs est attribué à la ligne du
+# premier. Un bloc ( ... ) multi-lignes compte pour sa ligne d'ouverture,
+# et les lignes d'un label sont cumulées dans le label qui les précède.
+if os.name == "nt":
+    PROFILE_ECHO = "@echo {marker} {line}"
+else:
+    PROFILE_ECHO = "echo {marker} {line}"
+
+
+def instrument_script(text, marker):
+    lines = []
+    depth = 0
+    continued = False
+    for number, line in enumerate(text.split("\n")):
+        is_comment, label, _, parens = BatchAnalyzer.parse_line(line)
+        if depth == 0 and not continued and not is_comment and label is None and line.strip():
+            lines.append(PROFILE_ECHO.format(marker=marker, line=number))
+        lines.append(line)
+        continued = line.rstrip().endswith("^")
+        if not is_comment:
+            for c in parens:
+                depth = depth + 1 if c == "(" else max(0, depth - 1)
+    return "\n".join(lines)
+
+
+class RunProfile:
+    def __init__(self, text, events, ended):
+        # Temps et passages par ligne (numéros de ligne à partir de 0)
+        self.line_times = {}
+        self.line_hits = {}
+        for (line, at), (_, following) in zip(events, events[1:] + [(None, ended)]):
+            self.line_times[line] = self.line_times.get(line, 0.0) + following - at
+            self.line_hits[line] = self.line_hits.get(line, 0) + 1
+        self.total = sum(self.line_times.values())
+
+        # Temps cumulé par label : chaque ligne compte pour le dernier label au-dessus
+        starts = []
+        for number, line in enumerate(text.split("\n")):
+            label = LABEL_PATTERN.match(line)
+            if label and not COMMENT_PATTERN.match(line):
+                starts.append((number, label.group().strip()))
+        numbers = [number for number, _ in starts]
+        self.label_times = {}
+        for line, elapsed in self.line_times.items():
+            index = bisect.bisect_right(numbers, line) - 1
+            name = starts[index][1] if index >= 0 else "(début)"
+            first = starts[index][0] if index >= 0 else 0
+            key = (first, name)
+            self.label_times[key] = self.label_times.get(key, 0.0) + elapsed
+
+    def hot_lines(self):
+        return sorted(self.line_times.items(), key=lambda item: item[1], reverse=True)
+
+    def hot_labels(self):
+        return sorted(self.label_times.items(), key=lambda item: item[1], reverse=True)
+
+
+class ProfileRunner(BatchRunner):
+    def __init__(self, script_path, text, signals, log_path=None, limits=None, history=None, filters=None):
+        super().__init__(script_path, signals, log_path, limits, history, filters)
+        self.text = text
+        self.marker = f"__BATCHIDE_PROF_{uuid.uuid4().hex}__"
+        self.events = []
+        self.ended = None
+
+    def run(self):
+        folder, name = os.path.split(os.path.abspath(self.source_path))
+        stem, ext = os.path.splitext(name)
+        try:
+            fd, self.script_path = tempfile.mkstemp(prefix=f".{stem}.profile.", suffix=ext or ".bat", dir=folder)
+            newline = "\r\n" if os.name == "nt" else "\n"
+            with os.fdopen(fd, "w", encoding="utf-8", newline=newline) as f:
+                f.write(instrument_script(self.text, self.marker))
+            shutil.copymode(self.source_path, self.script_path)
+        except OSError as e:
+            self.signals.error.emit(f"[ERREUR] Copie instrumentée impossible: {e}")
+            self.signals.finished.emit()
+            return
+        try:
+            super().run()
+        finally:
+            os.remove(self.script_path)
+
+    def stdout_callback(self, buffer):
+        # Les marqueurs sont retirés avant les filtres de sortie
+        prefix = self.marker + " "
+
+        def on_stdout(line):
+            if line.startswith(prefix):
+                # Un marqueur encore incomplet (ligne « \r ») est ignoré
+                if not line.endswith("\r"):
+                    self.events.append((int(line[len(prefix):]), time.perf_counter()))
+            else:
+                buffer.output(line)
+        return on_stdout
+
+    def _wait(self, started):
+        returncode = super()._wait(started)
+        self.ended = time.perf_counter()
+        return returncode
+
+    def result(self):
+        # Appelé une fois l'exécution terminée : tous les marqueurs sont lus
+        if not self.events:
+            return None
+        return RunProfile(self.text, self.events, self.ended or self.events[-1][1])
+
+
+# === Banc d'essai d'un script ===
+# Le script est exécuté WARMUP fois sans mesure puis RUNS fois, l'une après
+# l'autre, par le chemin de BatchRunner (mêmes limites, même encodage, même
+# pompe) mais sans filtres, journal ni historique : stdout est lu puis jeté,
+# seules les dernières lignes de stderr sont gardées pour expliquer un échec.
+# Les durées mesurées sont rangées par empreinte du contenu du script ; deux
+# versions d'un même fichier se comparent ensuite côte à côte.
+BENCH_PATH = os.path.join(os.path.expanduser("~"), ".batchide", "benchmarks.sqlite3")
+
+BENCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    script_hash TEXT NOT NULL,
+    started REAL NOT NULL,
+    warmup INTEGER NOT NULL,
+    times TEXT NOT NULL,
+    exit_codes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS benchmarks_script ON benchmarks(script, started);
+"""
+
+
+def timing_stats(times):
+    ordered = sorted(times)
+    count = len(ordered)
+    return {
+        "runs": count,
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        # Rang le plus proche : le p95 de 10 mesures est la plus lente
+        "p95": ordered[max(0, math.ceil(0.95 * count) - 1)],
+        "mean": statistics.fmean(ordered),
+        "stddev": statistics.stdev(ordered) if count > 1 else 0.0,
+    }
+
+
+def exit_code_summary(codes):
+    return ", ".join(f"{'?' if code is None else code} ×{count}" for code, count in Counter(codes).most_common())
+
+
+def mann_whitney(old, new):
+    # Test des rangs de Mann-Whitney, bilatéral, approximation normale avec
+    # correction des ex aequo et de continuité : pas d'hypothèse de loi
+    # normale sur les durées, peu sensible à une exécution aberrante.
+    # Il faut au moins 4 mesures de chaque côté pour descendre sous 0,05.
+    n1, n2 = len(old), len(new)
+    merged = sorted([(value, 0) for value in old] + [(value, 1) for value in new])
+    rank_sum = 0.0
+    ties = 0.0
+    start = 0
+    while start < len(merged):
+        end = start
+        while end + 1 < len(merged) and merged[end + 1][0] == merged[start][0]:
+            end += 1
+        rank = (start + end) / 2 + 1
+        rank_sum += rank * sum(1 for _, side in merged[start:end + 1] if side == 0)
+        size = end - start + 1
+        ties += size ** 3 - size
+        start = end + 1
+    total = n1 + n2
+    u = rank_sum - n1 * (n1 + 1) / 2
+    variance = n1 * n2 / 12 * ((total + 1) - ties / (total * (total - 1)))
+    if variance <= 0:
+        return 1.0
+    delta = u - n1 * n2 / 2
+    z = max(0.0, abs(delta) - 0.5) / math.sqrt(variance)
+    return math.erfc(z / math.sqrt(2))
+
+
+def compare_timings(old, new, alpha=0.05):
+    # Nouvelle version par rapport à l'ancienne : rapport des médianes,
+    # p-valeur et verdict (None si trop peu de mesures pour conclure)
+    ratio = statistics.median(new) / statistics.median(old) if statistics.median(old) > 0 else None
+    if len(old) < 2 or len(new) < 2:
+        return {"ratio": ratio, "p_value": None, "significant": False, "verdict": "trop peu de mesures"}
+    p_value = mann_whitney(old, new)
+    significant = p_value < alpha and ratio is not None and ratio != 1
+    if not significant:
+        verdict = "pas de différence significative"
+    else:
+        verdict = "plus rapide" if ratio < 1 else "plus lent"
+    return {"ratio": ratio, "p_value": p_value, "significant": significant, "verdict": verdict}
+
+
+class BenchmarkStore:
+    MAX_SESSIONS_PER_SCRIPT = 100
+
+    def __init__(self, path=BENCH_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(BENCH_SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    def record(self, script, script_hash, started, warmup, times, exit_codes):
+        with self._connect() as db, db:
+            cursor = db.execute(
+                "INSERT INTO benchmarks (script, script_hash, started, warmup, times, exit_codes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (script, script_hash, started, warmup, json.dumps(times), json.dumps(exit_codes))
+            )
+            db.execute(
+                "DELETE FROM benchmarks WHERE script = ? AND started < ("
+                "SELECT started FROM benchmarks WHERE script = ? ORDER BY started DESC LIMIT 1 OFFSET ?)",
+                (script, script, self.MAX_SESSIONS_PER_SCRIPT - 1)
+            )
+            return cursor.lastrowid
+
+    def versions(self, script):
+        # Une entrée par empreinte, la plus récemment mesurée d'abord :
+        # (empreinte, dernière mesure, sessions, durées, codes de sortie)
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT script_hash, started, times, exit_codes FROM benchmarks "
+                "WHERE script = ? ORDER BY started DESC",
+                (script,)
+            ).fetchall()
+        versions = {}
+        for script_hash, started, times, codes in rows:
+            entry = versions.setdefault(script_hash, [script_hash, started, 0, [], []])
+            entry[2] += 1
+            entry[3].extend(json.loads(times))
+            entry[4].extend(json.loads(codes))
+        return [tuple(entry) for entry in versions.values()]
+
+
+class DiscardRunner(BatchRunner):
+    ERROR_LINES = 5
+
+    def __init__(self, script_path, signals, limits=None):
+        super().__init__(script_path, signals, limits=limits)
+        self.errors = deque(maxlen=self.ERROR_LINES)
+
+    def stdout_callback(self, buffer):
+        return lambda line: None
+
+    def stderr_callback(self, buffer):
+        return self.errors.append
+
+
+class ScriptBenchmark(threading.Thread):
+    def __init__(self, script_path, signals, warmup=1, runs=10, limits=None, store=None):
+        super().__init__()
+        self.script_path = script_path
+        self.signals = signals
+        self.warmup = warmup
+        self.runs = runs
+        self.limits = limits or RunLimits()
+        self.store = store
+        self.script_hash = file_hash(script_path)
+        # Chaque exécution émet finished : seuls les messages sont relayés,
+        # la fin du banc d'essai est signalée une seule fois
+        self.run_signals = RunSignals()
+        self.run_signals.chunk.connect(signals.chunk.emit)
+        self.run_signals.error.connect(signals.error.emit)
+        self.times = []
+        self.exit_codes = []
+        self.bench_id = None
+        self._stop_flag = False
+        self._runner = None
+
+    def run(self):
+        started_at = time.time()
+        for index in range(self.warmup + self.runs):
+            if self._stop_flag:
+                break
+            runner = self._runner = DiscardRunner(self.script_path, self.run_signals, self.limits)
+            if self._stop_flag:
+                break
+            runner.run()
+            if self._stop_flag:
+                break
+            measured = index >= self.warmup
+            if measured:
+                self.times.append(runner.elapsed)
+                self.exit_codes.append(runner.returncode)
+                label = f"mesure {index - self.warmup + 1}/{self.runs}"
+            else:
+                label = f"chauffe {index + 1}/{self.warmup}"
+            code = "?" if runner.returncode is None else runner.returncode
+            self.signals.output.emit(f"[BENCH] {label} : {runner.elapsed:.3f} s, code {code}")
+            if runner.returncode != 0:
+                for line in runner.errors:
+                    self.signals.error.emit(f"    {line.rstrip()}")
+        if self.complete() and self.store is not None:
+            try:
+                self.bench_id = self.store.record(
+                    os.path.abspath(self.script_path), self.script_hash, started_at,
+                    self.warmup, self.times, self.exit_codes
+                )
+            except sqlite3.Error as e:
+                self.signals.error.emit(f"[ERREUR] Résultats non enregistrés: {e}")
+        self.signals.finished.emit()
+
+    def complete(self):
+        return not self._stop_flag and len(self.times) == self.runs
+
+    def stop(self):
+        self._stop_flag = True
+        runner = self._runner
+        if runner is not None:
+            runner.stop()
+
+
+# === Session shell interactive persistante ===
+# Un seul processus shell reçoit les commandes de la ligne interactive sur
+# son entrée standard : pas de démarrage de shell par commande, et les
+# « cd » / « set » restent actifs d'une commande à l'autre. Chaque commande
+# est suivie de l'écho d'un marqueur unique sur stdout et stderr ; la
+# commande est terminée quand les deux marqueurs sont revenus.
+if os.name == "nt":
+    SHELL_COMMAND = ["cmd.exe", "/Q", "/D"]
+    MARKER_COMMANDS = "echo {marker} %errorlevel%\necho {marker} 1>&2\n"
+else:
+    SHELL_COMMAND = ["/bin/sh"]
+    MARKER_COMMANDS = "echo {marker} $?\necho {marker} 1>&2\n"
+
+
+class ShellSession:
+    def __init__(self, signals, encoding="auto"):
+        self.signals = signals
+        self.encoding = encoding
+        self.marker = f"__BATCHIDE_{uuid.uuid4().hex}__"
+        self.proc = None
+        self.buffer = None
+        self.busy = False
+        self.last_exit_code = None
+        self._markers = 0
+        self._lock = threading.Lock()
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            SHELL_COMMAND,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **RunLimits().popen_options()
+        )
+        self.buffer = OutputBuffer(self.signals.chunk.emit)
+        self.pump = OutputPump(self.proc, self._on_stdout, self._on_stderr, self.encoding)
+        self.pump.start()
+        threading.Thread(target=self._watch, args=(self.proc, self.buffer), daemon=True).start()
+
+    def execute(self, command):
+        if not self.alive():
+            self.start()
+        with self._lock:
+            self.busy = True
+            self._markers = 2
+        try:
+            data = command + "\n" + MARKER_COMMANDS.format(marker=self.marker)
+            self.proc.stdin.write(data.encode(input_encoding(self.encoding), "replace"))
+            self.proc.stdin.flush()
+        except OSError as e:
+            self.buffer.error(f"[ERREUR] Session shell: {e}")
+            self._command_done()
+
+    def restart(self):
+        self.close()
+        self.start()
+
+    def close(self):
+        if self.proc is None:
+            return
+        proc, buffer = self.proc, self.buffer
+        self.proc = None
+        self.busy = False
+        # Tue aussi la commande en cours et ses descendants
+        kill_process_tree(proc, grace=0)
+        proc.wait()
+        buffer.close()
+
+    def _on_stdout(self, line):
+        if line.startswith(self.marker):
+            if line.endswith("\r"):
+                return
+            code = line[len(self.marker):].strip()
+            self.last_exit_code = int(code) if code.lstrip("-").isdigit() else None
+            self._marker_seen()
+        else:
+            self.buffer.output(line)
+
+    def _on_stderr(self, line):
+        if line.startswith(self.marker):
+            if not line.endswith("\r"):
+                self._marker_seen()
+        else:
+            self.buffer.error(line)
+
+    def _marker_seen(self):
+        with self._lock:
+            self._markers -= 1
+            done = self._markers == 0
+        if done:
+            self._command_done()
+
+    def _command_done(self):
+        with self._lock:
+            self.busy = False
+            self._markers = 0
+        self.buffer.flush()
+        self.signals.finished.emit()
+
+    def _watch(self, proc, buffer):
+        # Le shell s'est arrêté (exit, kill) : la commande en cours se termine
+        proc.wait()
+        self.pump.join()
+        if proc is self.proc:
+            self.last_exit_code = proc.returncode
+            buffer.output(f"[INFO] Session shell terminée (code {proc.returncode}).")
+            if self.busy:
+                self._command_done()
+            else:
+                buffer.flush()
+
+
+# === Index de recherche dans un dossier ===
+# Index de trigrammes persistant, une base SQLite par dossier indexé. Pour
+# chaque trigramme du texte en minuscules (octets UTF-8), la liste des
+# fichiers qui le contiennent est un bitmap (un bit par fichier), gardé en
+# mémoire : une requête intersecte les bitmaps de ses trigrammes et ne relit
+# que les fichiers candidats. Les résultats des requêtes déjà faites sont
+# gardés en cache jusqu'à la mise à jour suivante. La mise à jour compare
+# date de modification et taille de chaque script avec la base et ne
+# réindexe que les fichiers nouveaux ou modifiés, dans un pool de processus
+# (l'extraction des trigrammes occupe le CPU, pas le disque).
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".batchide", "index")
+INDEX_EXTENSIONS = (".bat", ".cmd")
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    grams BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    gram INTEGER PRIMARY KEY,
+    files BLOB NOT NULL
+);
+"""
+
+
+def read_script(path):
+    # Même repli que la sortie des scripts : UTF-8, sinon page de code
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode(FALLBACK_ENCODING, "replace")
+
+
+def trigrams(text):
+    data = text.lower().encode("utf-8")
+    return {int.from_bytes(gram, "big") for gram in {data[i:i + 3] for i in range(len(data) - 2)}}
+
+
+def index_file(path):
+    # Exécuté dans un processus du pool : (chemin, trigrammes) ou None
+    try:
+        grams = trigrams(read_script(path))
+    except OSError:
+        return None
+    return path, array("I", sorted(grams)).tobytes()
+
+
+def scan_scripts(folder):
+    # {chemin: (mtime, taille)} des scripts du dossier et de ses sous-dossiers
+    found = {}
+    pending = [folder]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.lower().endswith(INDEX_EXTENSIONS):
+                        stat = entry.stat()
+                        found[entry.path] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    pass
+    return found
+
+
+class SearchIndex:
+    # En dessous, l'indexation reste dans le thread appelant
+    POOL_THRESHOLD = 64
+    MAX_RESULTS = 5000
+    CACHE_SIZE = 64
+    BATCH_FILES = 16
+
+    def __init__(self, folder, path=None):
+        self.folder = os.path.abspath(folder)
+        if path is None:
+            name = hashlib.blake2b(self.folder.encode("utf-8"), digest_size=8).hexdigest()
+            path = os.path.join(INDEX_DIR, name + ".sqlite3")
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._cache = {}
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(INDEX_SCHEMA)
+            # {id: (chemin, mtime, taille)} et {trigramme: bitmap des ids}
+            self.files = {row[0]: row[1:] for row in db.execute("SELECT id, path, mtime, size FROM files")}
+            self.postings = {
+                gram: bytearray(zlib.decompress(blob)) for gram, blob in db.execute("SELECT gram, files FROM postings")
+            }
+        self.ids = {entry[0]: file_id for file_id, entry in self.files.items()}
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=10))
+
+    def update(self, progress=None, workers=None):
+        # Réindexe les fichiers nouveaux ou modifiés et retire les disparus ;
+        # renvoie (réindexés, retirés). progress(faits, total) est appelé
+        # depuis le thread de mise à jour.
+        with self._update_lock:
+            found = scan_scripts(self.folder)
+            changed = [path for path, signature in found.items()
+                       if path not in self.ids or self.files[self.ids[path]][1:] != signature]
+            removed = [path for path in self.ids if path not in found]
+            if not changed and not removed:
+                return 0, 0
+            dirty = set()
+            with self._connect() as db, db:
+                for path in removed:
+                    self._remove(db, path, dirty)
+                if len(changed) < self.POOL_THRESHOLD:
+                    self._apply(db, map(index_file, changed), found, dirty, len(changed), progress)
+                else:
+                    # Import tardif : le démarrage de l'IDE ne paie pas le pool
+                    from concurrent.futures import ProcessPoolExecutor
+                    with ProcessPoolExecutor(workers) as pool:
+                        results = pool.map(index_file, changed, chunksize=32)
+                        self._apply(db, results, found, dirty, len(changed), progress)
+                for gram in dirty:
+                    bitmap = self.postings.get(gram)
+                    if bitmap is not None and any(bitmap):
+                        db.execute("INSERT OR REPLACE INTO postings (gram, files) VALUES (?, ?)",
+                                   (gram, zlib.compress(bitmap)))
+                    else:
+                        self.postings.pop(gram, None)
+                        db.execute("DELETE FROM postings WHERE gram = ?", (gram,))
+            with self._lock:
+                self.generation += 1
+                self._cache.clear()
+            return len(changed), len(removed)
+
+    def _old_grams(self, db, file_id):
+        row = db.execute("SELECT grams FROM files WHERE id = ?", (file_id,)).fetchone()
+        return array("I", zlib.decompress(row[0])) if row else ()
+
+    def _remove(self, db, path, dirty):
+        file_id = self.ids[path]
+        index, mask = file_id >> 3, ~(1 << (file_id & 7)) & 0xFF
+        grams = self._old_grams(db, file_id)
+        with self._lock:
+            for gram in grams:
+                bitmap = self.postings.get(gram)
+                if bitmap is not None and index < len(bitmap):
+                    bitmap[index] &= mask
+            del self.ids[path]
+            del self.files[file_id]
+        dirty.update(grams)
+        db.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _apply(self, db, results, found, dirty, total, progress):
+        free = (i for i in itertools.count() if i not in self.files)
+        for done, result in enumerate(results, 1):
+            if progress is not None and (done % 256 == 0 or done == total):
+                progress(done, total)
+            if result is None:
+                continue
+            path, blob = result
+            grams = array("I", blob)
+            file_id = self.ids.get(path)
+            if file_id is not None:
+                # Fichier modifié : on repart de zéro pour ses trigrammes
+                self._remove(db, path, dirty)
+            else:
+                file_id = next(free)
+            index, mask = file_id >> 3, 1 << (file_id & 7)
+            with self._lock:
+                for gram in grams:
+                    bitmap = self.postings.get(gram)
+                    if bitmap is None:
+                        bitmap = self.postings[gram] = bytearray(index + 1)
+                    elif len(bitmap) <= index:
+                        bitmap.extend(bytes(index + 1 - len(bitmap)))
+                    bitmap[index] |= mask
+                self.files[file_id] = (path,) + found[path]
+                self.ids[path] = file_id
+            dirty.update(grams)
+            db.execute("INSERT INTO files (id, path, mtime, size, grams) VALUES (?, ?, ?, ?, ?)",
+                       (file_id, path, found[path][0], found[path][1], zlib.compress(blob)))
+
+    def candidates(self, text):
+        # Chemins des fichiers qui contiennent tous les trigrammes de la
+        # requête (tous les fichiers si elle en a moins de trois caractères)
+        with self._lock:
+            grams = trigrams(text)
+            if not grams:
+                return sorted(entry[0] for entry in self.files.values())
+            bits = -1
+            for gram in grams:
+                bitmap = self.postings.get(gram)
+                if bitmap is None:
+                    return []
+                bits &= int.from_bytes(bitmap, "little")
+            paths = []
+            digits = bin(bits)[:1:-1]
+            position = digits.find("1")
+            while position >= 0:
+                entry = self.files.get(position)
+                if entry is not None:
+                    paths.append(entry[0])
+                position = digits.find("1", position + 1)
+        paths.sort()
+        return paths
+
+    def search(self, text, case_sensitive=False, whole_word=False):
+        # Génère des paquets [(chemin, numéro de ligne, ligne), ...]. Seule
+        # une recherche menée jusqu'au bout est mise en cache : le thread
+        # appelant peut abandonner le générateur dès qu'une requête plus
+        # récente arrive.
+        key = (text, case_sensitive, whole_word)
+        with self._lock:
+            cached = self._cache.get(key)
+            generation = self.generation
+        if cached is not None:
+            yield cached
+            return
+        source = re.escape(text)
+        if whole_word:
+            source = rf"(?<!\w){source}(?!\w)"
+        pattern = re.compile(source, 0 if case_sensitive else re.IGNORECASE)
+        results = []
+        batch = []
+        for number, path in enumerate(self.candidates(text), 1):
+            try:
+                batch.extend(self.matches(path, pattern))
+            except OSError:
+                continue
+            if len(results) + len(batch) >= self.MAX_RESULTS:
+                batch = batch[:self.MAX_RESULTS - len(results)]
+                break
+            if number % self.BATCH_FILES == 0 and batch:
+                results.extend(batch)
+                yield batch
+                batch = []
+        results.extend(batch)
+        if batch:
+            yield batch
+        with self._lock:
+            if generation == self.generation:
+                if len(self._cache) >= self.CACHE_SIZE:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = results
+
+    @staticmethod
+    def matches(path, pattern):
+        text = read_script(path)
+        found = []
+        line = 0
+        line_start = 0
+        for match in pattern.finditer(text):
+            start = match.start()
+            if start < line_start:
+                continue  # déjà relevée sur cette ligne
+            line += text.count("\n", line_start, start)
+            line_start = text.rfind("\n", 0, start) + 1
+            line_end = text.find("\n", start)
+            if line_end < 0:
+                line_end = len(text)
+            found.append((path, line, text[line_start:line_end].rstrip("\r")))
+            line_start = line_end + 1
+            line += 1
+        return found
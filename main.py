@@ -1,25 +1,270 @@
 import sys
-import subprocess
-import threading
 import time
+
+# Instant de lancement, référence de --startup-profile
+STARTED = time.perf_counter()
+
+# Mode sans interface : PySide6 n'est jamais importé (cf. cli.py)
+if __name__ == "__main__" and "--run" in sys.argv[1:]:
+    from cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
+import threading
 import os
+import re
+import bisect
+import json
+import shutil
+import hashlib
+import tempfile
+import sqlite3
+import codecs
+import zlib
+import functools
+import weakref
+from collections import deque
 
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QPlainTextEdit, QFileDialog,
-    QToolBar, QMessageBox, QLineEdit, QHBoxLayout, QLabel, QPushButton, QDialog, QCheckBox, QStatusBar
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QPlainTextEdit, QTextEdit, QFileDialog,
+    QToolBar, QMessageBox, QLineEdit, QHBoxLayout, QLabel, QPushButton, QDialog, QCheckBox, QStatusBar,
+    QProgressBar, QTabWidget, QTableWidget, QTableWidgetItem, QInputDialog, QFormLayout, QSpinBox,
+    QDialogButtonBox, QComboBox, QTabBar, QPlainTextDocumentLayout
+)
+from PySide6.QtGui import (
+    QFont, QTextCharFormat, QTextFormat, QColor, QSyntaxHighlighter, QAction, QTextCursor,
+    QTextDocument
 )
-from PySide6.QtGui import QFont, QTextCharFormat, QColor, QSyntaxHighlighter, QAction, QTextCursor
-from PySide6.QtCore import Qt, QRegularExpression, Signal, QObject, QTimer
+from PySide6.QtCore import Qt, QRegularExpression, Signal, QObject, QTimer, QEvent
 from PySide6.QtWidgets import QListWidget, QListWidgetItem
 
+from engine import (
+    LABEL_PATTERN, JUMP_PATTERN, FILTER_ACTIONS, OUTPUT_ENCODINGS, FALLBACK_ENCODING, resource, tokenize,
+    BatchAnalyzer, RunLimits, RunHistory, OutputFilter, OutputFilters, BatchRunner, ProfileRunner, ShellSession,
+    HighlightedLine, SearchIndex, BenchmarkStore, ScriptBenchmark, process_rss, file_hash, timing_stats, exit_code_summary,
+    compare_timings
+)
+
+
+# === Scripts exemples (panneau de gauche) ===
+SAMPLES = {
+    "Clear screen (cls)": "cls\n",
+    "Pause script": "pause\n",
+    "Echo Hello World": "@echo off\necho Hello World\n",
+    "Set variable and echo": "set NAME=World\necho Hello %NAME%\n",
+    "Simple IF condition": "if \"%1\"==\"\" (\n    echo Aucun argument\n) else (\n    echo Argument: %1\n)\n",
+    "Loop for /L example": "for /L %%i in (1,1,10) do echo %%i\n",
+}
+
+
+# === Positions UTF-16 (Qt) ===
+ASTRAL_PATTERN = re.compile("[\U00010000-\U0010ffff]")
+
+
+def utf16_offsets(text):
+    # Qt compte en unités UTF-16 : décalage seulement si la ligne contient
+    # des caractères hors BMP (emoji...), sinon None
+    if text.isascii() or not ASTRAL_PATTERN.search(text):
+        return None
+    offsets = [0]
+    for ch in text:
+        offsets.append(offsets[-1] + (2 if ord(ch) > 0xFFFF else 1))
+    return offsets
+
+
+def utf16_spans(text, spans):
+    # Convertit des intervalles Python (début, fin), triés, en positions Qt (UTF-16)
+    if text.isascii() or ASTRAL_PATTERN.search(text) is None:
+        return list(spans)
+    converted = []
+    shift = 0
+    prev = 0
+    for start, end in spans:
+        shift += len(ASTRAL_PATTERN.findall(text, prev, start))
+        qt_start = start + shift
+        shift += len(ASTRAL_PATTERN.findall(text, start, end))
+        prev = end
+        converted.append((qt_start, end + shift))
+    return converted
+
+
+# === Instrumentation (opt-in) ===
+# Activée par « 📊 Mesures » ou --metrics ; désactivée, une fonction
+# instrumentée ne coûte qu'un test. Mesure la latence de la boucle
+# d'événements (retard d'un timer à intervalle fixe sur l'heure prévue),
+# les signaux émis par les WorkerSignals, les lignes ajoutées aux consoles,
+# le temps cumulé des fonctions marquées @timed et la mémoire résidente.
+# Tout est compté dans le thread de l'interface (les signaux des threads y
+# sont livrés), aucun verrou n'est donc nécessaire.
+class PerfMonitor:
+    SAMPLE_MS = 50
+    # Fenêtre glissante des retards : 10 s
+    SAMPLES = 200
+
+    def __init__(self):
+        self.enabled = False
+        self.timer = None
+        self.started = None
+        self.last_tick = None
+        self.lags = deque(maxlen=self.SAMPLES)
+        self.max_lag = 0.0
+        # nom -> [appels, durée totale, durée max]
+        self.timings = {}
+        # nom -> total, et débit par seconde au dernier rafraîchissement
+        self.counters = {}
+        self.rates = {}
+        self._rate_base = ({}, None)
+        self._signals = weakref.WeakSet()
+
+    def register(self, signals):
+        self._signals.add(signals)
+        if self.enabled:
+            self._connect(signals)
+
+    def _connect(self, signals):
+        signals.output.connect(self._on_output)
+        signals.error.connect(self._on_error)
+        signals.chunk.connect(self._on_chunk)
+        signals.finished.connect(self._on_finished)
+
+    def _disconnect(self, signals):
+        try:
+            signals.output.disconnect(self._on_output)
+            signals.error.disconnect(self._on_error)
+            signals.chunk.disconnect(self._on_chunk)
+            signals.finished.disconnect(self._on_finished)
+        except (RuntimeError, TypeError):
+            pass
+
+    def _on_output(self, text):
+        self.count("signaux")
+        self.count("signal.output")
+
+    def _on_error(self, text):
+        self.count("signaux")
+        self.count("signal.error")
+
+    def _on_chunk(self, entries):
+        self.count("signaux")
+        self.count("signal.chunk")
+
+    def _on_finished(self):
+        self.count("signaux")
+        self.count("signal.finished")
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = self.last_tick = time.perf_counter()
+        if self.timer is None:
+            self.timer = QTimer()
+            self.timer.setTimerType(Qt.PreciseTimer)
+            self.timer.setInterval(self.SAMPLE_MS)
+            self.timer.timeout.connect(self._tick)
+        self.timer.start()
+        for signals in list(self._signals):
+            self._connect(signals)
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.timer.stop()
+        for signals in list(self._signals):
+            self._disconnect(signals)
+
+    def _tick(self):
+        now = time.perf_counter()
+        lag = max(0.0, now - self.last_tick - self.SAMPLE_MS / 1000)
+        self.last_tick = now
+        self.lags.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    def add_time(self, name, elapsed):
+        entry = self.timings.get(name)
+        if entry is None:
+            entry = self.timings[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        if elapsed > entry[2]:
+            entry[2] = elapsed
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def update_rates(self):
+        # Débits depuis l'appel précédent (rafraîchissement de l'affichage)
+        now = time.perf_counter()
+        previous, since = self._rate_base
+        if since is not None and now > since:
+            self.rates = {name: (value - previous.get(name, 0)) / (now - since)
+                          for name, value in self.counters.items()}
+        self._rate_base = (dict(self.counters), now)
+
+    def lag_stats(self):
+        lags = sorted(self.lags)
+        if not lags:
+            return {"last_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0, "samples": 0}
+        return {
+            "last_ms": self.lags[-1] * 1000,
+            "p50_ms": lags[len(lags) // 2] * 1000,
+            "p95_ms": lags[min(len(lags) - 1, int(len(lags) * 0.95))] * 1000,
+            "max_ms": self.max_lag * 1000,
+            "samples": len(lags),
+        }
+
+    def snapshot(self):
+        import platform
+        import PySide6
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "duration_s": time.perf_counter() - self.started if self.started else 0.0,
+            "environment": {
+                "python": sys.version.split()[0],
+                "pyside6": PySide6.__version__,
+                "platform": platform.platform(),
+            },
+            "event_loop": dict(self.lag_stats(), interval_ms=self.SAMPLE_MS),
+            "counters": dict(self.counters),
+            "rates_per_s": dict(self.rates),
+            "timings": {
+                name: {"calls": calls, "total_ms": total * 1000, "avg_ms": total * 1000 / calls, "max_ms": longest * 1000}
+                for name, (calls, total, longest) in self.timings.items()
+            },
+            "rss_bytes": process_rss(),
+        }
+
+
+MONITOR = PerfMonitor()
+
+
+def timed(name):
+    # Cumule la durée des appels de la fonction quand l'instrumentation est active
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not MONITOR.enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                MONITOR.add_time(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
 
 # === Syntax Highlighter avancé batch ===
+# Un seul passage du lexer par ligne ; une ligne de commentaire ne produit
+# qu'un jeton. L'état de bloc indique si la ligne est un commentaire
+# prolongé par « ^ » : tant que cet état ne change pas, Qt ne rehighlight
+# que le bloc modifié.
 class BatchHighlighter(QSyntaxHighlighter):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Batch IDE Pro")
-        self.resize(1200, 700)
+    STATE_NORMAL = 0
+    STATE_COMMENT_CONTINUED = 1
 
+    def __init__(self, document):
+        super().__init__(document)
         self.keyword_format = QTextCharFormat()
         self.keyword_format.setForeground(QColor("#569CD6"))
         self.keyword_format.setFontWeight(QFont.Bold)
@@ -31,289 +276,855 @@ class BatchHighlighter(QSyntaxHighlighter):
         self.string_format = QTextCharFormat()
         self.string_format.setForeground(QColor("#CE9178"))
 
-        keywords = [
-            "echo", "set", "if", "else", "goto", "call", "pause", "exit",
-            "rem", "for", "in", "do", "start", "cls", "shift", "cd", "md", "rd", "dir"
-        ]
-        self.rules = [
-            (QRegularExpression(rf"\b{kw}\b", QRegularExpression.CaseInsensitiveOption), self.keyword_format)
-            for kw in keywords
-        ]
+        self.variable_format = QTextCharFormat()
+        self.variable_format.setForeground(QColor("#9CDCFE"))
 
-        self.comment_pattern = QRegularExpression(r"^\s*(rem|::).*$", QRegularExpression.CaseInsensitiveOption)
-        self.string_pattern = QRegularExpression(r'"[^"\n]*"')
+        self.delayed_format = QTextCharFormat()
+        self.delayed_format.setForeground(QColor("#4EC9B0"))
 
-    def highlightBlock(self, text):
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+        self.loopvar_format = QTextCharFormat()
+        self.loopvar_format.setForeground(QColor("#C586C0"))
 
-        comment_match = self.comment_pattern.match(text)
-        if comment_match.hasMatch():
-            self.setFormat(comment_match.capturedStart(), comment_match.capturedLength(), self.comment_format)
+        self.label_format = QTextCharFormat()
+        self.label_format.setForeground(QColor("#DCDCAA"))
+        self.label_format.setFontWeight(QFont.Bold)
 
-        it = self.string_pattern.globalMatch(text)
-        while it.hasNext():
-            match = it.next()
-            self.setFormat(match.capturedStart(), match.capturedLength(), self.string_format)
+        self.redirect_format = QTextCharFormat()
+        self.redirect_format.setForeground(QColor("#D7BA7D"))
 
-        # === Variables ===
-        self.current_file = None
-        self.is_modified = False
-        self.runner = None
-        self.signals = WorkerSignals()
-        self.samples_visible = True
+        self.escape_format = QTextCharFormat()
+        self.escape_format.setForeground(QColor("#D16969"))
 
-        # === UI Principal ===
-        central = QWidget()
-        self.setCentralWidget(central)
-        main_layout = QHBoxLayout()
-        central.setLayout(main_layout)
+        self.formats = {
+            "keyword": self.keyword_format,
+            "comment": self.comment_format,
+            "string": self.string_format,
+            "variable": self.variable_format,
+            "delayed": self.delayed_format,
+            "loopvar": self.loopvar_format,
+            "label": self.label_format,
+            "redirect": self.redirect_format,
+            "escape": self.escape_format,
+        }
 
-        # === Liste de scripts exemples à gauche ===
-        self.samples_list = QListWidget()
-        self.samples_list.setMaximumWidth(280)
-        self.samples_list.setFont(QFont("Consolas", 11))
-        self.samples_list.addItems([
-            "Clear screen (cls)",
-            "Pause script",
-            "Echo Hello World",
-            "Set variable and echo",
-            "Simple IF condition",
-            "Loop for /L example"
-        ])
-        self.samples_list.itemClicked.connect(self.insert_sample_code)
-        main_layout.addWidget(self.samples_list)
+    @timed("highlightBlock")
+    def highlightBlock(self, text):
+        in_comment = self.previousBlockState() == self.STATE_COMMENT_CONTINUED
+        tokens = tokenize(text, in_comment)
 
-        # === Zone droite (éditeur + console + input) ===
-        right_layout = QVBoxLayout()
+        continued = bool(tokens) and tokens[0][0] == "comment" and text.rstrip().endswith("^")
+        self.setCurrentBlockState(self.STATE_COMMENT_CONTINUED if continued else self.STATE_NORMAL)
 
-        # Éditeur
-        self.editor = QPlainTextEdit()
-        self.editor.setFont(QFont("Consolas", 12))
-        self.highlighter = BatchHighlighter(self.editor.document())
-        self.editor.textChanged.connect(self.on_text_changed)
-        right_layout.addWidget(self.editor, stretch=3)
+        offsets = utf16_offsets(text)
+        for kind, start, end in tokens:
+            if offsets is not None:
+                start, end = offsets[start], offsets[end]
+            self.setFormat(start, end - start, self.formats[kind])
 
-        # Console
-        self.console = QPlainTextEdit()
-        self.console.setReadOnly(True)
-        self.console.setFont(QFont("Consolas", 11))
-        self.console.setStyleSheet("background-color:#1e1e1e; color:#d4d4d4;")
-        right_layout.addWidget(self.console, stretch=1)
 
-        # Ligne de commande interactive
-        self.console_input = QLineEdit()
-        self.console_input.setFont(QFont("Consolas", 12))
-        self.console_input.setPlaceholderText("Tape ta commande batch ici et appuie sur Entrée...")
-        self.console_input.returnPressed.connect(self.execute_console_command)
-        right_layout.addWidget(self.console_input)
+# === Thread d'analyse ===
+# Ne garde que la dernière demande : si l'utilisateur tape pendant une
+# analyse, les instantanés intermédiaires sont simplement ignorés.
+class AnalyzerSignals(QObject):
+    # (génération, [(ligne, gravité, message), ...])
+    diagnostics = Signal(int, list)
 
-        main_layout.addLayout(right_layout)
 
-        # === Toolbar ===
-        toolbar = QToolBar()
-        self.addToolBar(toolbar)
+class LintWorker(threading.Thread):
+    def __init__(self, signals):
+        super().__init__(daemon=True)
+        self.signals = signals
+        self.analyzer = BatchAnalyzer()
+        self._pending = None
+        self._cond = threading.Condition()
 
-        open_act = QAction("📂 Ouvrir", self)
-        open_act.triggered.connect(self.open_file)
-        toolbar.addAction(open_act)
+    def submit(self, generation, text):
+        with self._cond:
+            self._pending = (generation, text)
+            self._cond.notify()
 
-        save_act = QAction("💾 Sauvegarder", self)
-        save_act.triggered.connect(self.save_file)
-        toolbar.addAction(save_act)
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, text = self._pending
+                self._pending = None
+            try:
+                diagnostics = self.analyzer.analyze(text)
+            except Exception as e:
+                diagnostics = [(0, "error", f"[ERREUR] Analyse: {e}")]
+            self.signals.diagnostics.emit(generation, diagnostics)
 
-        saveas_act = QAction("💾 Sauvegarder sous...", self)
-        saveas_act.triggered.connect(self.save_as_file)
-        toolbar.addAction(saveas_act)
 
-        toolbar.addSeparator()
+# === Index des labels ===
+# Associe chaque label à l'ensemble des numéros de bloc qui le définissent,
+# et chaque bloc indexé à son label : la recherche d'un label et le test
+# « ce bloc est-il déjà indexé » sont de simples accès aux dictionnaires,
+# quelle que soit la taille du fichier ou le nombre de répétitions d'un nom.
+# Seuls les blocs touchés par une modification sont relus ; quand elle
+# ajoute ou retire des lignes, les entrées situées après sont décalées.
+class LabelIndex(QObject):
+    changed = Signal()
 
-        run_act = QAction("▶️ Lancer", self)
-        run_act.triggered.connect(self.run_batch)
-        toolbar.addAction(run_act)
+    def __init__(self, document, enabled=True):
+        super().__init__(document)
+        self.document = document
+        self.enabled = enabled
+        # nom -> {numéros de bloc}, numéro de bloc -> nom
+        self._labels = {}
+        self._blocks = {}
+        self._block_count = document.blockCount()
+        document.contentsChange.connect(self._on_contents_change)
+        if enabled:
+            self._scan(document.firstBlock(), document.lastBlock())
+
+    def set_enabled(self, enabled):
+        # Désactivé (gros fichiers), l'index est vidé ; il est reconstruit
+        # en entier à la réactivation
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self._labels = {}
+        self._blocks = {}
+        self._block_count = self.document.blockCount()
+        if enabled:
+            self._scan(self.document.firstBlock(), self.document.lastBlock())
+        self.changed.emit()
+
+    @staticmethod
+    def label_of(block):
+        match = LABEL_PATTERN.match(block.text())
+        return match.group().strip()[1:].lower() if match else None
+
+    def _on_contents_change(self, position, removed, added):
+        if not self.enabled:
+            return
+        first = self.document.findBlock(position)
+        last = self.document.findBlock(position + added)
+        if not last.isValid():
+            last = self.document.lastBlock()
+        count = self.document.blockCount()
+        delta = count - self._block_count
+        self._block_count = count
+        # Avant la modification, les blocs first..last valaient first..last - delta
+        start, end = first.blockNumber(), last.blockNumber()
+        for number in range(start, end - delta + 1):
+            self._forget(number)
+        if delta:
+            # Reconstruction en bloc : plus rapide qu'un déplacement entrée par entrée
+            limit = end - delta
+            self._blocks = {number + delta if number > limit else number: name
+                            for number, name in self._blocks.items()}
+            self._labels = {}
+            for number, name in self._blocks.items():
+                self._labels.setdefault(name, set()).add(number)
+        self._scan(first, last)
+        self.changed.emit()
+
+    def _forget(self, number):
+        name = self._blocks.pop(number, None)
+        if name is not None:
+            numbers = self._labels[name]
+            numbers.discard(number)
+            if not numbers:
+                del self._labels[name]
+
+    def _scan(self, first, last):
+        block = first
+        while block.isValid():
+            number = block.blockNumber()
+            name = self.label_of(block)
+            if name != self._blocks.get(number):
+                self._forget(number)
+                if name is not None:
+                    self._labels.setdefault(name, set()).add(number)
+                    self._blocks[number] = name
+            if block == last:
+                break
+            block = block.next()
 
-        stop_act = QAction("⏹️ Stop", self)
-        stop_act.triggered.connect(self.stop_batch)
-        toolbar.addAction(stop_act)
+    def lookup(self, name):
+        # Premier bloc qui définit le label (c'est celui que vise goto), ou None
+        numbers = self._labels.get(name.lstrip(":").lower())
+        return self.document.findBlockByNumber(min(numbers)) if numbers else None
 
-        toolbar.addSeparator()
+    def labels(self):
+        return sorted(self._blocks.items())
 
-        search_act = QAction("🔍 Rechercher", self)
-        search_act.triggered.connect(self.open_search_dialog)
-        toolbar.addAction(search_act)
 
-        toggle_samples_act = QAction("📁 Exemples", self)
-        toggle_samples_act.triggered.connect(self.toggle_samples)
-        toolbar.addAction(toggle_samples_act)
+# === Chargement progressif des gros fichiers ===
+# Lit le fichier par morceaux dans un thread ; l'interface insère chaque
+# morceau à la suite du document. Le sémaphore limite le nombre de morceaux
+# en attente, la mémoire reste donc bornée même si l'affichage est plus lent
+# que le disque.
+class LoaderSignals(QObject):
+    # (texte, octets lus)
+    chunk = Signal(str, int)
+    # message d'erreur, vide si tout s'est bien passé
+    finished = Signal(str)
 
-        # === Status bar ===
-        self.status = QStatusBar()
-        self.setStatusBar(self.status)
-        self.update_status("Prêt")
 
-        # === Connexion signaux d’exécution ===
-        self.signals.output.connect(self.append_output)
-        self.signals.error.connect(self.append_error)
-        self.signals.finished.connect(self.execution_finished)
+class FileLoader(threading.Thread):
+    CHUNK_CHARS = 4 * 1024 * 1024
 
-        # === Auto-save toutes les 60 secondes ===
-        self.auto_save_timer = QTimer()
-        self.auto_save_timer.timeout.connect(self.auto_save)
-        self.auto_save_timer.start(60000)
+    def __init__(self, path, signals):
+        super().__init__(daemon=True)
+        self.path = path
+        self.signals = signals
+        self.credit = threading.Semaphore(2)
 
-    def toggle_samples(self):
-        self.samples_visible = not self.samples_visible
-        self.samples_list.setVisible(self.samples_visible)
+    def run(self):
+        error = ""
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                while True:
+                    text = f.read(self.CHUNK_CHARS)
+                    if not text:
+                        break
+                    self.credit.acquire()
+                    self.signals.chunk.emit(text, f.buffer.tell())
+        except OSError as e:
+            error = str(e)
+        self.signals.finished.emit(error)
+
+
+# === Sauvegarde atomique ===
+# Le contenu est écrit dans un fichier temporaire du même dossier, puis
+# renommé sur le fichier cible : un plantage en cours d'écriture ne laisse
+# jamais un script à moitié écrit.
+RECOVERY_DIR = os.path.join(os.path.expanduser("~"), ".batchide", "recovery")
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def atomic_write(path, write):
+    # write(f) remplit le fichier temporaire ; sa valeur de retour est renvoyée
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix="." + os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            result = write(f)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return result
+
+
+class SaveSignals(QObject):
+    # (point de reprise, empreinte, fichier réécrit, message d'erreur)
+    finished = Signal(int, str, bool, str)
+
+
+# === Auto-sauvegarde en arrière-plan ===
+# Travaille sur un instantané du texte : empreinte, puis écriture atomique,
+# sautée si le contenu est identique à la dernière sauvegarde.
+class AutoSaver(threading.Thread):
+    def __init__(self, path, text, checkpoint, saved_hash, signals):
+        super().__init__(daemon=True)
+        self.path = path
+        self.text = text
+        self.checkpoint = checkpoint
+        self.saved_hash = saved_hash
+        self.signals = signals
+
+    def run(self):
+        try:
+            digest = content_hash(self.text)
+            written = digest != self.saved_hash
+            if written:
+                atomic_write(self.path, lambda f: f.write(self.text))
+            self.signals.finished.emit(self.checkpoint, digest, written, "")
+        except Exception as e:
+            self.signals.finished.emit(self.checkpoint, "", False, str(e))
+
+
+# === Journal de reprise après plantage ===
+# Chaque modification du document (position, caractères supprimés, texte
+# inséré) est ajoutée au journal, écrit par un thread une fois par seconde.
+# Des points de reprise relient une position du journal à l'empreinte du
+# fichier sauvegardé : à la réouverture, les modifications postérieures au
+# dernier point de reprise qui correspond au fichier sur disque sont rejouées.
+class EditJournal(threading.Thread):
+    FLUSH_INTERVAL = 1.0
+
+    def __init__(self, path, base_hash):
+        super().__init__(daemon=True)
+        os.makedirs(RECOVERY_DIR, exist_ok=True)
+        self.journal_path = self.path_for(path)
+        self._file = open(self.journal_path, "w", encoding="utf-8")
+        self._pending = [json.dumps({"file": path, "checkpoint": 0, "hash": base_hash})]
+        self._closed = False
+        self._cond = threading.Condition()
+        self.next_checkpoint = 1
+        self.start()
+
+    @staticmethod
+    def path_for(path):
+        name = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=8).hexdigest()
+        return os.path.join(RECOVERY_DIR, name + ".journal")
+
+    def record(self, position, removed, text):
+        self._append(json.dumps([position, removed, text]))
+
+    def checkpoint(self):
+        number = self.next_checkpoint
+        self.next_checkpoint += 1
+        self._append(json.dumps({"checkpoint": number}))
+        return number
+
+    def resolve(self, number, digest):
+        self._append(json.dumps({"resolve": number, "hash": digest}))
+
+    def _append(self, line):
+        with self._cond:
+            self._pending.append(line)
+
+    def run(self):
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self.FLUSH_INTERVAL)
+                lines, self._pending = self._pending, []
+                closed = self._closed
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+            if closed:
+                self._file.close()
+                return
+
+    def close(self, discard=False):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.join()
+        if discard:
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
+
+    @classmethod
+    def recover(cls, path, digest):
+        # Modifications à rejouer sur le fichier d'empreinte digest, ou []
+        try:
+            with open(cls.path_for(path), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        edits = []
+        positions = {}
+        hashes = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # dernière ligne tronquée par le plantage
+            if isinstance(entry, list):
+                edits.append(entry)
+            elif "checkpoint" in entry:
+                positions[entry["checkpoint"]] = len(edits)
+                if "hash" in entry:
+                    hashes[entry["checkpoint"]] = entry["hash"]
+            elif "resolve" in entry:
+                hashes[entry["resolve"]] = entry["hash"]
+        starts = [position for number, position in positions.items() if hashes.get(number) == digest]
+        return edits[max(starts):] if starts else []
+
+
+# === Documents ouverts : un onglet par script ===
+# L'éditeur est unique, changer d'onglet remplace son document. Un onglet
+# inactif peut être déchargé : document, coloration et index des labels
+# sont libérés, il ne reste qu'un instantané compressé du texte avec la
+# position du curseur et du défilement. Le document est reconstruit à la
+# prochaine activation de l'onglet (la pile d'annulation est perdue).
+class ScriptTab:
+    def __init__(self, path=None, large_file_mode=False):
+        self.current_file = path
+        self.is_modified = False
+        self.large_file_mode = large_file_mode
+        self.saved_hash = None
+        self.journal = None
+        self.saver = None
+        # Nombre de modifications du document, sert à savoir si le texte a
+        # changé pendant une auto-sauvegarde
+        self.edits = 0
+        self.save_revision = 0
+        self.document = None
+        self.highlighter = None
+        self.label_index = None
+        self.snapshot = None
+        # (ancre, position) du curseur et valeur de la barre de défilement
+        self.cursor = (0, 0)
+        self.scroll = 0
+
+    def title(self):
+        name = os.path.basename(self.current_file) if self.current_file else "Sans nom"
+        return name + (" •" if self.is_modified else "")
+
+    def is_blank(self):
+        return self.current_file is None and not self.is_modified and self.document is not None \
+            and self.document.isEmpty()
+
+    def text(self):
+        if self.document is not None:
+            return self.document.toPlainText()
+        return zlib.decompress(self.snapshot).decode("utf-8")
+
+    def load(self, text, font):
+        document = QTextDocument()
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        document.setDefaultFont(font)
+        # Highlighter posé avant le texte : la coloration se fait pendant
+        # setPlainText et non plus tard, comme une modification
+        self.highlighter = None if self.large_file_mode else BatchHighlighter(document)
+        document.setPlainText(text)
+        self.document = document
+        self.snapshot = None
+        self.label_index = LabelIndex(document, not self.large_file_mode)
+
+    def unload(self):
+        self.snapshot = zlib.compress(self.document.toPlainText().encode("utf-8"), 1)
+        self.release()
+
+    def release(self):
+        # L'éditeur garde une référence Python aux documents qu'il a
+        # affichés : la destruction est explicite. Le highlighter et l'index
+        # sont des enfants du document, libérés avec lui.
+        self.document.deleteLater()
+        self.highlighter = None
+        self.label_index = None
+        self.document = None
 
-    def highlightBlock(self, text):
-        # Keywords
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                start = match.capturedStart()
-                length = match.capturedLength()
-                self.setFormat(start, length, fmt)
-
-        # Comments
-        comment_match = self.comment_pattern.match(text)
-        if comment_match.hasMatch():
-            start = comment_match.capturedStart()
-            length = comment_match.capturedLength()
-            self.setFormat(start, length, self.comment_format)
-
-        # Strings
-        it = self.string_pattern.globalMatch(text)
-        while it.hasNext():
-            match = it.next()
-            start = match.capturedStart()
-            length = match.capturedLength()
-            self.setFormat(start, length, self.string_format)
 
 # === Signal pour thread console ===
 class WorkerSignals(QObject):
     output = Signal(str)
     error = Signal(str)
+    # Paquet de lignes [(is_error, texte), ...] envoyé par OutputBuffer
+    chunk = Signal(list)
     finished = Signal()
 
-# === Thread d’exécution batch sur fichier ===
-class BatchRunner(threading.Thread):
-    def __init__(self, script_path, signals):
+    def __init__(self):
         super().__init__()
-        self.script_path = script_path
-        self.signals = signals
-        self._stop_flag = False
+        MONITOR.register(self)
 
-    def run(self):
-        try:
-            proc = subprocess.Popen(
-                [self.script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                shell=True,
-                text=True,
-                encoding="utf-8"
-            )
-            while True:
-                if self._stop_flag:
-                    proc.terminate()
-                    self.signals.output.emit("\n[INFO] Exécution arrêtée par l’utilisateur.")
-                    break
-                out_line = proc.stdout.readline()
-                if out_line:
-                    self.signals.output.emit(out_line.rstrip())
-                err_line = proc.stderr.readline()
-                if err_line:
-                    self.signals.error.emit(err_line.rstrip())
-                if out_line == "" and err_line == "" and proc.poll() is not None:
-                    break
-                time.sleep(0.01)
-            self.signals.finished.emit()
-        except Exception as e:
-            self.signals.error.emit(f"[ERREUR] Exception: {e}")
-            self.signals.finished.emit()
+
+# === Suite de scripts exécutés en parallèle ===
+# Chaque BatchJob a ses propres signaux et sa console ; JobScheduler en
+# lance au plus max_workers à la fois et démarre le suivant dès qu'un
+# processus se termine.
+class BatchJob(QObject):
+    done = Signal(object)
+
+    def __init__(self, path, limits=None, history=None, filters=None):
+        super().__init__()
+        self.path = path
+        self.limits = limits
+        self.history = history
+        self.filters = filters
+        self.runner = None
+        self.returncode = None
+        self.elapsed = None
+        self.console = ExecutionConsole()
+        self.signals = WorkerSignals()
+        self.signals.chunk.connect(self.console.append_chunk)
+        self.signals.error.connect(self.append_error)
+        self.signals.finished.connect(self.on_finished)
+
+    def start(self):
+        self.runner = BatchRunner(self.path, self.signals, limits=self.limits, history=self.history,
+                                  filters=self.filters)
+        self.runner.start()
 
     def stop(self):
-        self._stop_flag = True
+        if self.runner is not None:
+            self.runner.stop()
+
+    def append_error(self, text):
+        self.console.append_chunk([(True, text)])
+
+    def on_finished(self):
+        self.returncode = self.runner.returncode
+        self.elapsed = self.runner.elapsed
+        self.done.emit(self)
+
+
+class JobScheduler(QObject):
+    job_started = Signal(object)
+    job_finished = Signal(object)
+    all_finished = Signal()
 
-# === Thread d’exécution batch sur commande interactive ===
-class InteractiveBatchRunner(threading.Thread):
-    def __init__(self, command, signals):
+    def __init__(self, paths, max_workers, limits=None, history=None, filters=None):
         super().__init__()
-        self.command = command
-        self.signals = signals
+        self.max_workers = max(1, max_workers)
+        self.jobs = [BatchJob(path, limits, history, filters) for path in paths]
+        self.pending = deque(self.jobs)
+        self.running = set()
+        self.started = None
+        self.elapsed = None
 
-    def run(self):
-        try:
-            proc = subprocess.Popen(
-                self.command,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding="utf-8"
-            )
-            while True:
-                out_line = proc.stdout.readline()
-                if out_line:
-                    self.signals.output.emit(out_line.rstrip())
-                err_line = proc.stderr.readline()
-                if err_line:
-                    self.signals.error.emit(err_line.rstrip())
-                if out_line == "" and err_line == "" and proc.poll() is not None:
-                    break
-            self.signals.finished.emit()
-        except Exception as e:
-            self.signals.error.emit(f"[ERREUR] Exception: {e}")
-            self.signals.finished.emit()
+    def start(self):
+        self.started = time.monotonic()
+        self._fill()
+
+    def stop(self):
+        # Les scripts en attente ne seront pas lancés
+        self.pending.clear()
+        for job in list(self.running):
+            job.stop()
+
+    def _fill(self):
+        while self.pending and len(self.running) < self.max_workers:
+            job = self.pending.popleft()
+            self.running.add(job)
+            job.done.connect(self._on_done)
+            job.start()
+            self.job_started.emit(job)
+        if not self.pending and not self.running:
+            self.elapsed = time.monotonic() - self.started
+            self.all_finished.emit()
+
+    def _on_done(self, job):
+        self.running.discard(job)
+        self.job_finished.emit(job)
+        self._fill()
+
+
+# === Console d’exécution ===
+# Insère chaque paquet reçu en une seule édition du document : une suite de
+# lignes de même nature (sortie / erreur) devient un seul insertText.
+# L'historique est borné à max_blocks lignes : Qt retire les blocs les plus
+# anciens au fil de l'eau, la mémoire reste donc stable sur les longues
+# exécutions (la sortie complète peut aller dans un journal, cf. BatchRunner).
+# Les paquets qui contiennent des séquences ANSI ou des lignes « \r » passent
+# par un rendu plus lent : les codes SGR deviennent des QTextCharFormat (le
+# style courant persiste d'une ligne à l'autre, comme dans un terminal), les
+# autres séquences sont ignorées, et une ligne terminée par « \r » est
+# remplacée sur place par la suivante. Dans un même paquet, seul le dernier
+# état d'une ligne réécrite est inséré.
+ANSI_PATTERN = re.compile(r"\x1b\[([0-9;?]*)([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)?|\x1b[@-Z\\-_]")
+
+ANSI_COLORS = [
+    "#3f4451", "#e05561", "#8cc265", "#d18f52", "#4aa5f0", "#c162de", "#42b3c2", "#d7dae0",
+    "#4f5666", "#ff616e", "#a5e075", "#f0a45d", "#4dc4ff", "#de73ff", "#4cd1e0", "#e6e6e6",
+]
+
+
+def ansi_color(index):
+    # Palette 256 couleurs : 16 de base, cube 6x6x6, puis niveaux de gris
+    if index < 16:
+        return QColor(ANSI_COLORS[index])
+    if index < 232:
+        index -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        return QColor(levels[index // 36], levels[index // 6 % 6], levels[index % 6])
+    gray = 8 + (index - 232) * 10
+    return QColor(gray, gray, gray)
+
+
+class ExecutionConsole(QPlainTextEdit):
+    SCROLLBACK_BLOCKS = 10000
+
+    def __init__(self, max_blocks=SCROLLBACK_BLOCKS):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(max_blocks)
+
+        self.output_format = QTextCharFormat()
+        self.output_format.setForeground(QColor("#00ff00"))
+
+        self.error_format = QTextCharFormat()
+        self.error_format.setForeground(QColor("#ff5555"))
+
+        # Lignes retenues par un filtre « highlight » : noir sur jaune
+        self.highlight_formats = {}
+        for is_error, base in ((False, self.output_format), (True, self.error_format)):
+            fmt = QTextCharFormat(base)
+            fmt.setForeground(QColor(ANSI_COLORS[0]))
+            fmt.setBackground(QColor(ANSI_COLORS[3]))
+            self.highlight_formats[is_error] = fmt
+
+        # Style SGR courant : (premier plan, fond, gras, italique, souligné)
+        self.sgr = (None, None, False, False, False)
+        self.sgr_formats = {}
+        # La dernière ligne affichée se termine par « \r » : elle sera remplacée
+        self.overwrite = False
+
+    def clear(self):
+        super().clear()
+        self.sgr = (None, None, False, False, False)
+        self.overwrite = False
+
+    @timed("console.append_chunk")
+    def append_chunk(self, entries):
+        if not entries:
+            return
+        if MONITOR.enabled:
+            MONITOR.count("lignes", len(entries))
+        if self.overwrite or any("\x1b" in text or text.endswith("\r") or isinstance(text, HighlightedLine)
+                                 for _, text in entries):
+            self.render_chunk(entries)
+            return
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        separator = "" if document.isEmpty() else "\n"
+        start = 0
+        for i in range(1, len(entries) + 1):
+            if i < len(entries) and entries[i][0] == entries[start][0]:
+                continue
+            fmt = self.error_format if entries[start][0] else self.output_format
+            cursor.insertText(separator + "\n".join(text for _, text in entries[start:i]), fmt)
+            separator = "\n"
+            start = i
+        cursor.endEditBlock()
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def render_chunk(self, entries):
+        # Une ligne « \r » suivie d'une autre ligne est invisible : on la saute
+        entries = [entry for entry, following in zip(entries, entries[1:] + [None])
+                   if following is None or not entry[1].endswith("\r")]
+        document = self.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for is_error, text in entries:
+            if self.overwrite:
+                cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+                cursor.removeSelectedText()
+            elif not document.isEmpty():
+                cursor.insertText("\n")
+            self.overwrite = text.endswith("\r")
+            highlight = isinstance(text, HighlightedLine)
+            for segment, fmt in self.ansi_runs(text.rstrip("\r"), is_error, highlight):
+                cursor.insertText(segment, fmt)
+        cursor.endEditBlock()
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+    def ansi_runs(self, text, is_error, highlight=False):
+        kind = (bool(is_error), highlight)
+        start = 0
+        for match in ANSI_PATTERN.finditer(text):
+            if match.start() > start:
+                yield text[start:match.start()], self.sgr_format(kind)
+            if match.group(2) == "m":
+                self.apply_sgr(match.group(1))
+            start = match.end()
+        if start < len(text):
+            yield text[start:], self.sgr_format(kind)
+
+    def apply_sgr(self, params):
+        fg, bg, bold, italic, underline = self.sgr
+        codes = [int(code) if code.isdigit() else 0 for code in params.split(";")]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                fg, bg, bold, italic, underline = None, None, False, False, False
+            elif code == 1:
+                bold = True
+            elif code == 22:
+                bold = False
+            elif code == 3:
+                italic = True
+            elif code == 23:
+                italic = False
+            elif code == 4:
+                underline = True
+            elif code == 24:
+                underline = False
+            elif 30 <= code <= 37 or 90 <= code <= 97:
+                fg = code - 30 if code < 90 else code - 82
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                bg = code - 40 if code < 100 else code - 92
+            elif code == 39:
+                fg = None
+            elif code == 49:
+                bg = None
+            elif code in (38, 48) and i + 1 < len(codes):
+                # 38;5;n (palette) ou 38;2;r;g;b (couleur directe)
+                color = None
+                if codes[i + 1] == 5 and i + 2 < len(codes):
+                    color = codes[i + 2]
+                    i += 2
+                elif codes[i + 1] == 2 and i + 4 < len(codes):
+                    color = tuple(codes[i + 2:i + 5])
+                    i += 4
+                else:
+                    i += 1
+                # Séquence malformée (indice ou composante au-delà de 255) :
+                # ignorée, la couleur courante est conservée
+                if color is not None and max(color if isinstance(color, tuple) else (color,)) <= 255:
+                    if code == 38:
+                        fg = color
+                    else:
+                        bg = color
+            i += 1
+        self.sgr = (fg, bg, bold, italic, underline)
+
+    def sgr_format(self, kind):
+        # kind : (erreur, surlignée) ; les codes SGR du script s'appliquent par-dessus
+        key = (kind, self.sgr)
+        fmt = self.sgr_formats.get(key)
+        if fmt is None:
+            fg, bg, bold, italic, underline = self.sgr
+            is_error, highlight = kind
+            if highlight:
+                base = self.highlight_formats[is_error]
+            else:
+                base = self.error_format if is_error else self.output_format
+            fmt = QTextCharFormat(base)
+            if fg is not None:
+                fmt.setForeground(QColor(*fg) if isinstance(fg, tuple) else ansi_color(fg))
+            if bg is not None:
+                fmt.setBackground(QColor(*bg) if isinstance(bg, tuple) else ansi_color(bg))
+            if bold:
+                fmt.setFontWeight(QFont.Bold)
+            fmt.setFontItalic(italic)
+            fmt.setFontUnderline(underline)
+            self.sgr_formats[key] = fmt
+        return fmt
 
 
 # === Fenêtre principale IDE ===
 class BatchIDE(QMainWindow):
-    def __init__(self, document):
-        super().__init__(document)
+    LINT_DELAY_MS = 400
+    OUTLINE_DELAY_MS = 300
+    FILTER_REFRESH_MS = 250
+    METRICS_REFRESH_MS = 1000
+    # Au-delà, coloration, analyse et index des labels sont désactivés
+    LARGE_FILE_BYTES = 16 * 1024 * 1024
+    SAVE_BATCH_LINES = 4096
+    # Onglets inactifs de plus de UNLOAD_CHARS caractères déchargés, sauf
+    # les KEEP_LOADED derniers utilisés
+    UNLOAD_CHARS = 256 * 1024
+    KEEP_LOADED = 2
+
+    def __init__(self):
+        super().__init__()
         self.setWindowTitle("Batch IDE Pro")
-        self.resize(1000, 700)
+        self.resize(1200, 700)
 
-        # Variables
-        self.current_file = None
-        self.is_modified = False
+        # === Variables ===
+        # Onglets dans l'ordre de la barre, et du plus au moins récemment utilisé
+        self.tabs = []
+        self.recent_tabs = []
+        self.tab = None
+        self.loader = None
+        self.loader_tab = None
+        self.scheduler = None
+        self.profile_tab = None
+        self.profile_source = None
         self.runner = None
+        # Arrêt demandé : le runner reste courant jusqu'à son signal finished
+        self.stopping = False
+        self.run_tab = None
+        self.limits = RunLimits()
+        self.history_tabs = []
+        # Historique et filtres sont chargés après le premier affichage
+        self.history = None
+        self.filters = OutputFilters()
+        # Dialogues construits à la première ouverture puis réutilisés
+        self.search_dialog = None
+        self.history_dialog = None
+        self.folder_search_dialog = None
+        self.benchmark_dialog = None
+        # Résultats du banc d'essai, ouverts au premier usage
+        self.bench_store = None
+        self.deferred_done = False
         self.signals = WorkerSignals()
+        self.samples_visible = True
 
-        # UI setup
+        # === UI Principal ===
         central = QWidget()
         self.setCentralWidget(central)
-        layout = QVBoxLayout()
-        central.setLayout(layout)
+        main_layout = QHBoxLayout()
+        central.setLayout(main_layout)
+
+        # === Liste de scripts exemples à gauche ===
+        self.samples_list = QListWidget()
+        self.samples_list.setMaximumWidth(280)
+        self.samples_list.setFont(QFont("Consolas", 11))
+        self.samples_list.addItems(list(SAMPLES))
+        self.samples_list.itemClicked.connect(self.insert_sample_code)
+
+        # === Plan du script : labels (clic = aller au label) ===
+        self.outline_list = QListWidget()
+        self.outline_list.setMaximumWidth(280)
+        self.outline_list.setFont(QFont("Consolas", 11))
+        self.outline_list.itemClicked.connect(self.goto_item_line)
+
+        left_layout = QVBoxLayout()
+        left_layout.addWidget(self.samples_list)
+        left_layout.addWidget(QLabel("Plan"))
+        left_layout.addWidget(self.outline_list)
+        main_layout.addLayout(left_layout)
 
-        # Editeur
+        # === Zone droite (éditeur + console + input) ===
+        right_layout = QVBoxLayout()
+
+        # Onglets des scripts ouverts, au-dessus de l'éditeur partagé
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.currentChanged.connect(self.tab_selected)
+        self.tab_bar.tabCloseRequested.connect(self.close_tab)
+        right_layout.addWidget(self.tab_bar)
+
+        # Éditeur
         self.editor = QPlainTextEdit()
         self.editor.setFont(QFont("Consolas", 12))
-        self.highlighter = BatchHighlighter(self.editor.document())
-        self.editor.textChanged.connect(self.on_text_changed)
         right_layout.addWidget(self.editor, stretch=3)
 
-        # Console sortie (read-only)
-        self.console = QPlainTextEdit()
-        self.console.setReadOnly(True)
+        # Problèmes détectés par l'analyse (clic = aller à la ligne)
+        self.problems_list = QListWidget()
+        self.problems_list.setMaximumHeight(90)
+        self.problems_list.setFont(QFont("Consolas", 10))
+        self.problems_list.itemClicked.connect(self.goto_item_line)
+        right_layout.addWidget(self.problems_list)
+
+        # Console
+        self.console = ExecutionConsole()
         self.console.setFont(QFont("Consolas", 11))
         self.console.setStyleSheet("background-color:#1e1e1e; color:#d4d4d4;")
-        layout.addWidget(self.console, stretch=1)
+        # Un onglet par script lorsqu'une suite est lancée
+        self.console_tabs = QTabWidget()
+        self.console_tabs.addTab(self.console, "Console")
+        right_layout.addWidget(self.console_tabs, stretch=1)
 
-        # Input ligne commande interactive batch
+        # Ligne de commande interactive
         self.console_input = QLineEdit()
         self.console_input.setFont(QFont("Consolas", 12))
         self.console_input.setPlaceholderText("Tape ta commande batch ici et appuie sur Entrée...")
-        layout.addWidget(self.console_input)
+        self.console_input.returnPressed.connect(self.execute_interactive_command)
+        right_layout.addWidget(self.console_input)
 
-        # Toolbar
+        main_layout.addLayout(right_layout)
+
+        # === Toolbar ===
         toolbar = QToolBar()
         self.addToolBar(toolbar)
 
+        new_act = QAction("📄 Nouveau", self)
+        new_act.setShortcut("Ctrl+N")
+        new_act.triggered.connect(self.new_tab)
+        toolbar.addAction(new_act)
+
         open_act = QAction("📂 Ouvrir", self)
         open_act.triggered.connect(self.open_file)
         toolbar.addAction(open_act)
@@ -332,146 +1143,936 @@ class BatchIDE(QMainWindow):
         run_act.triggered.connect(self.run_batch)
         toolbar.addAction(run_act)
 
+        profile_act = QAction("🔥 Profiler", self)
+        profile_act.setToolTip("Lancer en mesurant le temps passé par ligne et par label")
+        profile_act.triggered.connect(self.profile_batch)
+        toolbar.addAction(profile_act)
+
+        bench_act = QAction("📈 Banc d'essai", self)
+        bench_act.setToolTip("Exécuter le script plusieurs fois et comparer les durées entre versions")
+        bench_act.triggered.connect(self.open_benchmark)
+        toolbar.addAction(bench_act)
+
         stop_act = QAction("⏹️ Stop", self)
         stop_act.triggered.connect(self.stop_batch)
         toolbar.addAction(stop_act)
 
+        # Copie intégrale de la sortie dans <script>.log (la console est bornée)
+        self.log_act = QAction("📜 Journal", self)
+        self.log_act.setCheckable(True)
+        toolbar.addAction(self.log_act)
+
+        history_act = QAction("🕘 Historique", self)
+        history_act.setToolTip("Exécutions précédentes : sorties, durées et comparaison")
+        history_act.triggered.connect(self.open_history)
+        toolbar.addAction(history_act)
+
+        filters_act = QAction("🧹 Filtres", self)
+        filters_act.setToolTip("Filtres et déclencheurs appliqués à la sortie des scripts")
+        filters_act.triggered.connect(self.edit_filters)
+        toolbar.addAction(filters_act)
+
+        limits_act = QAction("⏱️ Limites", self)
+        limits_act.setToolTip("Durée maximale, temps CPU et mémoire des exécutions")
+        limits_act.triggered.connect(self.edit_limits)
+        toolbar.addAction(limits_act)
+
+        restart_shell_act = QAction("🔄 Shell", self)
+        restart_shell_act.setToolTip("Redémarrer la session shell de la ligne interactive")
+        restart_shell_act.triggered.connect(self.restart_shell)
+        toolbar.addAction(restart_shell_act)
+
+        self.metrics_act = QAction("📊 Mesures", self)
+        self.metrics_act.setToolTip("Instrumentation : latence de la boucle, signaux, durées, mémoire")
+        self.metrics_act.setCheckable(True)
+        self.metrics_act.toggled.connect(self.toggle_metrics)
+        toolbar.addAction(self.metrics_act)
+
+        suite_act = QAction("🧪 Suite", self)
+        suite_act.triggered.connect(self.run_suite)
+        toolbar.addAction(suite_act)
+
         toolbar.addSeparator()
 
         search_act = QAction("🔍 Rechercher", self)
         search_act.triggered.connect(self.open_search_dialog)
         toolbar.addAction(search_act)
 
-        # Status bar
+        folder_search_act = QAction("🗂️ Dossier", self)
+        folder_search_act.setToolTip("Rechercher dans tous les scripts d'un dossier (index)")
+        folder_search_act.setShortcut("Ctrl+Shift+F")
+        folder_search_act.triggered.connect(self.open_folder_search)
+        toolbar.addAction(folder_search_act)
+
+        toggle_samples_act = QAction("📁 Exemples", self)
+        toggle_samples_act.triggered.connect(self.toggle_samples)
+        toolbar.addAction(toggle_samples_act)
+
+        goto_label_act = QAction("➡️ Aller au label", self)
+        goto_label_act.setShortcut("F12")
+        goto_label_act.triggered.connect(self.goto_label_definition)
+        toolbar.addAction(goto_label_act)
+
+        # === Status bar ===
         self.status = QStatusBar()
         self.setStatusBar(self.status)
-        self.update_status("Prêt")
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setRange(0, 100)
+        self.load_progress.hide()
+        self.status.addPermanentWidget(self.load_progress)
+        # Compteurs des filtres de sortie, relus périodiquement (les threads
+        # lecteurs ne font qu'incrémenter des entiers)
+        self.filter_label = QLabel()
+        self.status.addPermanentWidget(self.filter_label)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setInterval(self.FILTER_REFRESH_MS)
+        self.filter_timer.timeout.connect(self.refresh_filter_counts)
+        # Mesures d'instrumentation (📊), lien « JSON » pour les exporter
+        self.metrics_label = QLabel()
+        self.metrics_label.setTextFormat(Qt.RichText)
+        self.metrics_label.linkActivated.connect(self.export_metrics)
+        self.metrics_label.hide()
+        self.status.addPermanentWidget(self.metrics_label)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(self.METRICS_REFRESH_MS)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+
+        # === Session shell de la ligne interactive (démarrée à la première commande) ===
+        self.shell_signals = WorkerSignals()
+        self.shell_signals.chunk.connect(self.console.append_chunk)
+        self.shell_signals.finished.connect(self.shell_command_finished)
+        self.shell = ShellSession(self.shell_signals, self.limits.encoding)
 
-        # Connect signals
+        # === Connexion signaux d’exécution ===
         self.signals.output.connect(self.append_output)
         self.signals.error.connect(self.append_error)
+        self.signals.chunk.connect(self.console.append_chunk)
         self.signals.finished.connect(self.execution_finished)
 
-        # Auto-save timer
+        # === Analyse en arrière-plan, relancée après une pause de frappe ===
+        self.lint_generation = 0
+        self.lint_selections = []
+        self.search_selections = []
+        self.profile_selections = []
+        self.analyzer_signals = AnalyzerSignals()
+        self.analyzer_signals.diagnostics.connect(self.show_diagnostics)
+        self.lint_worker = LintWorker(self.analyzer_signals)
+        self.lint_timer = QTimer(self)
+        self.lint_timer.setSingleShot(True)
+        self.lint_timer.setInterval(self.LINT_DELAY_MS)
+        self.lint_timer.timeout.connect(self.start_lint)
+
+        # === Plan rafraîchi peu après les modifications de labels ===
+        self.outline_timer = QTimer(self)
+        self.outline_timer.setSingleShot(True)
+        self.outline_timer.setInterval(self.OUTLINE_DELAY_MS)
+        self.outline_timer.timeout.connect(self.refresh_outline)
+
+        # === Auto-save toutes les 60 secondes (thread + écriture atomique) ===
         self.auto_save_timer = QTimer()
         self.auto_save_timer.timeout.connect(self.auto_save)
-        self.auto_save_timer.start(60000)  # toutes les 60 secondes
 
-        # Input commande batch live
-        self.console_input.returnPressed.connect(self.execute_interactive_command)
-        self.interactive_runner = None
+        self.new_tab()
+        self.update_status("Prêt")
+
+    # === Démarrage : ce qui n'est pas nécessaire au premier affichage ===
+    # Lancé par un timer à zéro posé au premier showEvent : Qt traite les
+    # demandes de peinture en attente avant les timers, la fenêtre est donc
+    # déjà affichée et éditable quand ce travail commence.
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.deferred_done:
+            self.deferred_done = True
+            QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self):
+        self.lint_worker.start()
+        try:
+            self.history = RunHistory()
+        except (OSError, sqlite3.Error) as e:
+            # L'IDE reste utilisable sans historique
+            print(f"Historique désactivé : {e}", file=sys.stderr)
+        self.filters = OutputFilters.load()
+        self.filter_timer.start()
+        self.auto_save_timer.start(60000)
+
+    def toggle_samples(self):
+        self.samples_visible = not self.samples_visible
+        self.samples_list.setVisible(self.samples_visible)
+
+    def insert_sample_code(self, item):
+        self.editor.insertPlainText(SAMPLES[item.text()])
 
     def update_status(self, message):
-        filename = self.current_file if self.current_file else "Sans nom"
-        modif = " (modifié)" if self.is_modified else ""
+        filename = self.tab.current_file if self.tab.current_file else "Sans nom"
+        modif = " (modifié)" if self.tab.is_modified else ""
         self.status.showMessage(f"{filename}{modif} — {message}")
+        self.refresh_tab_title(self.tab)
+
+    # === Onglets ===
+    def new_tab(self):
+        tab = ScriptTab()
+        self.load_document(tab, "")
+        self.add_tab(tab)
+        return tab
+
+    def add_tab(self, tab):
+        self.tabs.append(tab)
+        self.tab_bar.addTab(tab.title())
+        self.tab_bar.setCurrentIndex(len(self.tabs) - 1)
+
+    def find_tab(self, path):
+        path = os.path.abspath(path)
+        for tab in self.tabs:
+            if tab.current_file and os.path.abspath(tab.current_file) == path:
+                return tab
+        return None
+
+    def load_document(self, tab, text):
+        tab.load(text, self.editor.font())
+        # Connexions posées après le chargement : le texte initial n'est
+        # ni une modification ni une entrée du journal
+        tab.document.contentsChanged.connect(lambda tab=tab: self.on_text_changed(tab))
+        tab.document.contentsChange.connect(lambda *args, tab=tab: self.record_edit(tab, *args))
+        tab.label_index.changed.connect(self.outline_timer.start)
+
+    def tab_selected(self, index):
+        if index < 0 or index >= len(self.tabs):
+            return
+        tab = self.tabs[index]
+        if tab is self.tab:
+            return
+        previous = self.tab
+        if previous is not None and previous.document is not None:
+            cursor = self.editor.textCursor()
+            previous.cursor = (cursor.anchor(), cursor.position())
+            previous.scroll = self.editor.verticalScrollBar().value()
+        if tab.document is None:
+            self.load_document(tab, tab.text())
+        self.tab = tab
+        self.editor.setDocument(tab.document)
+        self.editor.setReadOnly(tab is self.loader_tab)
+        end = tab.document.characterCount() - 1
+        cursor = QTextCursor(tab.document)
+        cursor.setPosition(min(tab.cursor[0], end))
+        cursor.setPosition(min(tab.cursor[1], end), QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.verticalScrollBar().setValue(tab.scroll)
+
+        # Surlignages, problèmes et plan visaient le document précédent
+        self.lint_generation += 1
+        self.problems_list.clear()
+        self.lint_selections = []
+        self.search_selections = []
+        self.profile_selections = []
+        self.refresh_extra_selections()
+        self.refresh_outline()
+        self.lint_timer.start()
+        if self.search_dialog is not None:
+            self.search_dialog.document_changed()
+
+        if tab in self.recent_tabs:
+            self.recent_tabs.remove(tab)
+        self.recent_tabs.insert(0, tab)
+        self.unload_inactive_tabs()
+        self.update_status("Prêt")
 
-    def on_text_changed(self):
-        if not self.is_modified:
-            self.is_modified = True
-            self.update_status("Modifié")
-
-    def open_file(self):
-        if self.is_modified:
+    def unload_inactive_tabs(self):
+        large = [tab for tab in self.recent_tabs[1:]
+                 if tab.document is not None and tab is not self.loader_tab
+                 and tab.document.characterCount() > self.UNLOAD_CHARS]
+        for tab in large[self.KEEP_LOADED:]:
+            tab.unload()
+
+    def refresh_tab_title(self, tab):
+        if tab in self.tabs:
+            index = self.tabs.index(tab)
+            self.tab_bar.setTabText(index, tab.title())
+            self.tab_bar.setTabToolTip(index, tab.current_file or "")
+
+    def close_tab(self, index):
+        tab = self.tabs[index]
+        if tab is self.loader_tab:
+            QMessageBox.warning(self, "Attention", "Le fichier est encore en cours de chargement.")
+            return
+        if tab.is_modified:
+            self.tab_bar.setCurrentIndex(index)
             if not self.ask_save_changes():
                 return
+        self.remove_tab(tab)
+
+    def remove_tab(self, tab):
+        self.stop_journal(tab)
+        if len(self.tabs) == 1:
+            self.new_tab()
+        index = self.tabs.index(tab)
+        self.tabs.pop(index)
+        if tab in self.recent_tabs:
+            self.recent_tabs.remove(tab)
+        if tab is self.tab:
+            # L'onglet suivant devient courant avant la suppression
+            self.tab = None
+        self.tab_bar.removeTab(index)
+        if self.tab is None:
+            self.tab_selected(self.tab_bar.currentIndex())
+        if tab.document is not None:
+            tab.release()
+
+    def on_text_changed(self, tab):
+        tab.edits += 1
+        if tab is not self.tab:
+            return
+        self.lint_timer.start()
+        if self.profile_selections:
+            # Les numéros de ligne du profil ne correspondent plus au texte
+            self.profile_selections = []
+            self.refresh_extra_selections()
+        if not tab.is_modified and tab is not self.loader_tab:
+            tab.is_modified = True
+            self.update_status("Modifié")
+
+    def start_lint(self):
+        if self.tab.large_file_mode:
+            return
+        self.lint_generation += 1
+        self.lint_worker.submit(self.lint_generation, self.editor.toPlainText())
+
+    def show_diagnostics(self, generation, diagnostics):
+        if generation != self.lint_generation:
+            return
+        document = self.editor.document()
+        self.problems_list.clear()
+        self.lint_selections = []
+        for number, severity, message in diagnostics:
+            block = document.findBlockByNumber(number)
+            if not block.isValid():
+                continue
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+            selection.format.setUnderlineColor(QColor("#ff5555" if severity == "error" else "#e5c07b"))
+            selection.format.setToolTip(message)
+            selection.cursor = QTextCursor(block)
+            selection.cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            self.lint_selections.append(selection)
+
+            icon = "❌" if severity == "error" else "⚠️"
+            item = QListWidgetItem(f"{icon} Ligne {number + 1} : {message}")
+            item.setData(Qt.UserRole, number)
+            self.problems_list.addItem(item)
+        self.refresh_extra_selections()
+
+    def set_search_selections(self, selections):
+        self.search_selections = selections
+        self.refresh_extra_selections()
+
+    def refresh_extra_selections(self):
+        self.editor.setExtraSelections(self.profile_selections + self.lint_selections + self.search_selections)
+
+    def goto_item_line(self, item):
+        self.goto_line(item.data(Qt.UserRole))
+
+    def goto_line(self, number):
+        block = self.editor.document().findBlockByNumber(number)
+        if block.isValid():
+            self.editor.setTextCursor(QTextCursor(block))
+            self.editor.centerCursor()
+            self.editor.setFocus()
+
+    def refresh_outline(self):
+        self.outline_list.clear()
+        for number, name in self.tab.label_index.labels():
+            item = QListWidgetItem(f":{name}")
+            item.setData(Qt.UserRole, number)
+            self.outline_list.addItem(item)
+
+    def goto_label_definition(self):
+        # Cible du goto / call le plus proche du curseur sur la ligne courante
+        cursor = self.editor.textCursor()
+        column = cursor.positionInBlock()
+        targets = [m for m in JUMP_PATTERN.finditer(cursor.block().text())
+                   if m.group(1).lower() == "goto" or m.group(2)]
+        if not targets:
+            self.update_status("Aucun goto / call :label sur cette ligne")
+            return
+        match = min(targets, key=lambda m: abs(m.start(3) - column))
+        block = self.tab.label_index.lookup(match.group(3))
+        if block is None:
+            self.update_status(f"Label :{match.group(3)} introuvable")
+            return
+        self.goto_line(block.blockNumber())
 
+    def open_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Ouvrir un script batch", filter="Batch Files (*.bat *.cmd);;Tous les fichiers (*.*)")
         if path:
-            try:
+            self.load_file(path)
+
+    @timed("load_file")
+    def load_file(self, path):
+        opened = self.find_tab(path)
+        if opened is not None:
+            self.tab_bar.setCurrentIndex(self.tabs.index(opened))
+            return
+        if self.loader is not None:
+            QMessageBox.warning(self, "Attention", "Un fichier est déjà en cours de chargement.")
+            return
+        try:
+            size = os.path.getsize(path)
+            text = None
+            if size < self.LARGE_FILE_BYTES:
                 with open(path, "r", encoding="utf-8") as f:
                     text = f.read()
-                self.editor.setPlainText(text)
-                self.current_file = path
-                self.is_modified = False
-                self.update_status("Fichier chargé")
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Impossible d’ouvrir le fichier:\n{e}")
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible d’ouvrir le fichier:\n{e}")
+            return
 
+        # Un onglet vierge (celui du démarrage) est remplacé par le fichier
+        blank = self.tab if self.tab.is_blank() else None
+        if text is not None:
+            tab = ScriptTab(path)
+            self.load_document(tab, text)
+            tab.saved_hash = content_hash(text)
+            edits = EditJournal.recover(path, tab.saved_hash)
+            self.start_journal(tab)
+            self.add_tab(tab)
+            if blank is not None:
+                self.remove_tab(blank)
+            self.update_status("Fichier chargé")
+            if edits:
+                self.offer_recovery(edits)
+            return
+
+        # Gros fichier : chargement progressif, éditeur en lecture seule
+        # jusqu'à la fin, sans coloration, pile d'annulation ni journal
+        tab = ScriptTab(path, large_file_mode=True)
+        self.load_document(tab, "")
+        tab.document.setUndoRedoEnabled(False)
+        self.loader_tab = tab
+        self.add_tab(tab)
+        if blank is not None:
+            self.remove_tab(blank)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.update_status("Chargement...")
+        self.loader_signals = LoaderSignals()
+        self.loader_signals.chunk.connect(self.on_load_chunk)
+        self.loader_signals.finished.connect(self.on_load_finished)
+        self.loader = FileLoader(path, self.loader_signals)
+        self.loader_size = max(size, 1)
+        self.loader.start()
+
+    def on_load_chunk(self, text, done):
+        cursor = QTextCursor(self.loader_tab.document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.load_progress.setValue(min(100, done * 100 // self.loader_size))
+        self.loader.credit.release()
+
+    def on_load_finished(self, error):
+        tab, self.loader_tab = self.loader_tab, None
+        self.loader = None
+        self.load_progress.hide()
+        tab.document.setUndoRedoEnabled(True)
+        if tab is self.tab:
+            self.editor.setReadOnly(False)
+        if error:
+            # Un contenu partiel ne doit pas pouvoir écraser le fichier
+            self.remove_tab(tab)
+            QMessageBox.critical(self, "Erreur", f"Impossible d’ouvrir le fichier:\n{error}")
+            return
+        if tab is self.tab:
+            self.update_status("Fichier chargé (mode gros fichier : coloration et analyse désactivées)")
+        self.unload_inactive_tabs()
+
+    def write_document(self, f):
+        # Écrit le document bloc par bloc, par lots de lignes, sans
+        # construire une chaîne de la taille du fichier ; renvoie l'empreinte
+        block = self.editor.document().firstBlock()
+        digest = hashlib.blake2b(digest_size=16)
+        separator = ""
+        batch = []
+        while block.isValid():
+            batch.append(block.text())
+            block = block.next()
+            if len(batch) >= self.SAVE_BATCH_LINES or not block.isValid():
+                chunk = separator + "\n".join(batch)
+                f.write(chunk)
+                digest.update(chunk.encode("utf-8"))
+                separator = "\n"
+                batch = []
+        return digest.hexdigest()
+
+    @timed("save_file")
     def save_file(self):
-        if self.current_file is None:
+        if self.tab.current_file is None:
             self.save_as_file()
             return
+        if self.tab is self.loader_tab:
+            QMessageBox.warning(self, "Attention", "Le fichier est encore en cours de chargement.")
+            return
         try:
-            with open(self.current_file, "w", encoding="utf-8") as f:
-                f.write(self.editor.toPlainText())
-            self.is_modified = False
+            self.tab.saved_hash = atomic_write(self.tab.current_file, self.write_document)
+            self.tab.is_modified = False
+            self.start_journal(self.tab)
             self.update_status("Fichier sauvegardé")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Impossible de sauvegarder le fichier:\n{e}")
 
+    # === Journal de reprise ===
+    def start_journal(self, tab):
+        # (Re)part d'un journal vide dont la base est la dernière sauvegarde
+        self.stop_journal(tab)
+        if tab.current_file and not tab.large_file_mode and tab.saved_hash:
+            tab.journal = EditJournal(tab.current_file, tab.saved_hash)
+
+    def stop_journal(self, tab):
+        if tab.journal is not None:
+            tab.journal.close(discard=True)
+            tab.journal = None
+
+    def record_edit(self, tab, position, removed, added):
+        if tab.journal is None or tab is self.loader_tab:
+            return
+        text = ""
+        if added:
+            # setPlainText annonce un caractère de plus que le document n'en contient
+            document = tab.document
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(min(position + added, document.characterCount() - 1), QTextCursor.KeepAnchor)
+            text = cursor.selectedText().replace("\u2029", "\n")
+        tab.journal.record(position, removed, text)
+
+    def offer_recovery(self, edits):
+        res = QMessageBox.question(
+            self, "Récupération",
+            f"{len(edits)} modification(s) non sauvegardée(s) de ce fichier ont été retrouvées.\nLes restaurer ?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if res != QMessageBox.Yes:
+            return
+        document = self.editor.document()
+        cursor = QTextCursor(document)
+        cursor.beginEditBlock()
+        for position, removed, text in edits:
+            end = document.characterCount() - 1
+            cursor.setPosition(min(position, end))
+            cursor.setPosition(min(position + removed, end), QTextCursor.KeepAnchor)
+            cursor.insertText(text)
+        cursor.endEditBlock()
+        self.update_status("Modifications restaurées")
+
     def save_as_file(self):
         path, _ = QFileDialog.getSaveFileName(self, "Sauvegarder sous", filter="Batch Files (*.bat *.cmd);;Tous les fichiers (*.*)")
         if path:
-            self.current_file = path
+            self.tab.current_file = path
             self.save_file()
 
     def ask_save_changes(self):
         res = QMessageBox.question(self, "Enregistrer les modifications ?", "Le fichier a été modifié. Voulez-vous sauvegarder ?", QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
         if res == QMessageBox.Yes:
             self.save_file()
-            return True
+            return not self.tab.is_modified
         if res == QMessageBox.No:
             return True
         return False
 
+    @timed("append_output")
     def append_output(self, text):
-        self.console.setTextColor(QColor("#00ff00"))
-        self.console.appendPlainText(text)
-        self.console.moveCursor(QTextCursor.End)
+        self.console.append_chunk([(False, text)])
 
     def append_error(self, text):
-        self.console.setTextColor(QColor("#ff5555"))
-        self.console.appendPlainText(text)
-        self.console.moveCursor(QTextCursor.End)
+        self.console.append_chunk([(True, text)])
 
     def execution_finished(self):
-        self.update_status("Exécution terminée")
+        if self.stopping:
+            self.update_status("Exécution arrêtée")
+        else:
+            self.update_status("Exécution terminée")
+            if isinstance(self.runner, ProfileRunner):
+                self.show_profile(self.runner.result())
+            elif isinstance(self.runner, ScriptBenchmark):
+                self.show_benchmark(self.runner)
         self.runner = None
-        self.interactive_runner = None
+        self.stopping = False
 
     def run_batch(self):
+        self.start_run(profile=False)
+
+    def profile_batch(self):
+        self.start_run(profile=True)
+
+    def prepare_run(self):
         if self.runner is not None:
-            QMessageBox.warning(self, "Attention", "Un script est déjà en cours d'exécution.")
-            return
+            message = "Le script précédent est en cours d'arrêt." if self.stopping else "Un script est déjà en cours d'exécution."
+            QMessageBox.warning(self, "Attention", message)
+            return False
 
         code = self.editor.toPlainText().strip()
         if not code:
             QMessageBox.warning(self, "Attention", "Le script batch est vide.")
-            return
+            return False
 
-        if self.current_file is None:
+        if self.tab.current_file is None:
             # Sauvegarde dans un fichier temporaire dans dossier de l’app
             tmp_path = os.path.join(os.path.expanduser("~"), "temp_run.bat")
-            self.current_file = tmp_path
+            self.tab.current_file = tmp_path
 
         self.save_file()
+        self.run_tab = self.tab
+        return True
+
+    def start_run(self, profile):
+        if not self.prepare_run():
+            return
 
         self.console.clear()
+        log_path = None
+        if self.log_act.isChecked():
+            log_path = os.path.splitext(self.tab.current_file)[0] + ".log"
+            self.append_output(f"[INFO] Sortie complète enregistrée dans {log_path}")
         self.update_status("Exécution en cours...")
-        self.runner = BatchRunner(self.current_file, self.signals)
+        if self.limits.describe():
+            self.append_output(f"[INFO] Limites : {self.limits.describe()}")
+        self.filters.reset()
+        if profile:
+            self.runner = ProfileRunner(self.tab.current_file, self.editor.toPlainText(), self.signals,
+                                        log_path, self.limits, self.history, self.filters)
+        else:
+            self.runner = BatchRunner(self.tab.current_file, self.signals, log_path, self.limits, self.history,
+                                      self.filters)
         self.runner.start()
 
+    # === Profil d'exécution : tableaux et carte de chaleur ===
+    PROFILE_ROWS = 50
+
+    def show_profile(self, profile):
+        if self.profile_tab is not None:
+            self.console_tabs.removeTab(self.console_tabs.indexOf(self.profile_tab))
+            self.profile_tab = None
+        self.profile_selections = []
+        if profile is None:
+            self.append_output("[INFO] Profil vide : aucune ligne instrumentée n'a été exécutée.")
+            self.refresh_extra_selections()
+            return
+
+        self.profile_tab = QWidget()
+        layout = QHBoxLayout(self.profile_tab)
+        layout.setContentsMargins(0, 0, 0, 0)
+        labels = [(first, name, elapsed, None) for (first, name), elapsed in profile.hot_labels()]
+        lines = [(line, f"Ligne {line + 1}", elapsed, profile.line_hits[line]) for line, elapsed in profile.hot_lines()]
+        for rows, title in ((labels, "Label"), (lines, "Ligne")):
+            layout.addWidget(self.profile_table(rows, title, profile.total))
+        self.console_tabs.addTab(self.profile_tab, "🔥 Profil")
+        self.console_tabs.setCurrentWidget(self.profile_tab)
+        self.profile_source = self.run_tab
+        if self.tab is not self.run_tab:
+            # La carte de chaleur ne vaut que pour le script profilé
+            self.update_status(f"Profil : {profile.total:.2f} s mesurées sur {len(profile.line_times)} ligne(s)")
+            return
+
+        # Fond des lignes proportionnel à leur part du temps total
+        document = self.editor.document()
+        hottest = max(profile.line_times.values()) or 1.0
+        for line, elapsed in profile.line_times.items():
+            block = document.findBlockByNumber(line)
+            if not block.isValid():
+                continue
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(QColor(255, 85, 0, int(20 + 140 * elapsed / hottest)))
+            selection.format.setProperty(QTextFormat.FullWidthSelection, True)
+            selection.cursor = QTextCursor(block)
+            self.profile_selections.append(selection)
+        self.refresh_extra_selections()
+        self.update_status(f"Profil : {profile.total:.2f} s mesurées sur {len(profile.line_times)} ligne(s)")
+
+    def profile_table(self, rows, title, total):
+        rows = rows[:self.PROFILE_ROWS]
+        table = QTableWidget(len(rows), 4)
+        table.setHorizontalHeaderLabels([title, "Temps cumulé", "%", "Passages"])
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for row, (line, name, elapsed, hits) in enumerate(rows):
+            item = QTableWidgetItem(name)
+            item.setData(Qt.UserRole, line)
+            table.setItem(row, 0, item)
+            table.setItem(row, 1, QTableWidgetItem(f"{elapsed:.3f} s"))
+            table.setItem(row, 2, QTableWidgetItem(f"{100 * elapsed / total:.1f}" if total else "-"))
+            table.setItem(row, 3, QTableWidgetItem("" if hits is None else str(hits)))
+        table.itemDoubleClicked.connect(self.goto_profile_row)
+        return table
+
+    def goto_profile_row(self, item):
+        line = item.tableWidget().item(item.row(), 0).data(Qt.UserRole)
+        if self.profile_source in self.tabs:
+            self.tab_bar.setCurrentIndex(self.tabs.index(self.profile_source))
+        self.goto_line(line)
+
     def stop_batch(self):
-        if self.runner is None and self.interactive_runner is None:
+        if self.runner is None and not self.shell.busy and self.scheduler is None:
             QMessageBox.information(self, "Info", "Aucun script en cours d'exécution.")
             return
-        if self.runner:
+        if self.runner and not self.stopping:
+            # L'arbre de processus peut encore écrire pendant son arrêt (jusqu'à
+            # KILL_GRACE) : le runner reste courant, et sa sortie dans cette
+            # console, jusqu'à son signal finished (execution_finished)
             self.runner.stop()
-            self.runner = None
-        if self.interactive_runner:
-            # Impossible d’arrêter proprement subprocess shell dans ce mode, on ignore
-            self.interactive_runner = None
-        self.update_status("Exécution arrêtée")
+            self.stopping = True
+        if self.scheduler:
+            self.scheduler.stop()
+        if self.shell.busy:
+            # La session est relancée à la prochaine commande
+            self.shell.close()
+        self.update_status("Arrêt en cours..." if self.stopping else "Exécution arrêtée")
+
+    def open_history(self):
+        if self.history is None:
+            QMessageBox.warning(self, "Historique", "L'historique des exécutions est indisponible.")
+            return
+        if self.history_dialog is None:
+            self.history_dialog = HistoryDialog(self.history, self)
+            self.history_dialog.open_output.connect(self.show_history_output)
+        else:
+            self.history_dialog.refresh()
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+        self.history_dialog.activateWindow()
+
+    def show_history_output(self, title, entries):
+        console = ExecutionConsole()
+        console.setFont(QFont("Consolas", 11))
+        console.append_chunk(entries or [(False, "(aucune sortie)")])
+        self.console_tabs.addTab(console, title)
+        self.console_tabs.setCurrentWidget(console)
+        self.history_tabs.append(console)
+        # Seuls les derniers onglets d'historique restent ouverts
+        while len(self.history_tabs) > 4:
+            self.console_tabs.removeTab(self.console_tabs.indexOf(self.history_tabs.pop(0)))
+
+    def edit_filters(self):
+        dialog = OutputFiltersDialog(self.filters, self)
+        if dialog.exec() == QDialog.Accepted:
+            self.filters = dialog.filters()
+            try:
+                self.filters.save()
+            except OSError as e:
+                self.append_error(f"[ERREUR] Filtres non enregistrés: {e}")
+            self.refresh_filter_counts()
+
+    def refresh_filter_counts(self):
+        summary = self.filters.summary()
+        text = f"Filtres : {summary}" if summary else ""
+        if self.filter_label.text() != text:
+            self.filter_label.setText(text)
+
+    def edit_limits(self):
+        dialog = RunLimitsDialog(self.limits, self)
+        if dialog.exec() == QDialog.Accepted:
+            self.limits = dialog.limits()
+            # Pris en compte par la session shell à son prochain démarrage
+            self.shell.encoding = self.limits.encoding
+            self.update_status(f"Limites : {self.limits.describe() or 'aucune'}")
+
+    # === Banc d'essai ===
+    def open_benchmark(self):
+        if self.bench_store is None:
+            try:
+                self.bench_store = BenchmarkStore()
+            except (OSError, sqlite3.Error) as e:
+                QMessageBox.warning(self, "Banc d'essai", f"Résultats indisponibles:\n{e}")
+                return
+        if self.benchmark_dialog is None:
+            self.benchmark_dialog = BenchmarkDialog(self.bench_store, self)
+            self.benchmark_dialog.start_requested.connect(self.start_benchmark)
+        self.benchmark_dialog.set_script(self.tab.current_file)
+        self.benchmark_dialog.show()
+        self.benchmark_dialog.raise_()
+        self.benchmark_dialog.activateWindow()
+
+    def start_benchmark(self, warmup, runs):
+        if not self.prepare_run():
+            return
+        self.console.clear()
+        self.update_status("Banc d'essai en cours...")
+        self.append_output(f"[BENCH] {self.tab.current_file} : {warmup} chauffe(s) puis {runs} mesure(s), sortie ignorée")
+        if self.limits.describe():
+            self.append_output(f"[INFO] Limites : {self.limits.describe()}")
+        self.runner = ScriptBenchmark(self.tab.current_file, self.signals, warmup, runs, self.limits, self.bench_store)
+        self.benchmark_dialog.set_script(self.tab.current_file)
+        self.runner.start()
+
+    def show_benchmark(self, bench):
+        if not bench.times:
+            return
+        stats = timing_stats(bench.times)
+        self.append_output(
+            f"[BENCH] {stats['runs']} mesure(s) : min {format_duration(stats['min'])}"
+            f" · médiane {format_duration(stats['median'])} · p95 {format_duration(stats['p95'])}"
+            f" · écart-type {format_duration(stats['stddev'])}"
+        )
+        self.append_output(f"[BENCH] Codes de sortie : {exit_code_summary(bench.exit_codes)}")
+        if bench.bench_id is None:
+            return
+        dialog = self.benchmark_dialog
+        dialog.refresh()
+        # Comparaison automatique avec la dernière autre version mesurée
+        for script_hash, _, _, times, _ in dialog.versions:
+            if script_hash != bench.script_hash:
+                verdict = format_comparison(compare_timings(times, bench.times))
+                self.append_output(f"[BENCH] Par rapport à la version {script_hash[:8]} : {verdict}")
+                dialog.compare(script_hash, bench.script_hash)
+                break
+
+    # === Suite de scripts ===
+    def run_suite(self):
+        if self.scheduler is not None:
+            QMessageBox.warning(self, "Attention", "Une suite est déjà en cours d'exécution.")
+            return
+        paths, _ = QFileDialog.getOpenFileNames(self, "Scripts à exécuter", filter="Batch Files (*.bat *.cmd);;Tous les fichiers (*.*)")
+        if not paths:
+            return
+        workers, ok = QInputDialog.getInt(self, "Suite", "Scripts en parallèle :", min(len(paths), os.cpu_count() or 4), 1, 64)
+        if ok:
+            self.start_suite(paths, workers)
+
+    def start_suite(self, paths, workers):
+        # Les onglets de la suite précédente sont remplacés
+        while self.console_tabs.count() > 1:
+            self.console_tabs.removeTab(1)
+
+        self.filters.reset()
+        self.scheduler = JobScheduler(paths, workers, self.limits, self.history, self.filters)
+        self.scheduler.job_started.connect(self.suite_job_started)
+        self.scheduler.job_finished.connect(self.suite_job_finished)
+        self.scheduler.all_finished.connect(self.suite_finished)
+
+        self.suite_table = QTableWidget(len(paths), 3)
+        self.suite_table.setHorizontalHeaderLabels(["Script", "Code de sortie", "Durée"])
+        self.suite_table.horizontalHeader().setStretchLastSection(True)
+        self.suite_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.suite_rows = {}
+        for row, job in enumerate(self.scheduler.jobs):
+            self.suite_rows[job] = row
+            self.suite_table.setItem(row, 0, QTableWidgetItem(job.path))
+            self.suite_table.setItem(row, 1, QTableWidgetItem("en attente"))
+            self.suite_table.setItem(row, 2, QTableWidgetItem(""))
+            job.console.setFont(QFont("Consolas", 11))
+            self.console_tabs.addTab(job.console, f"⏳ {os.path.basename(job.path)}")
+        self.console_tabs.insertTab(1, self.suite_table, "Résumé")
+
+        self.update_status(f"Suite : {len(paths)} script(s), {workers} en parallèle")
+        self.scheduler.start()
+
+    def suite_job_started(self, job):
+        self.suite_table.item(self.suite_rows[job], 1).setText("en cours")
+        self.console_tabs.setTabText(self.console_tabs.indexOf(job.console), f"▶️ {os.path.basename(job.path)}")
+
+    def suite_job_finished(self, job):
+        row = self.suite_rows[job]
+        code = "?" if job.returncode is None else str(job.returncode)
+        if job.runner.timed_out:
+            code += " (délai dépassé)"
+        self.suite_table.item(row, 1).setText(code)
+        self.suite_table.item(row, 2).setText(f"{job.elapsed:.2f} s")
+        icon = "✅" if job.returncode == 0 else "❌"
+        self.console_tabs.setTabText(self.console_tabs.indexOf(job.console), f"{icon} {os.path.basename(job.path)}")
+
+    def suite_finished(self):
+        scheduler, self.scheduler = self.scheduler, None
+        failed = sum(1 for job in scheduler.jobs if job.returncode != 0)
+        self.console_tabs.setCurrentWidget(self.suite_table)
+        self.update_status(f"Suite terminée en {scheduler.elapsed:.2f} s : "
+                           f"{len(scheduler.jobs) - failed} réussi(s), {failed} échec(s)")
 
     def open_search_dialog(self):
-        dialog = SearchReplaceDialog(self.editor, self)
-        dialog.show()
+        if self.search_dialog is None:
+            self.search_dialog = SearchReplaceDialog(self.editor, self)
+            self.search_dialog.highlight.connect(self.set_search_selections)
+        self.search_dialog.show()
+        self.search_dialog.raise_()
+        self.search_dialog.activateWindow()
+
+    # === Instrumentation ===
+    def toggle_metrics(self, enabled):
+        if enabled:
+            MONITOR.start()
+            self.metrics_timer.start()
+            self.refresh_metrics()
+        else:
+            MONITOR.stop()
+            self.metrics_timer.stop()
+        self.metrics_label.setVisible(enabled)
+
+    def refresh_metrics(self):
+        MONITOR.update_rates()
+        lag = MONITOR.lag_stats()
+        rss = process_rss()
+        memory = f" · RSS {rss / 2**20:.0f} Mo" if rss is not None else ""
+        self.metrics_label.setText(
+            f"📊 boucle {lag['last_ms']:.0f} ms (p95 {lag['p95_ms']:.0f}, max {lag['max_ms']:.0f})"
+            f" · {MONITOR.rates.get('lignes', 0):.0f} lignes/s · {MONITOR.rates.get('signaux', 0):.0f} signaux/s"
+            f"{memory} · <a href='json' style='color:#61afef'>JSON</a>"
+        )
+        lines = [f"{name} : {calls} appel(s), {total * 1000:.0f} ms (max {longest * 1000:.1f} ms)"
+                 for name, (calls, total, longest) in sorted(MONITOR.timings.items())]
+        self.metrics_label.setToolTip("\n".join(lines) or "Aucune durée mesurée")
+
+    def export_metrics(self, link=None):
+        name = time.strftime("batchide-metrics-%Y%m%d-%H%M%S.json")
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter les mesures", name, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(MONITOR.snapshot(), f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            QMessageBox.critical(self, "Erreur", f"Impossible d'exporter les mesures:\n{e}")
+            return
+        self.update_status(f"Mesures exportées dans {path}")
+
+    def open_folder_search(self):
+        if self.folder_search_dialog is None:
+            folder = os.path.dirname(self.tab.current_file) if self.tab.current_file else os.getcwd()
+            self.folder_search_dialog = FolderSearchDialog(folder, self)
+            self.folder_search_dialog.open_location.connect(self.open_location)
+        self.folder_search_dialog.show()
+        self.folder_search_dialog.raise_()
+        self.folder_search_dialog.activateWindow()
+
+    def open_location(self, path, line):
+        self.load_file(path)
+        if self.find_tab(path) is self.tab and self.tab is not self.loader_tab:
+            self.goto_line(line)
 
     def auto_save(self):
-        if self.is_modified and self.current_file:
-            self.save_file()
-            self.update_status("Auto-sauvegarde effectuée")
+        # Tous les onglets modifiés, y compris ceux déchargés (instantané)
+        for tab in self.tabs:
+            if not (tab.is_modified and tab.current_file) or tab is self.loader_tab or tab.saver is not None:
+                continue
+            checkpoint = tab.journal.checkpoint() if tab.journal is not None else 0
+            tab.save_revision = tab.edits
+            signals = SaveSignals()
+            signals.finished.connect(lambda *args, tab=tab: self.auto_save_finished(tab, *args))
+            tab.saver = AutoSaver(tab.current_file, tab.text(), checkpoint, tab.saved_hash, signals)
+            tab.saver.start()
+
+    def auto_save_finished(self, tab, checkpoint, digest, written, error):
+        saver, tab.saver = tab.saver, None
+        if error:
+            self.update_status(f"Échec de l'auto-sauvegarde de {saver.path} : {error}")
+            return
+        if saver.path != tab.current_file or tab not in self.tabs:
+            return
+        tab.saved_hash = digest
+        if tab.edits == tab.save_revision:
+            # Rien n'a changé depuis l'instantané : le journal repart de zéro
+            tab.is_modified = False
+            self.start_journal(tab)
+        elif tab.journal is not None:
+            tab.journal.resolve(checkpoint, digest)
+        self.refresh_tab_title(tab)
+        if tab is self.tab:
+            self.update_status("Auto-sauvegarde effectuée" if written else "Auto-sauvegarde : contenu inchangé")
 
     def execute_interactive_command(self):
         cmd = self.console_input.text().strip()
@@ -480,21 +2081,58 @@ class BatchIDE(QMainWindow):
         self.append_output(f"> {cmd}")
         self.console_input.clear()
 
-        if self.interactive_runner is not None:
+        if self.shell.busy:
             QMessageBox.warning(self, "Attention", "Une commande est déjà en cours d'exécution.")
             return
 
-        self.interactive_runner = InteractiveBatchRunner(cmd, self.signals)
-        self.interactive_runner.start()
+        self.update_status("Commande en cours...")
+        try:
+            self.shell.execute(cmd)
+        except OSError as e:
+            self.append_error(f"[ERREUR] Exception: {e}")
+
+    def shell_command_finished(self):
+        code = self.shell.last_exit_code
+        self.update_status("Commande terminée" if code is None else f"Commande terminée (code {code})")
+
+    def restart_shell(self):
+        self.shell.close()
+        self.append_output("[INFO] Session shell redémarrée.")
+        try:
+            self.shell.start()
+        except OSError as e:
+            self.append_error(f"[ERREUR] Exception: {e}")
 
 
 # === Fenêtre Recherche / Remplacement ===
+# Les modes texte, mot entier et expression régulière partagent un même
+# motif Python. La recherche se fait pendant la frappe : seules les lignes
+# visibles sont analysées pour surligner les occurrences, la liste complète
+# n'est calculée qu'au besoin (suivant / précédent, compteur) et gardée en
+# cache par requête tant que le document ne change pas. En mode texte, une
+# requête qui prolonge la précédente filtre simplement ses positions.
+# « Tout remplacer » calcule toutes les correspondances en un passage sur un
+# instantané du texte, puis applique le résultat en une seule modification.
+class SearchSignals(QObject):
+    # (génération, nombre d'occurrences)
+    count_ready = Signal(int, int)
+
+
 class SearchReplaceDialog(QDialog):
+    COUNT_DELAY_MS = 250
+    COUNT_THREAD_CHARS = 500_000
+    VIEWPORT_DELAY_MS = 100
+    MAX_VISIBLE_MATCHES = 2000
+    CACHE_SIZE = 32
+
+    # Surlignage des occurrences visibles, réclamé par la fenêtre principale
+    highlight = Signal(list)
+
     def __init__(self, editor, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Rechercher / Remplacer")
         self.editor = editor
-        self.resize(400, 120)
+        self.resize(400, 150)
 
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -515,11 +2153,20 @@ class SearchReplaceDialog(QDialog):
         layout.addLayout(hlayout3)
         self.case_checkbox = QCheckBox("Respecter la casse")
         hlayout3.addWidget(self.case_checkbox)
+        self.word_checkbox = QCheckBox("Mot entier")
+        hlayout3.addWidget(self.word_checkbox)
+        self.regex_checkbox = QCheckBox("Expression régulière")
+        hlayout3.addWidget(self.regex_checkbox)
         hlayout3.addStretch()
+        self.count_label = QLabel("")
+        hlayout3.addWidget(self.count_label)
 
         hlayout4 = QHBoxLayout()
         layout.addLayout(hlayout4)
-        btn_search = QPushButton("Rechercher")
+        btn_previous = QPushButton("Précédent")
+        btn_previous.clicked.connect(self.search_previous)
+        hlayout4.addWidget(btn_previous)
+        btn_search = QPushButton("Suivant")
         btn_search.clicked.connect(self.search)
         hlayout4.addWidget(btn_search)
         btn_replace = QPushButton("Remplacer")
@@ -529,49 +2176,889 @@ class SearchReplaceDialog(QDialog):
         btn_replace_all.clicked.connect(self.replace_all)
         hlayout4.addWidget(btn_replace_all)
 
-    def search(self):
+        self.match_format = QTextCharFormat()
+        self.match_format.setBackground(QColor("#614d1a"))
+        self.current_format = QTextCharFormat()
+        self.current_format.setBackground(QColor("#e5c07b"))
+        self.current_format.setForeground(QColor("#282c34"))
+
+        # === Cache des résultats par requête ===
+        self._revision = None
+        self._snapshot = None
+        self._cache = {}
+        self._last_literal = None
+        self._current = None
+        self.origin = editor.textCursor().selectionStart()
+
+        # === Compteur d'occurrences (relancé après une pause de frappe) ===
+        self.count_generation = 0
+        self.signals = SearchSignals()
+        self.signals.count_ready.connect(self.show_count)
+        self.count_timer = QTimer(self)
+        self.count_timer.setSingleShot(True)
+        self.count_timer.setInterval(self.COUNT_DELAY_MS)
+        self.count_timer.timeout.connect(self.update_count)
+
+        # === Surlignage des lignes visibles ===
+        self.viewport_timer = QTimer(self)
+        self.viewport_timer.setSingleShot(True)
+        self.viewport_timer.setInterval(self.VIEWPORT_DELAY_MS)
+        self.viewport_timer.timeout.connect(self.highlight_viewport)
+        editor.verticalScrollBar().valueChanged.connect(self.viewport_timer.start)
+        editor.document().contentsChanged.connect(self.viewport_timer.start, Qt.UniqueConnection)
+
+        self.search_input.textChanged.connect(self.on_query_changed)
+        for checkbox in (self.case_checkbox, self.word_checkbox, self.regex_checkbox):
+            checkbox.toggled.connect(self.on_query_changed)
+
+    def pattern(self):
+        # Motif compilé, ou None si la recherche est vide ou le motif invalide
         text = self.search_input.text()
         if not text:
-            return
-        flags = Qt.CaseSensitive if self.case_checkbox.isChecked() else Qt.CaseInsensitive
-        cursor = self.editor.textCursor()
-        document = self.editor.document()
-        pos = cursor.position()
-        found = document.find(text, pos, flags)
-        if found.isNull():
-            # Recherche depuis le début
-            found = document.find(text, 0, flags)
+            return None
+        source = text if self.regex_checkbox.isChecked() else re.escape(text)
+        if self.word_checkbox.isChecked():
+            source = rf"\b(?:{source})\b"
+        flags = 0 if self.case_checkbox.isChecked() else re.IGNORECASE
+        try:
+            return re.compile(source, flags | re.MULTILINE)
+        except re.error as e:
+            self.count_label.setText(f"Motif invalide : {e}")
+            return None
+
+    def replacement(self, pattern):
+        # En mode regex, \1 ou \g<nom> renvoient aux groupes capturés ; None
+        # si le modèle est invalide (groupe inexistant, « \ » final...), vérifié
+        # avant toute modification du document
+        text = self.replace_input.text()
+        if not self.regex_checkbox.isChecked():
+            return lambda match: text
+        try:
+            pattern.sub(text, "")
+        except (re.error, IndexError) as e:
+            self.count_label.setText(f"Remplacement invalide : {e}")
+            return None
+        return lambda match: match.expand(text)
+
+    def query_key(self):
+        return (self.search_input.text(), self.case_checkbox.isChecked(),
+                self.word_checkbox.isChecked(), self.regex_checkbox.isChecked())
+
+    def snapshot(self):
+        # Texte du document, relu seulement s'il a changé (vide alors le cache)
+        revision = self.editor.document().revision()
+        if revision != self._revision:
+            self._revision = revision
+            self._snapshot = self.editor.toPlainText()
+            self._cache.clear()
+            self._last_literal = None
+        return self._snapshot
+
+    def results(self):
+        # Toutes les correspondances (positions Qt) de la requête courante
+        pattern = self.pattern()
+        if pattern is None:
+            return []
+        snapshot = self.snapshot()
+        key = self.query_key()
+        if key in self._cache:
+            return self._cache[key]
+
+        text, case, word, regex = key
+        if regex:
+            spans = [match.span() for match in pattern.finditer(snapshot)]
+        else:
+            # Débuts de toutes les occurrences du texte, chevauchantes comprises
+            # et sans la contrainte « mot entier », réutilisables par la
+            # requête suivante : « aab » dans « aaab » commence à un début de
+            # « aa » que finditer aurait sauté
+            flags = 0 if case else re.IGNORECASE
+            literal = re.compile(re.escape(text), flags)
+            previous = self._last_literal
+            if previous is not None and previous[1] == case and text.startswith(previous[0]):
+                starts = [p for p in previous[2] if literal.match(snapshot, p)]
+            else:
+                starts = [match.start() for match in re.finditer(f"(?={re.escape(text)})", snapshot, flags)]
+            self._last_literal = (text, case, starts)
+            spans = []
+            end = 0
+            for p in starts:
+                match = pattern.match(snapshot, p)
+                if match and p >= end:
+                    spans.append(match.span())
+                    end = match.end()
+
+        spans = utf16_spans(snapshot, spans)
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = spans
+        return spans
+
+    def on_query_changed(self):
+        # Recherche pendant la frappe : saut à la première occurrence après
+        # la position de départ, sans calculer la liste complète
+        self._current = None
+        pattern = self.pattern()
+        if pattern is not None:
+            found = self.editor.document().find(self.qt_expression(pattern), self.origin)
             if found.isNull():
+                found = self.editor.document().find(self.qt_expression(pattern), 0)
+            if not found.isNull():
+                self.editor.setTextCursor(found)
+        elif not self.search_input.text():
+            self.origin = self.editor.textCursor().selectionStart()
+        self.highlight_viewport()
+        self.count_timer.start()
+
+    @staticmethod
+    def qt_expression(pattern):
+        options = QRegularExpression.MultilineOption
+        if pattern.flags & re.IGNORECASE:
+            options |= QRegularExpression.CaseInsensitiveOption
+        return QRegularExpression(pattern.pattern, options)
+
+    def highlight_viewport(self):
+        if not self.isVisible():
+            return
+        pattern = self.pattern()
+        selections = []
+        if pattern is not None:
+            current = self.editor.textCursor()
+            current_span = (current.selectionStart(), current.selectionEnd())
+            height = self.editor.viewport().height()
+            offset = self.editor.contentOffset()
+            block = self.editor.firstVisibleBlock()
+            while block.isValid() and len(selections) < self.MAX_VISIBLE_MATCHES:
+                if self.editor.blockBoundingGeometry(block).translated(offset).top() > height:
+                    break
+                text = block.text()
+                offsets = utf16_offsets(text)
+                for match in pattern.finditer(text):
+                    start, end = match.span()
+                    if start == end:
+                        continue
+                    if offsets is not None:
+                        start, end = offsets[start], offsets[end]
+                    selection = QTextEdit.ExtraSelection()
+                    selection.cursor = QTextCursor(self.editor.document())
+                    selection.cursor.setPosition(block.position() + start)
+                    selection.cursor.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+                    span = (block.position() + start, block.position() + end)
+                    selection.format = self.current_format if span == current_span else self.match_format
+                    selections.append(selection)
+                block = block.next()
+        self.highlight.emit(selections)
+
+    def showEvent(self, event):
+        # Dialogue réutilisé : la recherche repart de la position actuelle
+        super().showEvent(event)
+        self.origin = self.editor.textCursor().selectionStart()
+        self.search_input.setFocus()
+        self.search_input.selectAll()
+        self.highlight_viewport()
+
+    def hideEvent(self, event):
+        self.highlight.emit([])
+        super().hideEvent(event)
+
+    def document_changed(self):
+        # Changement d'onglet : le cache et la position de départ visaient
+        # l'ancien document
+        self._revision = None
+        self._snapshot = None
+        self._cache.clear()
+        self._last_literal = None
+        self._current = None
+        self.editor.document().contentsChanged.connect(self.viewport_timer.start, Qt.UniqueConnection)
+        self.origin = self.editor.textCursor().selectionStart()
+        if self.isVisible():
+            self.highlight_viewport()
+            self.count_timer.start()
+
+    def step(self, forward):
+        # Suivant / précédent : une recherche dichotomique au premier appel,
+        # puis un simple déplacement d'indice dans la liste en cache
+        spans = self.results()
+        if not spans:
+            if self.pattern() is not None:
                 QMessageBox.information(self, "Recherche", "Texte non trouvé.")
-                return
-        self.editor.setTextCursor(found)
+            return
+        cursor = self.editor.textCursor()
+        if self._current is not None and self._current < len(spans) \
+                and spans[self._current] == (cursor.selectionStart(), cursor.selectionEnd()):
+            index = self._current + (1 if forward else -1)
+        elif forward:
+            index = bisect.bisect_left(spans, (cursor.selectionEnd(), -1))
+        else:
+            index = bisect.bisect_left(spans, (cursor.selectionStart(), -1)) - 1
+        self._current = index % len(spans)
+        start, end = spans[self._current]
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.count_label.setText(f"{self._current + 1} / {len(spans)}")
+        self.highlight_viewport()
+
+    def search(self):
+        self.step(True)
+
+    def search_previous(self):
+        self.step(False)
 
     def replace(self):
         cursor = self.editor.textCursor()
-        if cursor.hasSelection():
+        if not cursor.hasSelection():
+            return
+        pattern = self.pattern()
+        selected = cursor.selectedText()
+        match = pattern.fullmatch(selected) if pattern is not None else None
+        if match is None:
             cursor.insertText(self.replace_input.text())
+            return
+        replace = self.replacement(pattern)
+        if replace is not None:
+            cursor.insertText(replace(match))
 
     def replace_all(self):
-        text = self.search_input.text()
-        replace_text = self.replace_input.text()
-        if not text:
+        pattern = self.pattern()
+        if pattern is None:
+            return
+        replace = self.replacement(pattern)
+        if replace is None:
+            return
+        snapshot = self.snapshot()
+        matches = list(pattern.finditer(snapshot))
+        if not matches:
+            self.count_label.setText("0 occurrence")
+            return
+
+        # Le texte remplacé, de la première à la dernière correspondance, est
+        # construit une fois (comme re.subn, mais sans relancer la recherche)
+        # puis inséré en un seul appel : une seule modification du document,
+        # une seule étape d'annulation.
+        first, last = matches[0].start(), matches[-1].end()
+        pieces = []
+        position = first
+        for match in matches:
+            pieces.append(snapshot[position:match.start()])
+            pieces.append(replace(match))
+            position = match.end()
+        (start, end), = utf16_spans(snapshot, [(first, last)])
+
+        bar = self.editor.verticalScrollBar()
+        scroll = bar.value()
+        cursor = QTextCursor(self.editor.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText("".join(pieces))
+        bar.setValue(scroll)
+        self.count_label.setText(f"{len(matches)} remplacement(s)")
+
+    def update_count(self):
+        self.count_generation += 1
+        pattern = self.pattern()
+        if pattern is None:
+            if not self.search_input.text():
+                self.count_label.setText("")
             return
-        flags = Qt.CaseSensitive if self.case_checkbox.isChecked() else Qt.CaseInsensitive
         document = self.editor.document()
-        cursor = self.editor.textCursor()
-        cursor.beginEditBlock()
-        pos = 0
-        while True:
-            found = document.find(text, pos, flags)
-            if found.isNull():
-                break
-            found.insertText(replace_text)
-            pos = found.position()
-        cursor.endEditBlock()
+        generation = self.count_generation
+        if self.query_key() in self._cache or document.characterCount() < self.COUNT_THREAD_CHARS:
+            self.show_count(generation, len(self.results()))
+            return
+        self.count_label.setText("Comptage...")
+        snapshot = self.snapshot()
+        threading.Thread(
+            target=lambda: self.signals.count_ready.emit(generation, sum(1 for _ in pattern.finditer(snapshot))),
+            daemon=True
+        ).start()
+
+    def show_count(self, generation, count):
+        if generation == self.count_generation:
+            self.count_label.setText(f"{count} occurrence(s)")
+
+
+# === Recherche dans un dossier ===
+# L'index (SearchIndex) est ouvert et mis à jour par un thread à chaque
+# ouverture du dialogue et au changement de dossier ; seuls les fichiers
+# modifiés depuis la dernière fois sont relus. Chaque requête est menée par
+# son propre thread, qui transmet les résultats par paquets au fil de la
+# lecture des fichiers candidats et s'arrête dès qu'une requête plus récente
+# est lancée.
+class FolderSearchSignals(QObject):
+    # message d'état de l'index
+    status = Signal(str)
+    # index ouvert et à jour (SearchIndex)
+    ready = Signal(object)
+    # (génération, [(chemin, ligne, texte), ...])
+    results = Signal(int, list)
+    # (génération, durée en secondes)
+    finished = Signal(int, float)
+
+
+class IndexUpdater(threading.Thread):
+    def __init__(self, folder, index, signals):
+        super().__init__(daemon=True)
+        self.folder = folder
+        self.index = index
+        self.signals = signals
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            index = self.index
+            if index is None or index.folder != os.path.abspath(self.folder):
+                self.signals.status.emit("Ouverture de l'index...")
+                index = SearchIndex(self.folder)
+            changed, removed = index.update(
+                lambda done, total: self.signals.status.emit(f"Indexation : {done} / {total} fichier(s)")
+            )
+        except (OSError, sqlite3.Error) as e:
+            self.signals.status.emit(f"Index indisponible : {e}")
+            return
+        self.signals.ready.emit(index)
+        self.signals.status.emit(f"{len(index.files)} script(s) indexé(s) — {changed} mis à jour, "
+                                 f"{removed} retiré(s) en {time.perf_counter() - started:.2f} s")
+
+
+class FolderSearch(threading.Thread):
+    def __init__(self, index, generation, query, case_sensitive, whole_word, signals):
+        super().__init__(daemon=True)
+        self.index = index
+        self.generation = generation
+        self.query = (query, case_sensitive, whole_word)
+        self.signals = signals
+        self.cancelled = False
+
+    def run(self):
+        started = time.perf_counter()
+        batches = self.index.search(*self.query)
+        try:
+            for batch in batches:
+                if self.cancelled:
+                    return
+                self.signals.results.emit(self.generation, batch)
+        except OSError:
+            pass
+        finally:
+            batches.close()
+        self.signals.finished.emit(self.generation, time.perf_counter() - started)
+
+
+class FolderSearchDialog(QDialog):
+    SEARCH_DELAY_MS = 300
+
+    # (chemin, numéro de ligne) du résultat choisi
+    open_location = Signal(str, int)
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Rechercher dans un dossier")
+        self.resize(760, 480)
+        layout = QVBoxLayout(self)
+
+        folder_row = QHBoxLayout()
+        layout.addLayout(folder_row)
+        folder_row.addWidget(QLabel("Dossier :"))
+        self.folder_input = QLineEdit(folder)
+        self.folder_input.setReadOnly(True)
+        folder_row.addWidget(self.folder_input)
+        btn_folder = QPushButton("Choisir...")
+        btn_folder.clicked.connect(self.choose_folder)
+        folder_row.addWidget(btn_folder)
+        btn_reindex = QPushButton("Réindexer")
+        btn_reindex.clicked.connect(self.update_index)
+        folder_row.addWidget(btn_reindex)
+
+        query_row = QHBoxLayout()
+        layout.addLayout(query_row)
+        query_row.addWidget(QLabel("Rechercher :"))
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Variable, label, commande...")
+        query_row.addWidget(self.query_input)
+        self.case_checkbox = QCheckBox("Respecter la casse")
+        query_row.addWidget(self.case_checkbox)
+        self.word_checkbox = QCheckBox("Mot entier")
+        query_row.addWidget(self.word_checkbox)
+
+        self.results_list = QListWidget()
+        self.results_list.setFont(QFont("Consolas", 10))
+        self.results_list.itemActivated.connect(self.open_item)
+        self.results_list.itemClicked.connect(self.open_item)
+        layout.addWidget(self.results_list)
+
+        status_row = QHBoxLayout()
+        layout.addLayout(status_row)
+        self.index_label = QLabel("")
+        status_row.addWidget(self.index_label)
+        status_row.addStretch()
+        self.count_label = QLabel("")
+        status_row.addWidget(self.count_label)
+
+        self.index = None
+        self.updater = None
+        self.search_thread = None
+        self.generation = 0
+        self.result_count = 0
+        self.signals = FolderSearchSignals()
+        self.signals.status.connect(self.index_label.setText)
+        self.signals.ready.connect(self.index_ready)
+        self.signals.results.connect(self.show_results)
+        self.signals.finished.connect(self.search_finished)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.start_search)
+        self.query_input.textChanged.connect(self.search_timer.start)
+        self.query_input.returnPressed.connect(self.start_search)
+        for checkbox in (self.case_checkbox, self.word_checkbox):
+            checkbox.toggled.connect(self.start_search)
+
+    def showEvent(self, event):
+        # Dialogue réutilisé : l'index est remis à jour à chaque ouverture
+        super().showEvent(event)
+        self.query_input.setFocus()
+        self.query_input.selectAll()
+        self.update_index()
+
+    def choose_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Dossier à indexer", self.folder_input.text())
+        if folder:
+            self.folder_input.setText(folder)
+            self.update_index()
+
+    def update_index(self):
+        if self.updater is not None and self.updater.is_alive():
+            return
+        self.updater = IndexUpdater(self.folder_input.text(), self.index, self.signals)
+        self.updater.start()
+
+    def index_ready(self, index):
+        if index.folder != os.path.abspath(self.folder_input.text()):
+            # Dossier changé pendant la mise à jour : on recommence
+            self.update_index()
+            return
+        self.index = index
+        self.start_search()
+
+    def start_search(self):
+        self.search_timer.stop()
+        if self.search_thread is not None:
+            self.search_thread.cancelled = True
+            self.search_thread = None
+        self.generation += 1
+        self.results_list.clear()
+        self.result_count = 0
+        query = self.query_input.text()
+        if not query or self.index is None:
+            self.count_label.setText("" if self.index is not None or not query else "Index en préparation...")
+            return
+        self.count_label.setText("Recherche...")
+        self.search_thread = FolderSearch(self.index, self.generation, query, self.case_checkbox.isChecked(),
+                                          self.word_checkbox.isChecked(), self.signals)
+        self.search_thread.start()
+
+    def show_results(self, generation, batch):
+        if generation != self.generation:
+            return
+        for path, line, text in batch:
+            item = QListWidgetItem(f"{os.path.relpath(path, self.index.folder)}:{line + 1}: {text.strip()}")
+            item.setData(Qt.UserRole, path)
+            item.setData(Qt.UserRole + 1, line)
+            self.results_list.addItem(item)
+        self.result_count += len(batch)
+
+    def search_finished(self, generation, elapsed):
+        if generation != self.generation:
+            return
+        limit = " (limite atteinte)" if self.result_count >= SearchIndex.MAX_RESULTS else ""
+        self.count_label.setText(f"{self.result_count} résultat(s){limit} en {elapsed * 1000:.1f} ms")
+
+    def open_item(self, item):
+        self.open_location.emit(item.data(Qt.UserRole), item.data(Qt.UserRole + 1))
+
+
+# === Profil de démarrage (--startup-profile) ===
+# Jalons horodatés depuis le lancement du processus Python ; le premier
+# affichage est détecté par un filtre d'événements sur la fenêtre. Le
+# rapport est écrit sur stderr une fois l'initialisation différée passée ;
+# la session continue normalement, sauf avec --exit (mesures répétées).
+class StartupProfile(QObject):
+    def __init__(self, started, exit_after=False):
+        super().__init__()
+        self.marks = [("lancement", started)]
+        self.exit_after = exit_after
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter()))
+
+    def watch(self, window):
+        self.window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and obj is self.window:
+            obj.removeEventFilter(self)
+            self.mark("premier affichage")
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def report(self):
+        if not self.window.deferred_done:
+            QTimer.singleShot(10, self.report)
+            return
+        self.mark("initialisation différée")
+        previous = self.marks[0][1]
+        for name, at in self.marks[1:]:
+            print(f"{name:<26} {(at - previous) * 1000:8.1f} ms", file=sys.stderr)
+            previous = at
+        print(f"{'total':<26} {(previous - self.marks[0][1]) * 1000:8.1f} ms", file=sys.stderr)
+        if self.exit_after:
+            QApplication.quit()
+
+
+# === Historique des exécutions ===
+# La colonne « Tendance » compare la durée d'une exécution réussie à la
+# médiane des exécutions réussies précédentes du même script (jusqu'à
+# TREND_RUNS) : un script devenu 3x plus lent apparaît en « ×3.0 ».
+class HistoryDialog(QDialog):
+    open_output = Signal(str, list)
+    TREND_RUNS = 5
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.setWindowTitle("Historique des exécutions")
+        self.resize(900, 450)
+        layout = QVBoxLayout(self)
+
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filtrer par chemin de script...")
+        self.filter_input.textChanged.connect(self.refresh)
+        layout.addWidget(self.filter_input)
+
+        self.table = QTableWidget(0, 6)
+        self.table.setHorizontalHeaderLabels(["Date", "Script", "Durée", "Tendance", "Code", "Lignes"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.itemDoubleClicked.connect(self.show_selected)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        show_btn = QPushButton("Afficher la sortie")
+        show_btn.clicked.connect(self.show_selected)
+        compare_btn = QPushButton("Comparer (2 exécutions)")
+        compare_btn.clicked.connect(self.compare_selected)
+        buttons.addWidget(show_btn)
+        buttons.addWidget(compare_btn)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        rows = self.history.runs(self.filter_input.text())
+        # Médiane glissante, du plus ancien au plus récent
+        trends = {}
+        previous = {}
+        for run_id, script, _, _, duration, code, _ in reversed(rows):
+            durations = previous.setdefault(script, deque(maxlen=self.TREND_RUNS))
+            if code == 0 and duration is not None:
+                if durations:
+                    baseline = sorted(durations)[len(durations) // 2]
+                    trends[run_id] = duration / baseline if baseline > 0 else None
+                durations.append(duration)
+
+        self.table.setRowCount(len(rows))
+        for row, (run_id, script, script_hash, started, duration, code, lines) in enumerate(rows):
+            date = QTableWidgetItem(time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(started)))
+            date.setData(Qt.UserRole, run_id)
+            self.table.setItem(row, 0, date)
+            name = QTableWidgetItem(os.path.basename(script))
+            name.setToolTip(f"{script}\nempreinte {script_hash}")
+            self.table.setItem(row, 1, name)
+            self.table.setItem(row, 2, QTableWidgetItem("" if duration is None else f"{duration:.2f} s"))
+            trend = trends.get(run_id)
+            self.table.setItem(row, 3, QTableWidgetItem("" if trend is None else f"×{trend:.1f}"))
+            self.table.setItem(row, 4, QTableWidgetItem("?" if code is None else str(code)))
+            self.table.setItem(row, 5, QTableWidgetItem(str(lines or 0)))
+
+    def selected_runs(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        return [self.table.item(row, 0).data(Qt.UserRole) for row in rows]
+
+    def show_selected(self, *args):
+        for run_id in self.selected_runs()[:1]:
+            self.open_output.emit(f"🕘 #{run_id}", self.history.output(run_id))
+
+    def compare_selected(self):
+        runs = self.selected_runs()
+        if len(runs) != 2:
+            QMessageBox.information(self, "Comparer", "Sélectionne exactement deux exécutions.")
+            return
+        new_id, old_id = sorted(runs, reverse=True)
+        self.open_output.emit(f"🕘 #{old_id} ↔ #{new_id}", self.history.diff(old_id, new_id))
+
+
+# === Banc d'essai ===
+# Réglages (chauffe, mesures) et versions mesurées du script courant, une
+# ligne par empreinte de contenu, durées de toutes les sessions cumulées.
+# Deux versions sélectionnées se comparent côte à côte, la plus ancienne
+# servant de référence ; le verdict vient du test de Mann-Whitney (engine).
+def format_duration(seconds):
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.3f} s"
+
+
+def format_comparison(comparison):
+    icon = "⚪"
+    if comparison["significant"]:
+        icon = "🟢" if comparison["verdict"] == "plus rapide" else "🔴"
+    ratio = "" if comparison["ratio"] is None else f" ×{comparison['ratio']:.2f}"
+    p_value = "" if comparison["p_value"] is None else f" (p = {comparison['p_value']:.3f})"
+    return f"{icon} {comparison['verdict']}{ratio}{p_value}"
+
+
+class BenchmarkDialog(QDialog):
+    start_requested = Signal(int, int)
+    STATS = [("Mesures", "runs"), ("Min", "min"), ("Médiane", "median"), ("P95", "p95"),
+             ("Moyenne", "mean"), ("Écart-type", "stddev")]
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.script = None
+        self.versions = []
+        self.setWindowTitle("Banc d'essai")
+        self.resize(900, 550)
+        layout = QVBoxLayout(self)
+
+        settings = QHBoxLayout()
+        self.warmup_spin = QSpinBox()
+        self.warmup_spin.setRange(0, 100)
+        self.warmup_spin.setValue(1)
+        self.warmup_spin.setToolTip("Exécutions lancées avant les mesures, non comptées")
+        self.runs_spin = QSpinBox()
+        self.runs_spin.setRange(1, 1000)
+        self.runs_spin.setValue(10)
+        self.run_btn = QPushButton("▶️ Lancer")
+        self.run_btn.clicked.connect(
+            lambda: self.start_requested.emit(self.warmup_spin.value(), self.runs_spin.value()))
+        settings.addWidget(QLabel("Chauffe :"))
+        settings.addWidget(self.warmup_spin)
+        settings.addWidget(QLabel("Mesures :"))
+        settings.addWidget(self.runs_spin)
+        settings.addStretch()
+        settings.addWidget(self.run_btn)
+        layout.addLayout(settings)
+
+        self.script_label = QLabel()
+        layout.addWidget(self.script_label)
+
+        self.table = QTableWidget(0, 4 + len(self.STATS))
+        self.table.setHorizontalHeaderLabels(["Version", "Dernière mesure", "Sessions"]
+                                             + [name for name, _ in self.STATS] + ["Codes"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.table, stretch=2)
+
+        compare_btn = QPushButton("Comparer (2 versions)")
+        compare_btn.clicked.connect(self.compare_selected)
+        layout.addWidget(compare_btn)
+
+        self.compare_table = QTableWidget(len(self.STATS), 3)
+        self.compare_table.setVerticalHeaderLabels([name for name, _ in self.STATS])
+        self.compare_table.setHorizontalHeaderLabels(["Référence", "Nouvelle", "Rapport"])
+        self.compare_table.horizontalHeader().setStretchLastSection(True)
+        self.compare_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.compare_table, stretch=1)
+        self.verdict_label = QLabel()
+        layout.addWidget(self.verdict_label)
+
+    def set_script(self, path):
+        self.script = os.path.abspath(path) if path else None
+        self.script_label.setText(self.script or "Script non enregistré : il le sera au lancement")
+        self.refresh()
+
+    def refresh(self):
+        try:
+            self.versions = self.store.versions(self.script) if self.script else []
+        except sqlite3.Error as e:
+            self.versions = []
+            self.script_label.setText(f"Résultats indisponibles : {e}")
+        current = file_hash(self.script) if self.script else ""
+        self.table.setRowCount(len(self.versions))
+        for row, (script_hash, started, sessions, times, codes) in enumerate(self.versions):
+            version = QTableWidgetItem(script_hash[:8] + (" (actuelle)" if script_hash == current else ""))
+            version.setToolTip(f"empreinte {script_hash}")
+            self.table.setItem(row, 0, version)
+            self.table.setItem(row, 1, QTableWidgetItem(time.strftime("%d/%m/%Y %H:%M:%S", time.localtime(started))))
+            self.table.setItem(row, 2, QTableWidgetItem(str(sessions)))
+            stats = timing_stats(times)
+            for column, (_, key) in enumerate(self.STATS, 3):
+                value = str(stats[key]) if key == "runs" else format_duration(stats[key])
+                self.table.setItem(row, column, QTableWidgetItem(value))
+            self.table.setItem(row, 3 + len(self.STATS), QTableWidgetItem(exit_code_summary(codes)))
+
+    def compare_selected(self):
+        rows = sorted({index.row() for index in self.table.selectedIndexes()})
+        if len(rows) != 2:
+            QMessageBox.information(self, "Comparer", "Sélectionne exactement deux versions.")
+            return
+        # Les versions sont listées de la plus récente à la plus ancienne
+        self.compare(self.versions[rows[1]][0], self.versions[rows[0]][0])
+
+    def compare(self, old_hash, new_hash):
+        versions = {version[0]: version for version in self.versions}
+        if old_hash not in versions or new_hash not in versions:
+            return
+        old, new = versions[old_hash][3], versions[new_hash][3]
+        self.compare_table.setHorizontalHeaderLabels([f"Référence {old_hash[:8]}", f"Nouvelle {new_hash[:8]}", "Rapport"])
+        old_stats, new_stats = timing_stats(old), timing_stats(new)
+        for row, (_, key) in enumerate(self.STATS):
+            if key == "runs":
+                cells = [str(old_stats[key]), str(new_stats[key]), ""]
+            else:
+                ratio = new_stats[key] / old_stats[key] if old_stats[key] > 0 else None
+                cells = [format_duration(old_stats[key]), format_duration(new_stats[key]),
+                         "" if ratio is None else f"×{ratio:.2f}"]
+            for column, text in enumerate(cells):
+                self.compare_table.setItem(row, column, QTableWidgetItem(text))
+        self.verdict_label.setText(format_comparison(compare_timings(old, new)))
+
+
+# === Dialogue des filtres de sortie ===
+class OutputFiltersDialog(QDialog):
+    ACTION_LABELS = {
+        "include": "Garder seulement",
+        "exclude": "Masquer",
+        "highlight": "Surligner",
+        "stop": "Arrêter l'exécution",
+    }
+
+    def __init__(self, filters, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Filtres de sortie")
+        self.resize(560, 320)
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels(["Expression régulière", "Action"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setColumnWidth(0, 320)
+        layout.addWidget(self.table)
+        for flt in filters.filters:
+            self.add_row(flt.pattern, flt.action)
+
+        row_buttons = QHBoxLayout()
+        add_btn = QPushButton("Ajouter")
+        add_btn.clicked.connect(self.add_row)
+        remove_btn = QPushButton("Supprimer")
+        remove_btn.clicked.connect(self.remove_row)
+        row_buttons.addWidget(add_btn)
+        row_buttons.addWidget(remove_btn)
+        layout.addLayout(row_buttons)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.validate)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def add_row(self, pattern="", action="highlight"):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(pattern or ""))
+        combo = QComboBox()
+        for key in FILTER_ACTIONS:
+            combo.addItem(self.ACTION_LABELS[key], key)
+        combo.setCurrentIndex(FILTER_ACTIONS.index(action if action in FILTER_ACTIONS else "highlight"))
+        self.table.setCellWidget(row, 1, combo)
+
+    def remove_row(self):
+        row = self.table.currentRow()
+        if row >= 0:
+            self.table.removeRow(row)
+
+    def rows(self):
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            pattern = item.text() if item is not None else ""
+            if pattern:
+                yield row, pattern, self.table.cellWidget(row, 1).currentData()
+
+    def validate(self):
+        for row, pattern, _ in self.rows():
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                QMessageBox.warning(self, "Filtres", f"Ligne {row + 1} : expression invalide ({e})")
+                return
+        self.accept()
+
+    def filters(self):
+        return OutputFilters(OutputFilter(pattern, action) for _, pattern, action in self.rows())
+
+
+# === Dialogue des limites d’exécution ===
+class RunLimitsDialog(QDialog):
+    def __init__(self, limits, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Limites d’exécution")
+        layout = QFormLayout(self)
+
+        self.timeout_spin = self.spin_box(limits.timeout, 86400, " s")
+        self.cpu_spin = self.spin_box(limits.cpu_seconds, 86400, " s")
+        self.memory_spin = self.spin_box(limits.memory_mb, 1024 * 1024, " Mo")
+        layout.addRow("Durée maximale :", self.timeout_spin)
+        layout.addRow("Temps CPU :", self.cpu_spin)
+        layout.addRow("Mémoire :", self.memory_spin)
+        self.encoding_combo = QComboBox()
+        self.encoding_combo.setEditable(True)
+        self.encoding_combo.addItems(OUTPUT_ENCODINGS)
+        self.encoding_combo.setCurrentText(limits.encoding)
+        self.encoding_combo.setToolTip(f"auto : UTF-8, sinon {FALLBACK_ENCODING}")
+        layout.addRow("Encodage de la sortie :", self.encoding_combo)
+        if resource is None:
+            # Les rlimits n'existent pas sous Windows
+            self.cpu_spin.setEnabled(False)
+            self.memory_spin.setEnabled(False)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def accept(self):
+        encoding = self.encoding_combo.currentText().strip() or "auto"
+        if encoding != "auto":
+            try:
+                codecs.lookup(encoding)
+            except LookupError:
+                QMessageBox.warning(self, "Encodage", f"Encodage inconnu : {encoding}")
+                return
+        super().accept()
+
+    def spin_box(self, value, maximum, suffix):
+        spin = QSpinBox()
+        spin.setRange(0, maximum)
+        spin.setSuffix(suffix)
+        spin.setSpecialValueText("aucune")
+        spin.setValue(value or 0)
+        return spin
+
+    def limits(self):
+        return RunLimits(self.timeout_spin.value(), self.cpu_spin.value(), self.memory_spin.value(),
+                         self.encoding_combo.currentText().strip() or "auto")
 
 
 if __name__ == "__main__":
+    startup = StartupProfile(STARTED, "--exit" in sys.argv[1:]) if "--startup-profile" in sys.argv[1:] else None
+    if startup:
+        startup.mark("imports")
     app = QApplication(sys.argv)
+    if startup:
+        startup.mark("QApplication")
     app.setStyleSheet("""
         /* Fenêtre principale */
         QMainWindow {
@@ -655,6 +3142,15 @@ if __name__ == "__main__":
             color: #282c34;
         }
     """)
+    if startup:
+        startup.mark("feuille de style")
     window = BatchIDE()
+    if startup:
+        startup.mark("construction fenêtre")
+        startup.watch(window)
+    if "--metrics" in sys.argv[1:]:
+        window.metrics_act.setChecked(True)
     window.show()
+    if startup:
+        startup.mark("show()")
     sys.exit(app.exec())
@@ -0,0 +1,16 @@
+# === Configuration commune des tests ===
+# Les tests importent engine / main depuis la racine du dépôt ; les tests
+# d'interface tournent sans affichage (plateforme Qt « offscreen »).
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    widgets = pytest.importorskip("PySide6.QtWidgets")
+    return widgets.QApplication.instance() or widgets.QApplication([])
@@ -0,0 +1,56 @@
+# === Analyse statique (BatchAnalyzer) ===
+from engine import BatchAnalyzer
+
+SCRIPT = """:start
+goto end
+call :sub
+call prog.exe
+:unused
+(
+echo )
+)
+)
+goto :eof
+:sub
+:start
+rem goto nowhere ^
+goto nowhere2"""
+
+
+def messages(text, analyzer=None):
+    return [(line, severity, message) for line, severity, message in (analyzer or BatchAnalyzer()).analyze(text)]
+
+
+def test_diagnostics():
+    assert messages(SCRIPT) == [
+        (0, "warning", "Label :start jamais utilisé"),
+        (1, "error", "goto vers un label inexistant :end"),
+        (4, "warning", "Label :unused jamais utilisé"),
+        (7, "error", "« ) » sans « ( » correspondante"),
+        (8, "error", "« ) » sans « ( » correspondante"),
+        (11, "warning", "Label :start déjà défini ligne 1"),
+    ]
+
+
+def test_unclosed_parenthesis():
+    assert messages("if 1==1 (\necho a") == [(0, "error", "« ( » non refermée")]
+
+
+def test_parentheses_in_strings_and_escapes_are_ignored():
+    assert messages('echo "(" ^(\necho done') == []
+
+
+def test_dynamic_goto_disables_unused_warnings():
+    assert messages("goto %TARGET%\n:a") == []
+
+
+def test_labels_are_case_insensitive():
+    assert messages(":Build\ngoto BUILD") == []
+
+
+def test_cache_gives_same_result_as_fresh_analysis():
+    analyzer = BatchAnalyzer()
+    analyzer.analyze(SCRIPT)
+    edited = SCRIPT.replace("goto end", "goto sub")
+    assert messages(edited, analyzer) == messages(edited)
+    assert messages(SCRIPT, analyzer) == messages(SCRIPT)
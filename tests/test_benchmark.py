@@ -0,0 +1,97 @@
+# === Banc d'essai et comparaison des durées ===
+import os
+import stat
+
+import pytest
+
+from engine import (BenchmarkStore, RunSignals, ScriptBenchmark, compare_timings, exit_code_summary,
+                    mann_whitney, timing_stats)
+
+
+def test_mann_whitney_known_value():
+    assert mann_whitney([1, 2, 3, 4], [5, 6, 7, 8]) == pytest.approx(0.0304, abs=1e-4)
+    # Symétrique
+    assert mann_whitney([5, 6, 7, 8], [1, 2, 3, 4]) == pytest.approx(mann_whitney([1, 2, 3, 4], [5, 6, 7, 8]))
+
+
+def test_mann_whitney_no_difference():
+    assert mann_whitney([1, 2, 3], [1, 2, 3]) == 1.0
+    # Toutes les mesures égales : variance nulle
+    assert mann_whitney([2, 2, 2], [2, 2]) == 1.0
+
+
+def test_mann_whitney_ties_and_outlier():
+    # Une seule exécution aberrante ne renverse pas le test des rangs
+    assert mann_whitney([1.0, 1.1, 1.2, 1.3, 1.4], [1.5, 1.6, 1.7, 1.8, 90.0]) < 0.05
+    assert 0 < mann_whitney([1, 1, 2, 2], [2, 2, 3, 3]) < 1
+
+
+@pytest.mark.parametrize("old, new, verdict, significant", [
+    ([1.0], [2.0, 2.1], "trop peu de mesures", False),
+    ([1.0, 1.1, 1.2, 1.3], [2.0, 2.1, 2.2, 2.3], "plus lent", True),
+    ([2.0, 2.1, 2.2, 2.3], [1.0, 1.1, 1.2, 1.3], "plus rapide", True),
+    ([1.0, 2.0, 3.0], [1.5, 2.5, 3.5], "pas de différence significative", False),
+    ([1.0, 1.1], [2.0, 2.1], "pas de différence significative", False),
+])
+def test_compare_timings(old, new, verdict, significant):
+    result = compare_timings(old, new)
+    assert result["verdict"] == verdict
+    assert result["significant"] is significant
+
+
+def test_compare_timings_ratio():
+    result = compare_timings([1.0, 2.0, 3.0], [4.0, 4.0, 4.0])
+    assert result["ratio"] == pytest.approx(2.0)
+    assert compare_timings([0.0, 0.0], [1.0, 1.0])["ratio"] is None
+
+
+def test_timing_stats():
+    stats = timing_stats([float(i) for i in range(10, 0, -1)])
+    assert stats["runs"] == 10 and stats["min"] == 1.0
+    assert stats["median"] == 5.5 and stats["mean"] == 5.5
+    # Rang le plus proche : 10 mesures → la plus lente, 20 → la 19e
+    assert stats["p95"] == 10.0
+    assert timing_stats(list(range(1, 21)))["p95"] == 19
+    single = timing_stats([0.5])
+    assert single["p95"] == 0.5 and single["stddev"] == 0.0
+
+
+def test_exit_code_summary():
+    assert exit_code_summary([0, 1, 0, None, 0]) == "0 ×3, 1 ×1, ? ×1"
+
+
+def test_store_pools_sessions_by_hash(tmp_path, monkeypatch):
+    store = BenchmarkStore(str(tmp_path / "bench.sqlite3"))
+    store.record("/s/a.bat", "v1", 1, 1, [1.0, 1.1], [0, 0])
+    store.record("/s/a.bat", "v2", 2, 1, [2.0], [1])
+    store.record("/s/a.bat", "v1", 3, 1, [1.2], [0])
+    store.record("/s/b.bat", "v1", 4, 1, [9.0], [0])
+    versions = store.versions("/s/a.bat")
+    assert versions == [("v1", 3, 2, [1.2, 1.0, 1.1], [0, 0, 0]), ("v2", 2, 1, [2.0], [1])]
+    monkeypatch.setattr(BenchmarkStore, "MAX_SESSIONS_PER_SCRIPT", 2)
+    store.record("/s/a.bat", "v3", 5, 1, [3.0], [0])
+    assert [entry[0] for entry in store.versions("/s/a.bat")] == ["v3", "v1"]
+    assert store.versions("/s/b.bat") == [("v1", 4, 1, [9.0], [0])]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="script shell POSIX")
+def test_script_benchmark(tmp_path):
+    script = tmp_path / "court.sh"
+    script.write_text("#!/bin/sh\necho sortie\necho erreur >&2\nexit 3\n")
+    script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    signals = RunSignals()
+    messages, finished = [], []
+    signals.output.connect(messages.append)
+    signals.error.connect(messages.append)
+    signals.finished.connect(lambda: finished.append(True))
+    store = BenchmarkStore(str(tmp_path / "bench.sqlite3"))
+    bench = ScriptBenchmark(str(script), signals, warmup=1, runs=3, store=store)
+    bench.run()
+    assert finished == [True]
+    assert bench.complete() and len(bench.times) == 3
+    assert bench.exit_codes == [3, 3, 3]
+    assert sum("chauffe 1/1" in message for message in messages) == 1
+    assert sum("code 3" in message for message in messages) == 4
+    assert "    erreur" in messages
+    (entry,) = store.versions(str(script))
+    assert entry[0] == bench.script_hash and entry[2:] == (1, bench.times, [3, 3, 3])
@@ -0,0 +1,89 @@
+# === Décodage et découpage de la sortie ===
+import random
+
+import pytest
+
+import engine
+from engine import StreamDecoder, is_partial, split_lines
+
+TEXT = "Démarrage — état : 100 % ✓ 𝄞 fin\n"
+
+
+def decode_chunks(decoder, data, cuts):
+    pieces, start = [], 0
+    for cut in cuts:
+        pieces.append(decoder.decode(data[start:cut]))
+        start = cut
+    pieces.append(decoder.decode(data[start:], final=True))
+    return "".join(pieces)
+
+
+@pytest.mark.parametrize("encoding", ["auto", "utf-8"])
+def test_utf8_split_at_every_offset(encoding):
+    data = TEXT.encode("utf-8")
+    for cut in range(len(data) + 1):
+        decoder = StreamDecoder(encoding)
+        assert decode_chunks(decoder, data, [cut]) == TEXT
+        assert decoder.encoding == "utf-8"
+
+
+def test_utf8_byte_by_byte():
+    data = TEXT.encode("utf-8")
+    assert decode_chunks(StreamDecoder(), data, range(1, len(data))) == TEXT
+
+
+def test_auto_falls_back_and_keeps_valid_prefix():
+    fallback = engine.FALLBACK_ENCODING
+    data = "déjà ".encode("utf-8") + "été\n".encode(fallback)
+    for cut in range(len(data) + 1):
+        decoder = StreamDecoder()
+        assert decode_chunks(decoder, data, [cut]) == "déjà été\n"
+        assert decoder.encoding == fallback
+
+
+def test_fallback_is_definitive():
+    fallback = engine.FALLBACK_ENCODING
+    decoder = StreamDecoder()
+    assert decoder.decode("ét".encode(fallback)) == "ét"
+    # Une fois basculé, même de l'UTF-8 valide est lu en page de repli
+    assert decoder.decode("é".encode("utf-8"), final=True) == "é".encode("utf-8").decode(fallback)
+
+
+def test_fixed_encoding_replaces_invalid_bytes():
+    assert StreamDecoder("utf-8").decode(b"a\xffb", final=True) == "a�b"
+    assert StreamDecoder("cp850").decode(b"\x82t\x82", final=True) == "été"
+
+
+@pytest.mark.parametrize("text, lines, rest", [
+    ("", [], ""),
+    ("a\nb", ["a"], "b"),
+    ("a\r\nb\r\n", ["a", "b"], ""),
+    ("fin  \t\n", ["fin"], ""),
+    ("10%\r20%\r30%\n", ["10%\r", "20%\r", "30%"], ""),
+    ("10% \r20%", ["10%\r"], "20%"),
+    ("attente\r", [], "attente\r"),
+    ("a\rb\r", ["a\r"], "b\r"),
+    ("\r\n", [""], ""),
+])
+def test_split_lines(text, lines, rest):
+    assert split_lines(text) == (lines, rest)
+
+
+def test_split_lines_incremental_matches_whole():
+    rng = random.Random(4)
+    text = "".join(rng.choice(["a", "b", " ", "\r", "\n", "\r\n"]) for _ in range(400))
+    expected = split_lines(text)
+    for _ in range(50):
+        lines, rest = [], ""
+        cuts = sorted(rng.sample(range(len(text)), 20))
+        for start, end in zip([0] + cuts, cuts + [len(text)]):
+            chunk, rest = split_lines(rest + text[start:end])
+            lines.extend(chunk)
+        assert (lines, rest) == expected
+
+
+def test_is_partial():
+    assert is_partial((False, "50%\r"))
+    assert is_partial((True, "\r"))
+    assert not is_partial((False, "fin"))
+    assert not is_partial((False, ""))
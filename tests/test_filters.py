@@ -0,0 +1,68 @@
+# === Filtres de sortie (OutputFilters / FilteredOutput) ===
+import io
+
+from engine import OutputFilter, OutputFilters, FilteredOutput, OutputBuffer, HighlightedLine
+
+
+class Recorder:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text, is_error=False):
+        self.lines.append((is_error, text))
+
+
+def filtered(*filters):
+    stops = []
+    recorder = Recorder()
+    output_filters = OutputFilters([OutputFilter(pattern, action) for pattern, action in filters])
+    return FilteredOutput(recorder, output_filters, stops.append), recorder, output_filters, stops
+
+
+def test_highlight_keeps_text_and_flags_line():
+    sink, recorder, filters, _ = filtered(("warn", "highlight"))
+    sink.output("warning: disk")
+    sink.output("ok")
+    (_, first), (_, second) = recorder.lines
+    assert first == "warning: disk" and isinstance(first, HighlightedLine)
+    assert not isinstance(second, HighlightedLine)
+    assert filters.hits == [1]
+
+
+def test_partial_lines_skip_filters():
+    sink, recorder, filters, stops = filtered(("prompt", "highlight"), ("prompt", "stop"))
+    sink.output("prompt>\r")
+    assert stops == [] and filters.hits == [0, 0]
+    assert not isinstance(recorder.lines[0][1], HighlightedLine)
+    sink.output("prompt> done")
+    assert filters.hits == [1, 1] and len(stops) == 1
+
+
+def test_hidden_line_erases_its_partial():
+    sink, recorder, filters, _ = filtered(("secret", "exclude"))
+    sink.output("secret>\r")
+    sink.output("secret> done")
+    sink.output("visible")
+    assert recorder.lines == [(False, "secret>\r"), (False, "\r"), (False, "visible")]
+    assert filters.hidden == 1
+
+
+def test_include_and_exclude():
+    sink, recorder, filters, _ = filtered(("error|warn", "include"), ("ignored", "exclude"))
+    for line in ["error 1", "info", "warn ignored", "warn 2"]:
+        sink.output(line)
+    assert [text for _, text in recorder.lines] == ["error 1", "warn 2"]
+    assert filters.hidden == 2
+    assert "masquées 2" in filters.summary()
+
+
+def test_log_skips_partial_lines():
+    log = io.StringIO()
+    sent = []
+    buffer = OutputBuffer(sent.extend, log)
+    buffer.output("prompt>\r")
+    buffer.flush()
+    buffer.output("prompt> done")
+    buffer.close()
+    assert log.getvalue() == "prompt> done\n"
+    assert sent == [(False, "prompt>\r"), (False, "prompt> done")]
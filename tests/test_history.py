@@ -0,0 +1,61 @@
+# === Historique des exécutions (RunHistory) ===
+import pytest
+
+from engine import RunHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RunHistory(str(tmp_path / "history.sqlite3"))
+
+
+def record(history, script, started, entries=(), code=0):
+    return history.record(script, "hash", started, 1.0, code, list(entries), len(entries))
+
+
+def test_output_round_trip(history):
+    run_id = record(history, "/s/a.bat", 1, [(False, "out"), (True, "err")])
+    assert history.output(run_id) == [(False, "out"), (True, "err")]
+    assert history.output(run_id + 1) == []
+
+
+def test_runs_newest_first(history):
+    for started in (1, 3, 2):
+        record(history, "/s/a.bat", started)
+    assert [row[3] for row in history.runs()] == [3, 2, 1]
+
+
+def test_retention_per_script(history, monkeypatch):
+    monkeypatch.setattr(RunHistory, "MAX_RUNS_PER_SCRIPT", 3)
+    for started in range(5):
+        record(history, "/s/a.bat", started)
+    record(history, "/s/b.bat", 10)
+    assert [row[3] for row in history.runs("a.bat")] == [4, 3, 2]
+    assert len(history.runs("b.bat")) == 1
+
+
+def test_global_retention(history, monkeypatch):
+    monkeypatch.setattr(RunHistory, "MAX_RUNS", 4)
+    for started in range(6):
+        record(history, f"/s/{started}.bat", started)
+    assert [row[3] for row in history.runs()] == [5, 4, 3, 2]
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("a_b", ["/x/a_b.bat"]),
+    ("100%", ["/x/100%.bat"]),
+    ("\\x\\", ["C:\\x\\c.bat"]),
+    ("", ["C:\\x\\c.bat", "/x/1000.bat", "/x/100%.bat", "/x/axb.bat", "/x/a_b.bat"]),
+])
+def test_path_filter_is_literal(history, pattern, expected):
+    for started, script in enumerate(["/x/a_b.bat", "/x/axb.bat", "/x/100%.bat", "/x/1000.bat", "C:\\x\\c.bat"]):
+        record(history, script, started)
+    assert [row[1] for row in history.runs(pattern)] == expected
+
+
+def test_diff_marks_removed_lines_as_errors(history):
+    old = record(history, "/s/a.bat", 1, [(False, "same"), (False, "old")])
+    new = record(history, "/s/a.bat", 2, [(False, "same"), (False, "new")])
+    entries = history.diff(old, new)
+    assert (True, "-old") in entries and (False, "+new") in entries
+    assert (False, " same") in entries
@@ -0,0 +1,53 @@
+# === Lexer batch (tokenize) ===
+import pytest
+
+from engine import tokenize, MAX_LEX_CHARS
+
+
+def kinds(text, in_comment=False):
+    return [(kind, text[start:end]) for kind, start, end in tokenize(text, in_comment)]
+
+
+def test_token_classes():
+    line = 'echo %PATH% !X! %%i "a %B% c" > out.txt 2>&1 ^& goto :end'
+    assert kinds(line) == [
+        ("keyword", "echo"), ("variable", "%PATH%"), ("delayed", "!X!"), ("loopvar", "%%i"),
+        ("string", '"a %B% c"'), ("variable", "%B%"), ("redirect", ">"), ("redirect", "2>&1"),
+        ("escape", "^&"), ("keyword", "goto"), ("label", ":end"),
+    ]
+
+
+@pytest.mark.parametrize("line", ["rem hello", "REM", "  :: note", "rem echo %X%"])
+def test_comment_is_a_single_token(line):
+    assert tokenize(line) == [("comment", 0, len(line))]
+
+
+def test_label_definition():
+    assert kinds("  :build_all") == [("label", "  :build_all")]
+
+
+def test_continued_comment_state():
+    assert tokenize("echo not code", in_comment=True) == [("comment", 0, 13)]
+
+
+def test_keywords_are_case_insensitive_whole_words():
+    assert kinds("ECHO echoes") == [("keyword", "ECHO")]
+
+
+def test_long_lines_are_capped():
+    line = "x" * MAX_LEX_CHARS + " echo %A%"
+    assert tokenize(line) == []
+    assert all(end <= MAX_LEX_CHARS for _, _, end in tokenize("echo " * 2000))
+
+
+def test_highlighter_propagates_comment_continuation(qapp):
+    from PySide6.QtGui import QTextDocument
+    from main import BatchHighlighter
+
+    document = QTextDocument()
+    highlighter = BatchHighlighter(document)
+    document.setPlainText("rem suite ^\necho encore commentaire\necho code")
+    highlighter.rehighlight()
+    states = [document.findBlockByNumber(i).userState() for i in range(3)]
+    assert states == [BatchHighlighter.STATE_COMMENT_CONTINUED, BatchHighlighter.STATE_NORMAL,
+                      BatchHighlighter.STATE_NORMAL]
@@ -0,0 +1,70 @@
+# === Recherche dans l'éditeur (SearchReplaceDialog) ===
+import random
+import re
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from PySide6.QtWidgets import QPlainTextEdit  # noqa: E402
+
+from main import SearchReplaceDialog  # noqa: E402
+
+
+def make_dialog(text):
+    editor = QPlainTextEdit()
+    editor.setPlainText(text)
+    return SearchReplaceDialog(editor)
+
+
+def results_for(dialog, query):
+    dialog.search_input.setText(query)
+    return dialog.results()
+
+
+def test_refined_literal_keeps_overlapping_starts(qapp):
+    dialog = make_dialog("aaab")
+    assert results_for(dialog, "aa") == [(0, 2)]
+    assert results_for(dialog, "aab") == [(1, 4)]
+
+
+def test_refinement_matches_cold_search(qapp):
+    rng = random.Random(7)
+    for _ in range(50):
+        text = "".join(rng.choice("abAB \n") for _ in range(200))
+        query = "".join(rng.choice("abAB") for _ in range(4))
+        typed = make_dialog(text)
+        for size in range(1, len(query) + 1):
+            refined = results_for(typed, query[:size])
+        cold = results_for(make_dialog(text), query)
+        expected = [m.span() for m in re.finditer(re.escape(query), text, re.IGNORECASE)]
+        assert refined == cold == expected
+
+
+def test_whole_word_refinement(qapp):
+    dialog = make_dialog("echo echoes echo")
+    dialog.word_checkbox.setChecked(True)
+    results_for(dialog, "ec")
+    assert results_for(dialog, "echo") == [(0, 4), (12, 16)]
+
+
+@pytest.mark.parametrize("template", [r"\9", r"\g<nom>", "fin\\"])
+def test_invalid_replacement_template_leaves_document(qapp, template):
+    dialog = make_dialog("x y x")
+    dialog.regex_checkbox.setChecked(True)
+    dialog.search_input.setText("x")
+    dialog.replace_input.setText(template)
+    dialog.replace_all()
+    assert dialog.editor.toPlainText() == "x y x"
+    assert dialog.count_label.text().startswith("Remplacement invalide")
+
+
+def test_replace_all_with_groups_is_one_undo_step(qapp):
+    dialog = make_dialog("a=1\nb=2\nc=3")
+    dialog.regex_checkbox.setChecked(True)
+    dialog.search_input.setText(r"(\w)=(\d)")
+    dialog.replace_input.setText(r"\2=\1")
+    dialog.replace_all()
+    assert dialog.editor.toPlainText() == "1=a\n2=b\n3=c"
+    dialog.editor.document().undo()
+    assert dialog.editor.toPlainText() == "a=1\nb=2\nc=3"
@@ -0,0 +1,111 @@
+# === Index de recherche dans un dossier ===
+import os
+import random
+import re
+
+import pytest
+
+from engine import SearchIndex, read_script, scan_scripts, trigrams
+
+WORDS = ["echo", "ECHO", "set", "goto", ":fin", "call", "%VAR%", "copy", "été", "x", "a_b", "setlocal", "rem"]
+QUERIES = ["echo", "Echo", "set", "goto :fin", "%var%", "été", "a_b", "setl", "x", "zz", "co", "rem echo"]
+
+
+def write_script(path, rng, stamp):
+    lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 6))) for _ in range(rng.randint(0, 12))]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(rng.choice(["\r\n", "\n"]).join(lines))
+    # La mise à jour compare date et taille : on force une date distincte
+    os.utime(path, (stamp, stamp))
+
+
+def brute_force(folder, text, case_sensitive, whole_word):
+    source = re.escape(text)
+    if whole_word:
+        source = rf"(?<!\w){source}(?!\w)"
+    pattern = re.compile(source, 0 if case_sensitive else re.IGNORECASE)
+    found = []
+    for path in sorted(scan_scripts(folder)):
+        for number, line in enumerate(read_script(path).split("\n")):
+            line = line.rstrip("\r")
+            if pattern.search(line):
+                found.append((path, number, line))
+    return found
+
+
+def search_all(index, text, case_sensitive, whole_word):
+    return [hit for batch in index.search(text, case_sensitive, whole_word) for hit in batch]
+
+
+def check(index, folder):
+    for text in QUERIES:
+        for case_sensitive in (False, True):
+            for whole_word in (False, True):
+                expected = brute_force(folder, text, case_sensitive, whole_word)
+                assert search_all(index, text, case_sensitive, whole_word) == expected, (text, case_sensitive, whole_word)
+
+
+def test_trigrams():
+    assert trigrams("ab") == set()
+    assert trigrams("abcd") == {int.from_bytes(b"abc", "big"), int.from_bytes(b"bcd", "big")}
+    assert trigrams("ABC") == trigrams("abc")
+    # Octets UTF-8 : « é » compte pour deux
+    assert len(trigrams("éa")) == 1
+
+
+@pytest.mark.parametrize("pool", [False, True])
+def test_updates_match_brute_force(tmp_path, pool):
+    rng = random.Random(23)
+    folder = tmp_path / "scripts"
+    (folder / "sous").mkdir(parents=True)
+    (folder / "notes.txt").write_text("echo ignoré")
+    db = str(tmp_path / "index.sqlite3")
+    index = SearchIndex(str(folder), db)
+    if pool:
+        index.POOL_THRESHOLD = 0
+    paths = [str(folder / f"s{i}.bat") for i in range(12)] + [str(folder / "sous" / f"t{i}.CMD") for i in range(6)]
+    stamp = 1_000_000
+    for path in paths:
+        write_script(path, rng, stamp)
+    assert index.update(workers=2) == (len(paths), 0)
+    check(index, str(folder))
+    assert index.update() == (0, 0)
+
+    for step in range(3):
+        stamp += 10
+        for path in rng.sample(paths, 4):
+            write_script(path, rng, stamp)
+        removed = rng.sample(paths, 2)
+        for path in removed:
+            os.remove(path)
+            paths.remove(path)
+        added = str(folder / f"n{step}.bat")
+        write_script(added, rng, stamp)
+        paths.append(added)
+        changed, gone = index.update(workers=2)
+        assert gone == 2 and 1 <= changed <= 5
+        check(index, str(folder))
+
+    # Rechargé depuis la base, l'index donne les mêmes résultats
+    check(SearchIndex(str(folder), db), str(folder))
+
+
+def test_cache_invalidated_by_update(tmp_path):
+    script = tmp_path / "a.bat"
+    script.write_text("echo un\n")
+    os.utime(script, (1_000_000, 1_000_000))
+    index = SearchIndex(str(tmp_path), str(tmp_path / "index.sqlite3"))
+    index.update()
+    assert [hit[2] for hit in search_all(index, "echo", False, False)] == ["echo un"]
+    script.write_text("rem\necho deux\n")
+    index.update()
+    assert search_all(index, "echo", False, False) == [(str(script), 1, "echo deux")]
+
+
+def test_candidates_short_query_returns_all(tmp_path):
+    for name in ("b.bat", "a.cmd"):
+        (tmp_path / name).write_text("rem")
+    index = SearchIndex(str(tmp_path), str(tmp_path / "index.sqlite3"))
+    index.update()
+    assert index.candidates("re") == [str(tmp_path / "a.cmd"), str(tmp_path / "b.bat")]
+    assert index.candidates("zzz") == []